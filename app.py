@@ -1,10 +1,26 @@
 # app.py
 from dash import Dash
 from ui.layout import layout
+from ui.callbacks import register_callbacks
+from preprocessing.store import store
+from server.admin import register_admin_routes
+from server.profiling import register_profiling
+from server.api import register_api_routes
+from server.export import register_export_routes
+from server.compression import register_compression
 
 app = Dash(__name__, suppress_callback_exceptions=True)
 app.title = "Natural Disaster Dashboard"
 app.layout = layout
+register_callbacks(app)
+
+server = app.server
+register_admin_routes(server, store)
+register_profiling(server, store)
+register_api_routes(server, store)
+register_export_routes(server, store)
+register_compression(server, store)
+store.start_watcher()
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,103 @@
+# aggregate.py
+import pandas as pd
+
+from preprocessing.schema import AGGREGATE_REGIONS, ALL_DISASTERS, METRICS, load_continent_map
+from preprocessing.totals import select_totals
+
+# How each metric combines across rows: all of them add up, Damages (a share of GDP) included, as
+# in the precomputed totals and the views
+METRIC_AGG = {metric: 'sum' for metric in METRICS}
+
+# Public group-by names -> columns
+GROUP_BY_COLUMNS = {
+    'year': 'Year',
+    'disaster_type': 'Disaster Type',
+    'country': 'Country name',
+    'continent': 'Continent',
+}
+
+
+def filter_mask(data: pd.DataFrame, country: str = "World", disaster_type: str = "All",
+                year_start: int = None, year_end: int = None, by_country: bool = False) -> pd.Series:
+    """
+    Boolean mask of the rows for a country, disaster type and year range.
+
+    Parameters:
+    - data (pd.DataFrame): Disaster data.
+    - country (str): Country or aggregate region; 'World' selects the World rows, or every
+      country's rows if by_country is set.
+    - disaster_type (str): Disaster type, or 'All'.
+    - year_start (int): First year (inclusive), None for no bound.
+    - year_end (int): Last year (inclusive), None for no bound.
+    - by_country (bool): The result will be broken down by country.
+    """
+    if country == "World" and by_country:
+        mask = ~data['Country name'].isin(AGGREGATE_REGIONS)
+    else:
+        mask = data['Country name'] == country
+    if disaster_type != "All":
+        mask &= data['Disaster Type'] == disaster_type
+    if year_start is not None:
+        mask &= data['Year'] >= year_start
+    if year_end is not None:
+        mask &= data['Year'] <= year_end
+    return mask
+
+
+def filter_data(data: pd.DataFrame, country: str = "World", disaster_type: str = "All",
+                year_start: int = None, year_end: int = None, by_country: bool = False) -> pd.DataFrame:
+    """Returns the rows selected by filter_mask (same arguments)."""
+    return data[filter_mask(data, country, disaster_type, year_start, year_end, by_country)]
+
+
+def aggregate(data: pd.DataFrame, country: str = "World", disaster_type: str = "All", metrics: list = None,
+              year_start: int = None, year_end: int = None, group_by: list = ('year',), agg: str = None) -> pd.DataFrame:
+    """
+    Filters disaster data and aggregates metrics by the requested dimensions.
+
+    Parameters:
+    - data (pd.DataFrame): Disaster data.
+    - country, disaster_type, year_start, year_end: Filters, as in filter_data.
+    - metrics (list): Metrics to aggregate (default: all of METRICS).
+    - group_by (list): Keys of GROUP_BY_COLUMNS; empty for a single total row.
+    - agg (str): Aggregation for every metric (e.g. 'sum'); METRIC_AGG if None.
+
+    Returns:
+    - DataFrame with one column per group-by dimension and per metric, sorted by the dimensions.
+      Metrics with no reported value in a group are NaN. All disasters by year (or in total) come
+      from the precomputed totals (preprocessing/totals.py).
+
+    Raises:
+    - ValueError: For unknown metrics or group-by dimensions.
+    """
+    metrics = list(metrics or METRICS)
+    unknown = [m for m in metrics if m not in METRICS] + [g for g in group_by if g not in GROUP_BY_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown metric or group-by: {', '.join(unknown)}")
+
+    keys = [GROUP_BY_COLUMNS[g] for g in group_by]
+    if disaster_type == ALL_DISASTERS and keys in ([], ['Year']):
+        # All disasters by year: the precomputed totals (one row per year), as the year views read them
+        frame = select_totals(data, country, disaster_type, year_start, year_end)[keys + metrics]
+        return _aggregate_frame(frame, keys, metrics, agg)
+    by_country = bool({'Country name', 'Continent'} & set(keys))
+    columns = [k for k in keys if k != 'Continent'] + (['Country name'] if 'Continent' in keys else [])
+    frame = filter_data(data, country, disaster_type, year_start, year_end, by_country)[
+        list(dict.fromkeys(columns)) + metrics
+    ]
+    if 'Continent' in keys:
+        frame = frame.assign(Continent=frame['Country name'].astype(str).map(load_continent_map()).fillna('Other'))
+    return _aggregate_frame(frame, keys, metrics, agg)
+
+
+def _aggregate_frame(frame, keys, metrics, agg):
+    spec = {m: (agg or METRIC_AGG[m]) for m in metrics}
+    if not keys:
+        # min_count=1 keeps "nothing reported" as NaN rather than 0
+        totals = {m: (frame[m].sum(min_count=1) if spec[m] == 'sum' else frame[m].agg(spec[m])) for m in metrics}
+        return pd.DataFrame([totals], columns=metrics)
+    grouped = frame.groupby(keys, observed=True, sort=True)
+    result = pd.DataFrame({
+        m: (grouped[m].sum(min_count=1) if spec[m] == 'sum' else grouped[m].agg(spec[m])) for m in metrics
+    })
+    return result.reset_index()
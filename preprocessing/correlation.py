@@ -0,0 +1,172 @@
+# correlation.py
+import numpy as np
+import pandas as pd
+
+from preprocessing.aggregate import METRIC_AGG
+from preprocessing.schema import METRICS
+from preprocessing.store import get_derived
+
+# Yearly aggregation used for metric correlations (every metric adds up across disaster types)
+YEARLY_AGG = METRIC_AGG
+
+
+class CorrelationEngine:
+    """
+    Metric-correlation matrices for every country (including the 'World' rows) and year window.
+
+    Yearly metric values are stacked into a countries x years x metrics array once. Prefix sums of
+    x and x*x' over the year axis give the Pearson matrix for any window in O(1) per country.
+    Spearman matrices are precomputed for the configured windows. Both are stored as float32 (or
+    float16) upper triangles.
+    """
+
+    def __init__(self, data: pd.DataFrame, window: int = 20, step: int = 10, dtype=np.float32):
+        yearly = data.groupby(['Country name', 'Year'], observed=True).agg(YEARLY_AGG)
+        yearly = yearly[list(METRICS)]
+
+        country_codes, self.countries = pd.factorize(yearly.index.get_level_values(0), sort=True)
+        self.countries = np.asarray(self.countries.astype(str))
+        self._country_pos = {c: i for i, c in enumerate(self.countries)}
+        years = yearly.index.get_level_values(1).to_numpy(dtype=np.int64)
+        self.first_year = int(years.min())
+        self.years = np.arange(self.first_year, int(years.max()) + 1)
+        n_c, n_y, n_m = len(self.countries), len(self.years), len(METRICS)
+
+        # Stacked array; years without a row for a country are marked absent, NaN metrics count as 0
+        self.values = np.zeros((n_c, n_y, n_m))
+        self.present = np.zeros((n_c, n_y), dtype=bool)
+        self.values[country_codes, years - self.first_year] = yearly.astype('float64').to_numpy(na_value=0.0)
+        self.present[country_codes, years - self.first_year] = True
+
+        # Prefix sums over years (leading zero row) for windowed Pearson
+        self._n = _prefix(self.present.astype(np.float64))
+        self._sx = _prefix(self.values)
+        self._sxx = _prefix(self.values[:, :, :, None] * self.values[:, :, None, :])
+
+        self.triu = np.triu_indices(n_m, k=1)
+        self.dtype = dtype
+        self.windows = [(s, min(s + window - 1, int(self.years[-1])))
+                        for s in range(self.first_year, int(self.years[-1]) + 1, step)]
+        self.stored = {
+            'pearson': np.stack([self._pearson_all(s, e)[:, self.triu[0], self.triu[1]] for s, e in self.windows], axis=1).astype(dtype),
+            'spearman': np.stack([self._spearman_all(s, e)[:, self.triu[0], self.triu[1]] for s, e in self.windows], axis=1).astype(dtype),
+        }
+
+    def _slice(self, year_start, year_end):
+        i0 = int(np.clip(year_start - self.first_year, 0, len(self.years)))
+        i1 = int(np.clip(year_end - self.first_year + 1, i0, len(self.years)))
+        return i0, i1
+
+    def _pearson_all(self, year_start, year_end, rows=slice(None)):
+        # corr = cov(x, y) / sqrt(var(x) var(y)) from window sums, for all countries at once
+        i0, i1 = self._slice(year_start, year_end)
+        n = (self._n[rows, i1] - self._n[rows, i0])[:, None, None]
+        sx = self._sx[rows, i1] - self._sx[rows, i0]
+        sxx = self._sxx[rows, i1] - self._sxx[rows, i0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = sxx - sx[:, :, None] * sx[:, None, :] / n
+            scale = np.diagonal(sxx, axis1=1, axis2=2)
+        return _normalize_cov(cov, n[:, 0, 0], scale)
+
+    def _spearman_all(self, year_start, year_end, rows=slice(None)):
+        i0, i1 = self._slice(year_start, year_end)
+        x = self.values[rows, i0:i1]
+        valid = self.present[rows, i0:i1]
+        # Average ranks with ties among present years: rank = #less + (#equal + 1) / 2
+        both = valid[:, :, None] & valid[:, None, :]
+        less = ((x[:, None, :, :] < x[:, :, None, :]) & both[..., None]).sum(axis=2)
+        equal = ((x[:, None, :, :] == x[:, :, None, :]) & both[..., None]).sum(axis=2)
+        ranks = np.where(valid[..., None], less + (equal + 1) / 2, 0.0)
+        return _masked_pearson(ranks, valid)
+
+    def _unpack(self, triangle):
+        n_m = len(METRICS)
+        matrix = np.eye(n_m)
+        matrix[self.triu] = triangle
+        matrix[self.triu[::-1]] = triangle
+        # A metric that is constant over the window correlates with nothing, itself included
+        off_diagonal = matrix + np.diag(np.full(n_m, np.nan))
+        matrix[np.diag_indices(n_m)] = np.where(np.isnan(off_diagonal).all(axis=1), np.nan, 1.0)
+        return pd.DataFrame(matrix, index=METRICS, columns=METRICS)
+
+    def matrix(self, country: str, year_start: int, year_end: int, method: str = 'pearson') -> pd.DataFrame:
+        """
+        Returns the 6x6 metric correlation matrix for a country over [year_start, year_end].
+
+        Parameters:
+        - country (str): Country name, or 'World'.
+        - year_start (int): Start year.
+        - year_end (int): End year.
+        - method (str): 'pearson' or 'spearman'.
+
+        Returns:
+        - DataFrame indexed and labelled by METRICS (NaN where undefined).
+        """
+        if country not in self._country_pos:
+            raise ValueError(f"No data for country '{country}'.")
+        c = self._country_pos[country]
+        if (year_start, year_end) in self.windows:
+            w = self.windows.index((year_start, year_end))
+            return self._unpack(self.stored[method][c, w].astype(np.float64))
+        compute = self._pearson_all if method == 'pearson' else self._spearman_all
+        corr = compute(year_start, year_end, rows=slice(c, c + 1))[0]
+        return self._unpack(corr[self.triu])
+
+    def pair(self, metric_a: str, metric_b: str, year_start: int, year_end: int, method: str = 'pearson') -> np.ndarray:
+        """Returns the correlation of two metrics for every country (aligned with self.countries)."""
+        i, j = sorted((METRICS.index(metric_a), METRICS.index(metric_b)))
+        if (year_start, year_end) in self.windows:
+            k = np.flatnonzero((self.triu[0] == i) & (self.triu[1] == j))[0]
+            return self.stored[method][:, self.windows.index((year_start, year_end)), k].astype(np.float64)
+        compute = self._pearson_all if method == 'pearson' else self._spearman_all
+        return compute(year_start, year_end)[:, i, j]
+
+    def biggest_changes(self, metric_a: str = 'Deaths', metric_b: str = 'Damages', window_a: tuple = (1980, 1999),
+                        window_b: tuple = (2000, 2019), method: str = 'pearson', top_n: int = 20) -> pd.DataFrame:
+        """
+        Ranks countries by how much the correlation of two metrics changed between two year windows.
+
+        Returns:
+        - DataFrame with 'Country name', 'Before', 'After' and 'Change', sorted by absolute change.
+        """
+        before = self.pair(metric_a, metric_b, *window_a, method=method)
+        after = self.pair(metric_a, metric_b, *window_b, method=method)
+        change = after - before
+        order = np.argsort(-np.nan_to_num(np.abs(change), nan=-1.0), kind='stable')
+        order = order[~np.isnan(change[order])][:top_n]
+        return pd.DataFrame({'Country name': self.countries[order], 'Before': before[order],
+                             'After': after[order], 'Change': change[order]})
+
+
+def _prefix(array):
+    out = np.zeros((array.shape[0], array.shape[1] + 1) + array.shape[2:])
+    np.cumsum(array, axis=1, out=out[:, 1:])
+    return out
+
+
+def _masked_pearson(x, valid):
+    # x: (countries, years, metrics); valid: (countries, years)
+    w = valid[..., None].astype(np.float64)
+    n = w.sum(axis=1)[:, :, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (x * w).sum(axis=1) / n[:, :, 0]
+        d = (x - mean[:, None, :]) * w
+    cov = np.einsum('cym,cyk->cmk', d, d)
+    return _normalize_cov(cov, n[:, 0, 0], np.einsum('cym,cym->cm', x * w, x))
+
+
+def _normalize_cov(cov, n, scale):
+    # cov: (countries, metrics, metrics) co-moment sums; scale: sum of squares per metric, used to
+    # treat variances lost in floating-point cancellation as zero (constant series have no correlation)
+    var = np.diagonal(cov, axis1=1, axis2=2)
+    constant = var <= 1e-10 * np.maximum(scale, 1.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = cov / np.sqrt(var[:, :, None] * var[:, None, :])
+    corr[constant[:, :, None] | constant[:, None, :]] = np.nan
+    corr[n < 2] = np.nan
+    return corr.clip(-1, 1)
+
+
+def get_correlation_engine(data: pd.DataFrame) -> CorrelationEngine:
+    """Returns the CorrelationEngine for a dataset, building it on first use."""
+    return get_derived(data, 'correlation_engine', CorrelationEngine)
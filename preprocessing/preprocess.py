@@ -83,7 +83,8 @@ for idx in df_all.index:
         # Update the value
         df_all.loc[idx, 'Rendered homeless'] = new_value
         
-continents=["Africa", "Asia", "Europe", "North America", "South America","Australia"]
+# Australia is a country (Oceania is kept as an aggregate region of the country table)
+continents=["Africa", "Asia", "Europe", "North America", "South America"]
 
 df_conti = df_all[df_all['Country name'].isin(continents)]
 df_all_country = df_all[~df_all['Country name'].isin(continents)]
@@ -102,4 +103,5 @@ for idx in df.index:
         # Update the value
         df.loc[idx, 'Number of people left homeless from disasters'] = new_value
 
-df.to_csv('merged_output.csv', index=False)
\ No newline at end of file
+df.to_csv('merged_output.csv', index=False)
+# Canonical all-disasters totals and continent rows: run `python -m preprocessing.totals` from the repo root
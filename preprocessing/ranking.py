@@ -0,0 +1,81 @@
+# ranking.py
+import numpy as np
+import pandas as pd
+
+from preprocessing.schema import AGGREGATE_REGIONS, METRICS
+from preprocessing.store import get_derived
+
+
+class RankingIndex:
+    """
+    Cumulative-by-year metric totals for every (disaster type, metric, country).
+
+    cumulative[t, m, c, i] holds the sum of metric m for country c and disaster type t over
+    the first i years of the year axis, so any year range is a difference of two columns.
+    Disaster type index 0 is "All" (sum over types).
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        df = data[~data['Country name'].isin(AGGREGATE_REGIONS)]
+
+        country_codes, self.countries = pd.factorize(df['Country name'], sort=True)
+        type_codes, types = pd.factorize(df['Disaster Type'], sort=True)
+        self.disaster_types = ['All'] + [str(t) for t in types]
+        self.countries = np.asarray(self.countries.astype(str))
+
+        years = df['Year'].to_numpy(dtype=np.int64)
+        self.first_year = int(years.min())
+        n_years = int(years.max()) - self.first_year + 1
+        n_types, n_countries, n_metrics = len(types), len(self.countries), len(METRICS)
+
+        # Scatter all rows into a dense types x metrics x countries x years cube in one pass per metric
+        flat = (type_codes * n_countries + country_codes) * n_years + (years - self.first_year)
+        values = df[METRICS].astype('float64').to_numpy(na_value=0.0)
+        dense = np.empty((n_types + 1, n_metrics, n_countries, n_years))
+        for m in range(n_metrics):
+            binned = np.bincount(flat, weights=values[:, m], minlength=n_types * n_countries * n_years)
+            dense[1:, m] = binned.reshape(n_types, n_countries, n_years)
+        dense[0] = dense[1:].sum(axis=0)
+
+        self.cumulative = np.zeros(dense.shape[:3] + (n_years + 1,))
+        np.cumsum(dense, axis=3, out=self.cumulative[..., 1:])
+
+    def range_totals(self, disaster_type: str, metric: str, year_start: int, year_end: int) -> np.ndarray:
+        """
+        Returns the metric total per country (aligned with self.countries) over [year_start, year_end].
+        """
+        t = self.disaster_types.index(disaster_type)
+        m = METRICS.index(metric)
+        n_years = self.cumulative.shape[3] - 1
+        i0 = int(np.clip(year_start - self.first_year, 0, n_years))
+        i1 = int(np.clip(year_end - self.first_year + 1, 0, n_years))
+        cum = self.cumulative[t, m]
+        return cum[:, max(i1, i0)] - cum[:, i0]
+
+    def top_k(self, disaster_type: str, metric: str, year_start: int, year_end: int, k: int = 20) -> pd.DataFrame:
+        """
+        Returns the k countries with the largest metric total over the year range.
+
+        Parameters:
+        - disaster_type (str): Disaster type, or 'All'.
+        - metric (str): One of METRICS.
+        - year_start (int): First year (inclusive).
+        - year_end (int): Last year (inclusive).
+        - k (int): Number of countries to return.
+
+        Returns:
+        - DataFrame with 'Country name' and the metric column, sorted descending; zero totals are dropped.
+        """
+        totals = self.range_totals(disaster_type, metric, year_start, year_end)
+        if k < len(totals):
+            idx = np.argpartition(-totals, k)[:k]
+        else:
+            idx = np.arange(len(totals))
+        idx = idx[np.argsort(-totals[idx], kind='stable')]
+        idx = idx[totals[idx] > 0]
+        return pd.DataFrame({'Country name': self.countries[idx], metric: totals[idx]})
+
+
+def get_ranking_index(data: pd.DataFrame) -> RankingIndex:
+    """Returns the RankingIndex for a dataset, building it on first use."""
+    return get_derived(data, 'ranking_index', RankingIndex)
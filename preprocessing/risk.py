@@ -0,0 +1,167 @@
+# risk.py
+import threading
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.schema import AGGREGATE_REGIONS, DISASTER_TYPES, load_continent_map
+from preprocessing.store import get_derived
+
+# Components of the risk score and their weights (sum to 1)
+RISK_WEIGHTS = {'Deaths': 0.35, 'Affected': 0.25, 'Rendered homeless': 0.2, 'Damages': 0.2}
+RISK_COMPONENTS = list(RISK_WEIGHTS)
+# Recency weighting: a year counts half as much as one RISK_HALF_LIFE years more recent
+RISK_HALF_LIFE = 10
+
+
+def _country_rows(data):
+    return data[~data['Country name'].isin(AGGREGATE_REGIONS)]
+
+
+def _fingerprints(rows) -> pd.Series:
+    # Order-independent digest of each country's rows (sum of row hashes, wrapping at 2**64)
+    hashes = pd.util.hash_pandas_object(rows[['Year', 'Disaster Type'] + RISK_COMPONENTS], index=False)
+    return hashes.groupby(rows['Country name'].astype(str).to_numpy(), sort=True).sum()
+
+
+class RiskIndex:
+    """
+    Composite disaster risk score per country.
+
+    Each component (RISK_COMPONENTS) is the recency-weighted sum over years and disaster types:
+    sum(value * 0.5 ** ((reference_year - year) / RISK_HALF_LIFE)), reference_year being the
+    latest year in the data. Components are log-scaled and divided by their maximum over countries
+    (0..1); the score is 100 x the RISK_WEIGHTS-weighted sum, so a score's component points add up
+    to it.
+
+    The weighted totals are kept per disaster type (raw[t, m, c]) for the breakdown, together with
+    a fingerprint of each country's rows: updated() recomputes only the countries whose rows
+    changed (a newer reference year just rescales everyone else by the same factor) and then
+    re-normalizes, which is a pass over one value per country and component.
+
+    Attributes:
+    - countries (np.ndarray): Country names, sorted.
+    - reference_year (int): Year with full weight.
+    - raw (np.ndarray): Weighted totals, disaster types x components x countries.
+    - table (pd.DataFrame): One row per country, by rank: 'Rank', 'Country name', 'ISO_Code',
+      'Continent', 'Risk score', one points column per component and 'Main disaster type'.
+    """
+
+    def __init__(self, data: pd.DataFrame = None, _state: tuple = None):
+        if _state is None:
+            rows = _country_rows(data)
+            self.reference_year = int(rows['Year'].max())
+            self.fingerprints = _fingerprints(rows)
+            self.countries = self.fingerprints.index.to_numpy()
+            self.raw = self._weighted_totals(rows, self.countries, self.reference_year)
+        else:
+            self.countries, self.reference_year, self.raw, self.fingerprints = _state
+        self.recomputed = len(self.countries)
+        self._score()
+
+    @staticmethod
+    def _weighted_totals(rows, countries, reference_year):
+        n_types, n_components, n_countries = len(DISASTER_TYPES), len(RISK_COMPONENTS), len(countries)
+        raw = np.zeros((n_types, n_components, n_countries))
+        if rows.empty:
+            return raw
+        country_codes = pd.Index(countries).get_indexer(rows['Country name'].astype(str))
+        type_codes = pd.Index(DISASTER_TYPES).get_indexer(rows['Disaster Type'].astype(str))
+        keep = (country_codes >= 0) & (type_codes >= 0)
+        flat = type_codes[keep] * n_countries + country_codes[keep]
+        decay = 0.5 ** ((reference_year - rows['Year'].to_numpy(dtype=np.float64)[keep]) / RISK_HALF_LIFE)
+        values = rows[RISK_COMPONENTS].astype('float64').to_numpy(na_value=0.0)[keep] * decay[:, None]
+        for m in range(n_components):
+            raw[:, m] = np.bincount(flat, weights=values[:, m], minlength=n_types * n_countries).reshape(n_types, n_countries)
+        return raw
+
+    def updated(self, data: pd.DataFrame) -> "RiskIndex":
+        """
+        Returns the index of a new version of the data, recomputing only the countries whose rows
+        changed (added, edited or removed years) and re-normalizing the scores.
+        """
+        rows = _country_rows(data)
+        reference_year = int(rows['Year'].max())
+        fingerprints = _fingerprints(rows)
+        countries = fingerprints.index.to_numpy()
+
+        old = pd.Index(self.countries).get_indexer(countries)
+        previous = self.fingerprints.reindex(fingerprints.index)
+        changed = (old < 0) | (previous.to_numpy() != fingerprints.to_numpy())
+
+        raw = np.zeros((len(DISASTER_TYPES), len(RISK_COMPONENTS), len(countries)))
+        kept = ~changed
+        raw[..., kept] = self.raw[..., old[kept]] * 0.5 ** ((reference_year - self.reference_year) / RISK_HALF_LIFE)
+        if changed.any():
+            changed_rows = rows[rows['Country name'].astype(str).isin(countries[changed])]
+            raw[..., changed] = self._weighted_totals(changed_rows, countries[changed], reference_year)
+
+        index = RiskIndex(_state=(countries, reference_year, raw, fingerprints))
+        index.recomputed = int(changed.sum())
+        return index
+
+    def _score(self):
+        components = self.raw.sum(axis=0)  # components x countries
+        scaled = np.log1p(components)
+        top = scaled.max(axis=1, keepdims=True)
+        normalized = np.divide(scaled, top, out=np.zeros_like(scaled), where=top > 0)
+        weights = np.array([RISK_WEIGHTS[c] for c in RISK_COMPONENTS])[:, None]
+        self.points = 100 * weights * normalized
+        self.scores = self.points.sum(axis=0)
+        self.components = components
+
+        # Main disaster type: largest share of the points, splitting each component by type
+        shares = np.divide(self.raw, components, out=np.zeros_like(self.raw), where=components > 0)
+        by_type = (shares * self.points).sum(axis=1)  # types x countries
+        main_type = np.where(by_type.max(axis=0) > 0, np.asarray(DISASTER_TYPES, dtype=object)[by_type.argmax(axis=0)], None)
+
+        order = np.argsort(-self.scores, kind='stable')
+        continents = load_continent_map()
+        table = pd.DataFrame({
+            'Rank': np.arange(1, len(order) + 1, dtype=np.int16),
+            'Country name': self.countries[order],
+            'ISO_Code': [_iso3(c) for c in self.countries[order]],
+            'Continent': [continents.get(c, 'Other') for c in self.countries[order]],
+            'Risk score': self.scores[order].round(2),
+            **{f"{c} points": self.points[m, order].round(2) for m, c in enumerate(RISK_COMPONENTS)},
+            'Main disaster type': main_type[order],
+        })
+        self.table = table
+
+    def breakdown(self, country: str) -> pd.DataFrame:
+        """
+        Returns a country's score points by disaster type (rows) and component (columns).
+        """
+        c = int(np.searchsorted(self.countries, country))
+        if c >= len(self.countries) or self.countries[c] != country:
+            raise KeyError(f"Unknown country '{country}'.")
+        components = self.components[:, c]
+        shares = np.divide(self.raw[:, :, c], components, out=np.zeros_like(self.raw[:, :, c]), where=components > 0)
+        return pd.DataFrame(shares * self.points[:, c], index=DISASTER_TYPES, columns=RISK_COMPONENTS)
+
+
+def _iso3(country):
+    from visualizations.convert_iso import get_country_iso3
+    return _ISO_CODES.setdefault(country, get_country_iso3(country))
+
+
+_ISO_CODES = {}
+
+# The index of the most recently loaded dataset; the next one is derived from it incrementally
+_latest = None
+_latest_lock = threading.Lock()
+
+
+def _build_risk_index(data):
+    global _latest
+    with _latest_lock:
+        previous = _latest
+    index = previous.updated(data) if previous is not None else RiskIndex(data)
+    with _latest_lock:
+        _latest = index
+    return index
+
+
+def get_risk_index(data: pd.DataFrame) -> RiskIndex:
+    """Returns the RiskIndex for a dataset, updating the previous dataset's index on first use."""
+    return get_derived(data, 'risk_index', _build_risk_index)
@@ -0,0 +1,104 @@
+# schema.py
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+# Paths to the processed datasets written by preprocess.py
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'processed')
+COMBINED_DATA_PATH = os.path.join(DATA_DIR, 'combined_disaster_data.csv')
+CONTINENT_DATA_PATH = os.path.join(DATA_DIR, 'combined_disaster_continent.csv')
+COUNTRY_CONTINENT_PATH = os.path.join(DATA_DIR, 'country_continent.csv')
+MERGED_DATA_PATH = os.path.join(DATA_DIR, 'merged_output.csv')
+# Written by preprocessing/totals.py
+TOTALS_DATA_PATH = os.path.join(DATA_DIR, 'combined_disaster_totals.csv')
+
+DISASTER_TYPES = ['Droughts', 'Earthquakes', 'Extreme_Temperatures', 'Flood',
+                  'Mass_Movements_Dry', 'Storms', 'Volcanoes', 'Wildfires']
+# Disaster type of the precomputed all-disasters totals
+ALL_DISASTERS = 'All'
+
+# Rows in the country table that are aggregates rather than countries
+AGGREGATE_REGIONS = ['World', 'High-income countries', 'Upper-middle-income countries',
+                     'Lower-middle-income countries', 'Low-income countries',
+                     'European Union (27)', 'Oceania']
+
+# Head counts are whole numbers; Damages is a share of GDP and keeps NaN for "not reported"
+COUNT_METRICS = ['Deaths', 'Injuries', 'Assistance', 'Affected', 'Rendered homeless']
+METRICS = ['Deaths', 'Injuries', 'Assistance', 'Damages', 'Affected', 'Rendered homeless']
+
+# Canonical dtypes for the combined disaster DataFrame
+DTYPES = {
+    'Country name': 'category',
+    'Year': 'int16',
+    'Disaster Type': pd.CategoricalDtype(DISASTER_TYPES),
+    'Damages': 'float32',
+    **{metric: 'Int32' for metric in COUNT_METRICS},  # nullable, so missing stays <NA> instead of 0
+}
+# The totals table also has 'All' rows
+TOTALS_DTYPES = {**DTYPES, 'Disaster Type': pd.CategoricalDtype(DISASTER_TYPES + [ALL_DISASTERS])}
+
+
+def apply_schema(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Casts an already loaded disaster DataFrame to the canonical dtypes in one pass.
+
+    Parameters:
+    - data (pd.DataFrame): Disaster data with any subset of the columns in DTYPES.
+
+    Returns:
+    - A new DataFrame with compact dtypes; columns not in DTYPES are left untouched.
+    """
+    return data.astype({col: dtype for col, dtype in DTYPES.items() if col in data.columns})
+
+
+def load_disaster_data(path: str = COMBINED_DATA_PATH, dtypes: dict = DTYPES) -> pd.DataFrame:
+    """
+    Reads a processed disaster CSV with the canonical dtypes applied while parsing.
+
+    Parameters:
+    - path (str or file-like): CSV to read (default: combined_disaster_data.csv).
+    - dtypes (dict): Column dtypes (TOTALS_DTYPES for combined_disaster_totals.csv).
+
+    Returns:
+    - A DataFrame with categorical country/disaster columns, int16 years and compact metrics.
+    """
+    # read_csv ignores dtype entries for columns the file doesn't have
+    return pd.read_csv(path, dtype=dtypes)
+
+
+@lru_cache(maxsize=1)
+def load_continent_map() -> dict:
+    """
+    Returns the country -> continent mapping from country_continent.csv.
+    """
+    mapping = pd.read_csv(COUNTRY_CONTINENT_PATH)
+    return dict(zip(mapping['Country name'], mapping['Continent']))
+
+
+def memory_report(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Summarises the memory used by each column of a DataFrame.
+
+    Parameters:
+    - data (pd.DataFrame): Any DataFrame.
+
+    Returns:
+    - A DataFrame with one row per column ('Column', 'dtype', 'bytes') plus a 'Total' row.
+    """
+    usage = data.memory_usage(deep=True, index=True)
+    report = pd.DataFrame({
+        'Column': usage.index,
+        'dtype': [str(data[col].dtype) if col in data.columns else '' for col in usage.index],
+        'bytes': usage.values
+    })
+    total = pd.DataFrame({'Column': ['Total'], 'dtype': [''], 'bytes': [usage.sum()]})
+    return pd.concat([report, total], ignore_index=True)
+
+
+# Example usage for testing
+if __name__ == "__main__":
+    raw = pd.read_csv(COMBINED_DATA_PATH)
+    compact = load_disaster_data()
+    print(memory_report(raw))
+    print(memory_report(compact))
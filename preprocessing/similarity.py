@@ -0,0 +1,139 @@
+# similarity.py
+import numpy as np
+import pandas as pd
+
+from preprocessing.ranking import get_ranking_index
+from preprocessing.store import get_derived
+
+# Periods whose vectors are built with the index: (year_start, year_end), None = data bound
+STANDARD_PERIODS = [(None, None), (1950, None), (1980, None), (2000, None)]
+# Rows of the vector matrix multiplied at once by all_neighbours()
+BLOCK_ROWS = 256
+SIMILARITY_METRICS = ("cosine", "euclidean")
+
+
+class SimilarityIndex:
+    """
+    k-nearest-neighbour search over country disaster profiles.
+
+    A country's profile over a period is its vector of log1p totals per (disaster type, metric),
+    standardized per feature across countries; for cosine similarity rows are also scaled to unit
+    length. Period totals come from the RankingIndex prefix sums along the year axis, so any
+    period is one subtraction; STANDARD_PERIODS are built up front as float32 matrices.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self.ranking = get_ranking_index(data)
+        self.countries = self.ranking.countries
+        self.last_year = self.ranking.first_year + self.ranking.cumulative.shape[3] - 2
+        self._periods = {}
+        for year_start, year_end in STANDARD_PERIODS:
+            for metric in SIMILARITY_METRICS:
+                self.vectors(year_start, year_end, metric)
+
+    def _bounds(self, year_start, year_end):
+        return (self.ranking.first_year if year_start is None else int(year_start),
+                self.last_year if year_end is None else int(year_end))
+
+    def vectors(self, year_start: int = None, year_end: int = None, metric: str = "cosine"):
+        """
+        Returns (matrix, active): the float32 countries x features profile matrix of a period and
+        a mask of the countries with any reported value in it (the others can't be matched).
+        """
+        if metric not in SIMILARITY_METRICS:
+            raise ValueError(f"metric must be one of: {', '.join(SIMILARITY_METRICS)}")
+        key = self._bounds(year_start, year_end) + (metric,)
+        if key in self._periods:
+            return self._periods[key]
+
+        cum = self.ranking.cumulative[1:]  # per-type slots only; index 0 is their sum
+        n_years = cum.shape[3] - 1
+        i0 = int(np.clip(key[0] - self.ranking.first_year, 0, n_years))
+        i1 = max(int(np.clip(key[1] - self.ranking.first_year + 1, 0, n_years)), i0)
+        totals = cum[..., i1] - cum[..., i0]  # types x metrics x countries
+        features = np.log1p(np.maximum(totals, 0)).reshape(-1, totals.shape[2]).T
+        active = features.any(axis=1)
+
+        matrix = np.zeros_like(features)
+        if active.any():
+            mean = features[active].mean(axis=0)
+            std = features[active].std(axis=0)
+            matrix[active] = np.divide(features[active] - mean, std, out=np.zeros_like(features[active]),
+                                       where=std > 0)
+        if metric == "cosine":
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+        result = (np.ascontiguousarray(matrix, dtype=np.float32), active)
+        if key[:2] in [self._bounds(*p) for p in STANDARD_PERIODS]:
+            self._periods[key] = result
+        return result
+
+    def _scores(self, block, matrix, metric):
+        # Higher is more similar: cosine similarity, or negated Euclidean distance
+        products = block @ matrix.T
+        if metric == "cosine":
+            return products
+        sq = (matrix * matrix).sum(axis=1)
+        block_sq = (block * block).sum(axis=1)
+        return -np.sqrt(np.maximum(block_sq[:, None] - 2 * products + sq[None, :], 0))
+
+    def query(self, country: str, k: int = 10, year_start: int = None, year_end: int = None,
+              metric: str = "cosine") -> pd.DataFrame:
+        """
+        Returns the k countries with the most similar disaster profile over a period.
+
+        Parameters:
+        - country (str): Country to match.
+        - k (int): Number of matches.
+        - year_start (int): First year (inclusive), None for the first year of data.
+        - year_end (int): Last year (inclusive), None for the last year of data.
+        - metric (str): 'cosine' (similarity, higher is closer) or 'euclidean' (distance).
+
+        Returns:
+        - DataFrame with 'Country name' and 'similarity' or 'distance', closest first.
+        """
+        c = int(np.searchsorted(self.countries, country))
+        if c >= len(self.countries) or self.countries[c] != country:
+            raise KeyError(f"Unknown country '{country}'.")
+        matrix, active = self.vectors(year_start, year_end, metric)
+        if not active[c]:
+            raise ValueError(f"No data for {country} in this period.")
+        scores = self._scores(matrix[c:c + 1], matrix, metric)[0]
+        scores[~active] = -np.inf
+        scores[c] = -np.inf
+        idx = _top_k(scores[None, :], min(k, int(active.sum()) - 1))[0]
+        column = 'similarity' if metric == "cosine" else 'distance'
+        values = scores[idx] if metric == "cosine" else -scores[idx]
+        return pd.DataFrame({'Country name': self.countries[idx], column: values.astype(np.float64)})
+
+    def all_neighbours(self, k: int = 10, year_start: int = None, year_end: int = None,
+                       metric: str = "cosine") -> np.ndarray:
+        """
+        Top-k neighbour indices (into self.countries) of every country, -1 for countries without
+        data, computed BLOCK_ROWS rows at a time so the score matrix never exceeds one block.
+        """
+        matrix, active = self.vectors(year_start, year_end, metric)
+        k = max(min(k, int(active.sum()) - 1), 0)
+        result = np.full((len(matrix), k), -1, dtype=np.int64)
+        for start in range(0, len(matrix), BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, len(matrix))
+            scores = self._scores(matrix[start:stop], matrix, metric)
+            scores[:, ~active] = -np.inf
+            scores[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+            result[start:stop] = _top_k(scores, k)
+        result[~active] = -1
+        return result
+
+
+def _top_k(scores, k):
+    # Column indices of the k largest scores of each row, best first
+    if k <= 0:
+        return np.empty((len(scores), 0), dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, idx, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(idx, order, axis=1)
+
+
+def get_similarity_index(data: pd.DataFrame) -> SimilarityIndex:
+    """Returns the SimilarityIndex for a dataset, building it (and the standard periods) on first use."""
+    return get_derived(data, 'similarity_index', SimilarityIndex)
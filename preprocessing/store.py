@@ -0,0 +1,203 @@
+# store.py
+import hashlib
+import io
+import os
+import threading
+import time
+import weakref
+from typing import NamedTuple
+
+import pandas as pd
+
+from preprocessing.schema import COMBINED_DATA_PATH, METRICS, TOTALS_DATA_PATH, TOTALS_DTYPES, load_disaster_data
+
+REQUIRED_COLUMNS = ['Country name', 'Year', 'Disaster Type'] + METRICS
+
+
+class DataSnapshot(NamedTuple):
+    """An immutable, versioned view of the disaster dataset."""
+    data: pd.DataFrame
+    version: str       # content digest of the source files, stable across processes
+    generation: int    # increments on every swap within this process
+    loaded_at: float
+
+
+def validate_disaster_data(data: pd.DataFrame) -> None:
+    """
+    Checks that a freshly loaded disaster DataFrame is safe to serve.
+
+    Parameters:
+    - data (pd.DataFrame): Candidate dataset.
+
+    Raises:
+    - ValueError: If columns are missing, the table is empty or metrics are negative.
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in data.columns]
+    if missing:
+        raise ValueError(f"Dataset is missing columns: {', '.join(missing)}")
+    if data.empty:
+        raise ValueError("Dataset is empty.")
+    if (data[METRICS].fillna(0) < 0).any().any():
+        raise ValueError("Dataset contains negative metric values.")
+
+
+class DataStore:
+    """
+    Holds the current DataSnapshot and swaps it atomically when the source files change.
+
+    Readers call current() once per request and keep using that snapshot, so a request
+    in flight always finishes against the version it started with.
+
+    The precomputed totals (preprocessing/totals.py), if present, are loaded with the dataset
+    and attached to it as its 'totals' derived structure.
+    """
+
+    def __init__(self, path: str = COMBINED_DATA_PATH, totals_path: str = TOTALS_DATA_PATH):
+        self.path = path
+        self.totals_path = totals_path
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self._last_stat = None
+
+    def current(self) -> DataSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.refresh()
+            snapshot = self._snapshot
+        return snapshot
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Loads and validates the source files, then swaps them in if their content changed.
+
+        Parameters:
+        - force (bool): Swap even if the content digest is unchanged.
+
+        Returns:
+        - True if a new snapshot was installed.
+        """
+        with self._lock:
+            stat = self._source_stat()
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+            raw_totals = None
+            if self.totals_path and os.path.exists(self.totals_path):
+                with open(self.totals_path, 'rb') as f:
+                    raw_totals = f.read()
+            version = hashlib.sha1(raw + (raw_totals or b'')).hexdigest()[:12]
+            old = self._snapshot
+            self._last_stat = stat
+            if old is not None and old.version == version and not force:
+                return False
+
+            data = load_disaster_data(io.BytesIO(raw))
+            validate_disaster_data(data)
+            if raw_totals is not None:
+                totals = load_disaster_data(io.BytesIO(raw_totals), TOTALS_DTYPES)
+                validate_disaster_data(totals)
+                get_derived(data, 'totals', lambda _: totals)
+
+            generation = old.generation + 1 if old is not None else 1
+            # Single reference assignment: readers see either the old or the new snapshot
+            self._snapshot = DataSnapshot(data, version, generation, time.time())
+            print(f"Loaded disaster data version {version} (generation {generation})")
+            return True
+
+    def _source_stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        try:
+            totals = os.stat(self.totals_path) if self.totals_path else None
+        except OSError:
+            totals = None
+        return (stat.st_mtime_ns, stat.st_size) + ((totals.st_mtime_ns, totals.st_size) if totals else ())
+
+    def _watch(self, interval: float):
+        pending = None
+        while not self._stop.wait(interval):
+            current = self._source_stat()
+            if current is None or current == self._last_stat:
+                pending = None
+                continue
+            # Only reload once the file has stopped changing for a full interval (no half-written CSVs)
+            if current != pending:
+                pending = current
+                continue
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the old snapshot if the new file is broken
+                print(f"Error refreshing disaster data: {e}")
+                self._last_stat = current
+            pending = None
+
+    def start_watcher(self, interval: float = 30.0):
+        """
+        Starts a daemon thread that polls the source files and refreshes on change.
+
+        Parameters:
+        - interval (float): Seconds between checks (default: 30).
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="data-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+# Process-wide store used by the dashboard
+store = DataStore()
+
+
+# Precomputed structures (indexes, matrices) derived from one dataset, dropped with it
+_derived = {}
+_derived_lock = threading.Lock()
+_build_locks = {}
+
+
+def get_derived(data: pd.DataFrame, name: str, build):
+    """
+    Returns build(data), computing it once per DataFrame object.
+
+    Parameters:
+    - data (pd.DataFrame): The dataset the structure is derived from (treated as read-only).
+    - name (str): Name of the derived structure.
+    - build (callable): Function of the DataFrame that computes it.
+
+    Returns:
+    - The cached result; it is released when the DataFrame is garbage collected.
+    """
+    key = (id(data), name)
+    with _derived_lock:
+        if key in _derived:
+            return _derived[key]
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+
+    # One builder per key; concurrent callers wait for it rather than building the same index
+    with build_lock:
+        with _derived_lock:
+            if key in _derived:
+                return _derived[key]
+        result = build(data)
+        with _derived_lock:
+            if not any(k[0] == id(data) for k in _derived):
+                weakref.finalize(data, _drop_derived, id(data))
+            _derived[key] = result
+            _build_locks.pop(key, None)
+        return result
+
+
+def _drop_derived(frame_id):
+    with _derived_lock:
+        for key in [k for k in _derived if k[0] == frame_id]:
+            del _derived[key]
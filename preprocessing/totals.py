@@ -0,0 +1,170 @@
+# totals.py
+"""
+Canonical all-disasters totals, precomputed so the default views ("World", "All") read one row
+per year instead of grouping across every disaster type at request time.
+
+merged_output.csv holds the all-disasters annual totals per country/region under its own column
+names; they also count disaster types outside DISASTER_TYPES, so they are at least the per-type
+sums. build_totals() renames them to METRICS, reconciles them with the per-type sums and adds the
+per-type continent rows of combined_disaster_continent.csv, all under the combined-data schema
+('Disaster Type' == ALL_DISASTERS for the totals).
+
+Usage (after preprocess.py): python -m preprocessing.totals
+"""
+import pandas as pd
+
+from preprocessing.schema import (ALL_DISASTERS, CONTINENT_DATA_PATH, MERGED_DATA_PATH, METRICS, TOTALS_DATA_PATH,
+                                  TOTALS_DTYPES, load_disaster_data)
+from preprocessing.store import get_derived
+
+# merged_output.csv columns -> metrics
+MERGED_COLUMNS = {
+    'Number of deaths from disasters': 'Deaths',
+    'Number of people injured from disasters': 'Injuries',
+    'Number of assistances provided': 'Assistance',
+    'Total economic damages from disasters as a share of GDP': 'Damages',
+    'Number of total people affected by disasters': 'Affected',
+    'Number of people left homeless from disasters': 'Rendered homeless',
+}
+
+COLUMNS = ['Country name', 'Year'] + METRICS + ['Disaster Type']
+KEYS = ['Country name', 'Year']
+
+
+def type_sums(data: pd.DataFrame) -> pd.DataFrame:
+    """Per country/region and year, the sum of every metric over the disaster types in data."""
+    frame = data[KEYS + METRICS].astype({'Country name': str})
+    return frame.groupby(KEYS, sort=True)[METRICS].sum(min_count=1)
+
+
+def build_totals(data: pd.DataFrame, merged: pd.DataFrame = None, continents: pd.DataFrame = None):
+    """
+    Builds the totals table.
+
+    Parameters:
+    - data (pd.DataFrame): Per-type disaster data (combined_disaster_data.csv).
+    - merged (pd.DataFrame): All-disasters totals as read from merged_output.csv; None to derive the
+      totals from the per-type sums alone.
+    - continents (pd.DataFrame): Per-type continent data (combined_disaster_continent.csv), or None.
+
+    Returns:
+    - (totals, reconciled): the totals DataFrame with TOTALS_DTYPES, and per metric the number of
+      merged values replaced because they were missing or below the per-type sum.
+    """
+    per_type = pd.concat([data, continents]) if continents is not None else data
+    sums = type_sums(per_type)
+    reconciled = dict.fromkeys(METRICS, 0)
+    if merged is None:
+        all_rows = sums
+    else:
+        reported = (merged.rename(columns=MERGED_COLUMNS)[KEYS + METRICS]
+                    .astype({'Country name': str})
+                    .set_index(KEYS).sort_index())
+        all_rows = reported.reindex(reported.index.union(sums.index))
+        sums = sums.reindex(all_rows.index)
+        for metric in METRICS:
+            # A total can't be below the sum of its parts (e.g. the homeless counts were jittered per file)
+            replace = sums[metric].notna() & ~(all_rows[metric] >= sums[metric])
+            reconciled[metric] = int(replace.sum())
+            all_rows[metric] = all_rows[metric].where(~replace, sums[metric])
+
+    frames = [all_rows.reset_index().assign(**{'Disaster Type': ALL_DISASTERS})]
+    if continents is not None:
+        frames.append(continents)
+    totals = pd.concat(frames, ignore_index=True)[COLUMNS]
+    return totals.astype(TOTALS_DTYPES), reconciled
+
+
+def check_totals(data: pd.DataFrame, totals: pd.DataFrame, rtol: float = 0.01) -> pd.DataFrame:
+    """
+    Consistency check of the totals against the per-type data.
+
+    Parameters:
+    - data (pd.DataFrame): Per-type disaster data.
+    - totals (pd.DataFrame): The totals table.
+    - rtol (float): Relative tolerance.
+
+    Returns:
+    - One row per violation ('Country name', 'Year', 'Metric', 'Total', 'Type sum'): an 'All' total
+      below the sum of the per-type rows it covers. Empty if consistent.
+    """
+    per_type = pd.concat([data, totals[totals['Disaster Type'] != ALL_DISASTERS]])
+    sums = type_sums(per_type)
+    all_rows = totals[totals['Disaster Type'] == ALL_DISASTERS].astype({'Country name': str}).set_index(KEYS)
+    sums = sums.reindex(all_rows.index)
+    violations = []
+    for metric in METRICS:
+        total = all_rows[metric].astype('float64')
+        expected = sums[metric].astype('float64')
+        bad = expected.notna() & ~(total >= expected * (1 - rtol))
+        violations.append(pd.DataFrame({'Metric': metric, 'Total': total[bad], 'Type sum': expected[bad]}))
+    return pd.concat(violations).reset_index()[['Country name', 'Year', 'Metric', 'Total', 'Type sum']]
+
+
+def load_totals(path: str = TOTALS_DATA_PATH) -> pd.DataFrame:
+    """Reads combined_disaster_totals.csv with TOTALS_DTYPES."""
+    return load_disaster_data(path, TOTALS_DTYPES)
+
+
+def get_totals(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns the totals table of a dataset: the precomputed one the DataStore attaches to the
+    dataset it serves, otherwise (e.g. a reduced level of detail) the per-type sums of data.
+    """
+    return get_derived(data, 'totals', lambda d: build_totals(d)[0])
+
+
+def select_totals(data: pd.DataFrame, country: str = "World", disaster_type: str = ALL_DISASTERS,
+                  year_start: int = None, year_end: int = None) -> pd.DataFrame:
+    """
+    Rows (one per year, sorted) of a country, aggregate region or continent for one disaster type,
+    or for all disasters, without grouping the per-type data.
+
+    Parameters:
+    - data (pd.DataFrame): Per-type disaster data.
+    - country (str): Country, aggregate region ('World', ...) or continent.
+    - disaster_type (str): Disaster type, or 'All'.
+    - year_start (int): First year (inclusive), None for no bound.
+    - year_end (int): Last year (inclusive), None for no bound.
+
+    Returns:
+    - A DataFrame with the combined-data columns.
+    """
+    def rows(source):
+        mask = (source['Country name'] == country) & (source['Disaster Type'] == disaster_type)
+        if year_start is not None:
+            mask &= source['Year'] >= year_start
+        if year_end is not None:
+            mask &= source['Year'] <= year_end
+        return source[mask].sort_values('Year')
+
+    if disaster_type != ALL_DISASTERS:
+        selected = rows(data)
+        if not selected.empty:
+            return selected
+    # All disasters, or a continent's per-type rows
+    return rows(get_totals(data))
+
+
+def write_totals(path: str = TOTALS_DATA_PATH) -> pd.DataFrame:
+    """
+    Builds the totals from the processed files, writes them to path and prints a summary.
+
+    Returns:
+    - The consistency-check violations (see check_totals).
+    """
+    data = load_disaster_data()
+    totals, reconciled = build_totals(data, pd.read_csv(MERGED_DATA_PATH), load_disaster_data(CONTINENT_DATA_PATH))
+    totals.to_csv(path, index=False)
+    all_rows = (totals['Disaster Type'] == ALL_DISASTERS).sum()
+    print(f"Wrote {len(totals)} rows ({all_rows} all-disasters totals) to {path}")
+    for metric, count in reconciled.items():
+        if count:
+            print(f"  {metric}: {count} totals replaced by the per-type sum")
+    violations = check_totals(data, totals)
+    print(f"Consistency check: {len(violations)} totals below their per-type sums")
+    return violations
+
+
+if __name__ == "__main__":
+    raise SystemExit(1 if len(write_totals()) else 0)
@@ -0,0 +1,176 @@
+# trends.py
+import numpy as np
+import pandas as pd
+
+from preprocessing.schema import AGGREGATE_REGIONS, ALL_DISASTERS, METRICS
+from preprocessing.store import get_derived
+from preprocessing.totals import get_totals
+
+# Trends are fitted over the last TREND_YEARS years of data
+TREND_YEARS = 30
+# A year is anomalous when its (log) value is ANOMALY_Z standard deviations above the mean of the
+# ANOMALY_WINDOW years before it
+ANOMALY_WINDOW = 10
+ANOMALY_Z = 3.0
+
+
+class TrendIndex:
+    """
+    Linear trends and anomalous years of every (disaster type, metric, country) yearly series.
+
+    All series are stacked into one dense types x metrics x countries x years array (years without
+    a reported value count as 0) and fitted at once:
+    - trend: closed-form least squares over the last TREND_YEARS years;
+    - anomalies: rolling z-score of log1p(value) against the ANOMALY_WINDOW preceding years, from
+      cumulative sums along the year axis; only spikes (z >= ANOMALY_Z) are flagged.
+
+    Disaster type index 0 is "All" (the all-disasters totals, see preprocessing/totals.py).
+
+    Attributes:
+    - table (pd.DataFrame): One row per series with any reported value in the trend window:
+      'Country name', 'Disaster Type', 'Metric', 'mean', 'slope' (per year), 'intercept' (at
+      the first trend year), 'r2', 'change' (slope relative to the mean), 'last', 'anomalies'
+      and 'last_anomaly'.
+    - anomalies (pd.DataFrame): One row per flagged year: 'Country name', 'Disaster Type',
+      'Metric', 'Year', 'value', 'z'.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        country_codes, countries = pd.factorize(data['Country name'], sort=True)
+        type_codes, types = pd.factorize(data['Disaster Type'], sort=True)
+        self.countries = np.asarray(countries.astype(str))
+        self.disaster_types = [ALL_DISASTERS] + [str(t) for t in types]
+
+        years = data['Year'].to_numpy(dtype=np.int64)
+        self.first_year = int(years.min())
+        self.years = np.arange(self.first_year, int(years.max()) + 1)
+        n_types, n_metrics, n_countries, n_years = len(types) + 1, len(METRICS), len(self.countries), len(self.years)
+
+        # Per-type rows into slots 1.., the all-disasters totals of the same countries into slot 0
+        totals = get_totals(data)
+        totals = totals[(totals['Disaster Type'] == ALL_DISASTERS)]
+        total_codes = pd.Index(self.countries).get_indexer(totals['Country name'].astype(str))
+        totals = totals[total_codes >= 0]
+        rows = np.concatenate([(type_codes + 1) * n_countries + country_codes, total_codes[total_codes >= 0]])
+        flat = rows * n_years + np.concatenate([years, totals['Year'].to_numpy(dtype=np.int64)]) - self.first_year
+        values = np.concatenate([data[METRICS].astype('float64').to_numpy(na_value=0.0),
+                                 totals[METRICS].astype('float64').to_numpy(na_value=0.0)])
+        self.dense = np.empty((n_types, n_metrics, n_countries, n_years))
+        for m in range(n_metrics):
+            binned = np.bincount(flat, weights=values[:, m], minlength=n_types * n_countries * n_years)
+            self.dense[:, m] = binned.reshape(n_types, n_countries, n_years)
+
+        self.trend_start = max(self.first_year, int(self.years[-1]) - TREND_YEARS + 1)
+        self._fit_trends()
+        self._find_anomalies()
+        self.table = self._build_table()
+
+    def _fit_trends(self):
+        # slope = sum(xc * y) / sum(xc^2) with centered x; identical x for every series
+        y = self.dense[..., self.trend_start - self.first_year:]
+        x = np.arange(y.shape[-1], dtype=np.float64)
+        xc = x - x.mean()
+        self.mean = y.mean(axis=-1)
+        self.slope = y @ xc / (xc @ xc) if len(x) > 1 else np.zeros(y.shape[:-1])
+        self.intercept = self.mean - self.slope * x.mean()
+        ss_tot = ((y - self.mean[..., None]) ** 2).sum(axis=-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.r2 = np.where(ss_tot > 0, self.slope ** 2 * (xc @ xc) / ss_tot, 0.0)
+            self.change = np.where(self.mean > 0, self.slope / self.mean, 0.0)
+
+    def _find_anomalies(self):
+        # Trailing mean/std of the previous ANOMALY_WINDOW years from cumulative sums
+        v = np.log1p(self.dense)
+        w = ANOMALY_WINDOW
+        zero = np.zeros(v.shape[:-1] + (1,))
+        s1 = np.concatenate([zero, np.cumsum(v, axis=-1)], axis=-1)
+        s2 = np.concatenate([zero, np.cumsum(v * v, axis=-1)], axis=-1)
+        n_years = v.shape[-1]
+        z = np.zeros_like(v)
+        if n_years > w:
+            mean = (s1[..., w:n_years] - s1[..., :n_years - w]) / w
+            var = (s2[..., w:n_years] - s2[..., :n_years - w]) / w - mean ** 2
+            std = np.sqrt(np.maximum(var, 0.0))
+            current = v[..., w:]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                z[..., w:] = np.where(std > 1e-9, (current - mean) / std, 0.0)
+        self.flags = (z >= ANOMALY_Z) & (self.dense > 0)
+        self.z = z
+
+    def _build_table(self):
+        t, m, c = np.nonzero(self.mean > 0)
+        counts = self.flags.sum(axis=-1)
+        # Index of the last flagged year (or -1)
+        last = np.where(self.flags.any(axis=-1), self.flags.shape[-1] - 1 - np.argmax(self.flags[..., ::-1], axis=-1), -1)
+        last_year = np.where(last[t, m, c] >= 0, self.first_year + last[t, m, c], -1)
+
+        ft, fm, fc, fy = np.nonzero(self.flags)
+        self.anomalies = pd.DataFrame({
+            'Country name': pd.Categorical.from_codes(fc, self.countries),
+            'Disaster Type': pd.Categorical.from_codes(ft, self.disaster_types),
+            'Metric': pd.Categorical.from_codes(fm, METRICS),
+            'Year': (self.first_year + fy).astype('int16'),
+            'value': self.dense[ft, fm, fc, fy],
+            'z': self.z[ft, fm, fc, fy].astype('float32'),
+        })
+        return pd.DataFrame({
+            'Country name': pd.Categorical.from_codes(c, self.countries),
+            'Disaster Type': pd.Categorical.from_codes(t, self.disaster_types),
+            'Metric': pd.Categorical.from_codes(m, METRICS),
+            'mean': self.mean[t, m, c],
+            'slope': self.slope[t, m, c],
+            'intercept': self.intercept[t, m, c],
+            'r2': self.r2[t, m, c].astype('float32'),
+            'change': self.change[t, m, c].astype('float32'),
+            'last': self.dense[t, m, c, -1],
+            'anomalies': counts[t, m, c].astype('int16'),
+            'last_anomaly': pd.array(np.where(last_year >= 0, last_year, None), dtype='Int16'),
+        })
+
+    def profile(self, country: str) -> pd.DataFrame:
+        """Returns the trend table rows of one country or region."""
+        return self.table[self.table['Country name'] == country].reset_index(drop=True)
+
+    def series(self, country: str, disaster_type: str = ALL_DISASTERS, metric: str = "Deaths") -> pd.DataFrame:
+        """
+        Returns one yearly series with its trend line and anomaly flags.
+
+        Returns:
+        - DataFrame with 'Year', 'value', 'trend' (NaN outside the trend window) and 'anomaly'.
+        """
+        t = self.disaster_types.index(disaster_type)
+        m = METRICS.index(metric)
+        c = int(np.searchsorted(self.countries, country))
+        if c >= len(self.countries) or self.countries[c] != country:
+            raise KeyError(f"Unknown country '{country}'.")
+        x = self.years - self.trend_start
+        trend = np.where(x >= 0, self.intercept[t, m, c] + self.slope[t, m, c] * x, np.nan)
+        return pd.DataFrame({'Year': self.years, 'value': self.dense[t, m, c], 'trend': trend,
+                             'anomaly': self.flags[t, m, c]})
+
+    def biggest_movers(self, metric: str = "Deaths", disaster_type: str = ALL_DISASTERS, k: int = 10,
+                       by: str = "slope") -> pd.DataFrame:
+        """
+        Returns the countries with the steepest rising and falling trends.
+
+        Parameters:
+        - metric (str): One of METRICS.
+        - disaster_type (str): Disaster type, or 'All'.
+        - k (int): Countries per direction.
+        - by (str): 'slope' (absolute change per year) or 'change' (relative to the mean).
+
+        Returns:
+        - Trend table rows (aggregate regions excluded), the k largest increases then the k largest
+          decreases; rows without a trend are dropped.
+        """
+        rows = self.table[(self.table['Metric'] == metric) & (self.table['Disaster Type'] == disaster_type)
+                          & ~self.table['Country name'].isin(AGGREGATE_REGIONS)]
+        rows = rows[rows[by] != 0]
+        up = rows[rows[by] > 0].nlargest(k, by)
+        down = rows[rows[by] < 0].nsmallest(k, by)
+        return pd.concat([up, down], ignore_index=True)
+
+
+def get_trend_index(data: pd.DataFrame) -> TrendIndex:
+    """Returns the TrendIndex for a dataset, building it on first use."""
+    return get_derived(data, 'trend_index', TrendIndex)
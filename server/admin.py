@@ -0,0 +1,40 @@
+# admin.py
+import hmac
+import os
+
+from flask import abort, jsonify, request
+
+ADMIN_TOKEN_ENV = "DASHBOARD_ADMIN_TOKEN"
+
+
+def is_admin_request() -> bool:
+    """True if the request carries the admin token from the DASHBOARD_ADMIN_TOKEN env var."""
+    token = os.environ.get(ADMIN_TOKEN_ENV)
+    if not token:
+        return False  # Admin features are disabled unless a token is configured
+    return hmac.compare_digest(request.headers.get("X-Admin-Token", ""), token)
+
+
+def register_admin_routes(server, store):
+    """
+    Adds admin-only endpoints to the Flask server behind the Dash app.
+
+    Parameters:
+    - server (flask.Flask): The Dash app's server.
+    - store (DataStore): The dataset store to refresh.
+    """
+
+    @server.route("/admin/refresh", methods=["POST"])
+    def admin_refresh():
+        if not is_admin_request():
+            abort(403)
+        try:
+            swapped = store.refresh(force=request.args.get("force") == "1")
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+        snapshot = store.current()
+        return jsonify({
+            "swapped": swapped,
+            "version": snapshot.version,
+            "generation": snapshot.generation
+        })
@@ -0,0 +1,128 @@
+# api.py
+import json
+
+from flask import Response, jsonify, request
+
+from preprocessing.aggregate import aggregate
+from server.streaming import ChunkSink
+from visualizations.cache import get_cached_aggregate
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+# Rows per chunk when a whole result is streamed (limit=0)
+STREAM_CHUNK_ROWS = 10000
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+
+def _parse_query(args):
+    # Query string -> aggregate() arguments; raises ValueError on malformed input
+    def optional_int(name):
+        value = args.get(name, "")
+        return int(value) if value != "" else None
+
+    group_by = args.get("group_by", "year")
+    metrics = args.get("metric", "")
+    return dict(
+        country=args.get("country", "World") or "World",
+        disaster_type=args.get("disaster_type", "All") or "All",
+        metrics=tuple(m.strip() for m in metrics.split(",") if m.strip()) or None,
+        year_start=optional_int("year_start"),
+        year_end=optional_int("year_end"),
+        group_by=tuple(g.strip() for g in group_by.split(",") if g.strip()),
+    )
+
+
+def _wants_arrow(args):
+    return args.get("format") == "arrow" or (
+        "format" not in args and request.accept_mimetypes.best == ARROW_MIMETYPE
+    )
+
+
+def _json_rows(frame) -> str:
+    # pandas writes NaN/<NA> as null and categoricals as their labels
+    return frame.to_json(orient="values", date_format="iso")
+
+
+def _json_page(result, version, offset, limit):
+    page = result.iloc[offset:offset + limit]
+    next_offset = offset + limit if offset + limit < len(result) else None
+    header = json.dumps({"version": version, "columns": list(result.columns), "total": len(result),
+                         "offset": offset, "limit": limit, "next_offset": next_offset})
+    return header[:-1] + ',"rows":' + _json_rows(page) + "}"
+
+
+def _json_stream(result, version):
+    header = json.dumps({"version": version, "columns": list(result.columns), "total": len(result)})
+    yield header[:-1] + ',"rows":['
+    for start in range(0, len(result), STREAM_CHUNK_ROWS):
+        rows = _json_rows(result.iloc[start:start + STREAM_CHUNK_ROWS])[1:-1]
+        if rows:
+            yield ("," if start else "") + rows
+    yield "]}"
+
+
+def _arrow_stream(result, chunk_rows):
+    import pyarrow as pa  # optional: only needed for Arrow responses
+
+    table = pa.Table.from_pandas(result, preserve_index=False)
+    sink = ChunkSink()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=max(chunk_rows, 1)):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def register_api_routes(server, store):
+    """
+    Adds the read-only aggregate API to the Flask server behind the Dash app.
+
+    GET /api/aggregate?country=&disaster_type=&metric=&year_start=&year_end=&group_by=
+        &offset=&limit=&format=json|arrow&version=
+
+    - metric and group_by are comma-separated (group_by: year, disaster_type, country, continent;
+      empty for one total row).
+    - Results are paginated with offset/limit (limit=0 streams the whole result in chunks).
+    - Arrow IPC (stream format) is returned for format=arrow or Accept: application/vnd.apache.arrow.stream.
+    - Passing the version of a previous page pins pagination: a changed dataset answers 409.
+
+    Aggregates come from the same version-keyed caches as the dashboard figures.
+
+    Parameters:
+    - server (flask.Flask): The Dash app's server.
+    - store (DataStore): The dataset store.
+    """
+
+    @server.route("/api/aggregate", methods=["GET"])
+    def api_aggregate():
+        snapshot = store.current()
+        pinned = request.args.get("version")
+        if pinned and pinned != snapshot.version:
+            return jsonify({"error": "Dataset changed since the first page; restart pagination.",
+                            "version": snapshot.version}), 409
+
+        try:
+            params = _parse_query(request.args)
+            offset = max(int(request.args.get("offset", 0)), 0)
+            limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+            if not 0 <= limit <= MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 0 and {MAX_PAGE_SIZE}")
+            result = get_cached_aggregate("aggregate", snapshot, aggregate, **params)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        headers = {"X-Data-Version": snapshot.version, "X-Total-Count": str(len(result))}
+        if _wants_arrow(request.args):
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return jsonify({"error": "Arrow output requires the pyarrow package."}), 406
+            if limit:
+                return Response(b"".join(_arrow_stream(result.iloc[offset:offset + limit], limit)),
+                                mimetype=ARROW_MIMETYPE, headers=headers)
+            return Response(_arrow_stream(result, STREAM_CHUNK_ROWS), mimetype=ARROW_MIMETYPE, headers=headers)
+
+        if limit:
+            return Response(_json_page(result, snapshot.version, offset, limit), mimetype="application/json",
+                            headers=headers)
+        return Response(_json_stream(result, snapshot.version), mimetype="application/json", headers=headers)
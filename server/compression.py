@@ -0,0 +1,70 @@
+# compression.py
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Dash endpoints that carry figure JSON, and the aggregate API
+COMPRESSED_ENDPOINTS = ("_dash-layout", "_dash-update-component", "/api/aggregate")
+MIN_COMPRESS_BYTES = 1024
+
+
+def _accepted_encoding(accept_encoding: str):
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def register_compression(server, store, min_size: int = MIN_COMPRESS_BYTES):
+    """
+    Adds gzip/brotli compression and ETag/Cache-Control headers to Dash payload responses.
+
+    Parameters:
+    - server (flask.Flask): The Dash app's server.
+    - store (DataStore): Dataset store; its version is part of every ETag.
+    - min_size (int): Responses smaller than this many bytes are sent uncompressed.
+    """
+
+    @server.after_request
+    def compress_dash_payloads(response):
+        if not request.path.endswith(COMPRESSED_ENDPOINTS):
+            return response
+        # Streamed responses are sent chunk by chunk and must not be buffered here
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or "Content-Encoding" in response.headers):
+            return response
+
+        body = response.get_data()
+
+        # The layout and API GETs are rendered from version-keyed caches, so they can be revalidated
+        if request.method == "GET":
+            etag = f"{store.current().version}-{zlib.crc32(body):08x}"
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = "private, no-cache"
+            if request.if_none_match.contains_weak(etag):
+                response.status_code = 304
+                response.set_data(b"")
+                return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = _accepted_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding is None or len(body) < min_size:
+            return response
+
+        response.set_data(_compress(body, encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
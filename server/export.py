@@ -0,0 +1,132 @@
+# export.py
+import inspect
+import json
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+from flask import Response, jsonify, request
+
+from preprocessing.aggregate import filter_mask
+from preprocessing.schema import METRICS
+from server.streaming import ChunkSink
+from visualizations.cache import get_cached_aggregate
+from visualizations.registry import DATA_REGISTRY, VIZ_REGISTRY, get_viz_data
+
+# Rows serialized per chunk; bounds the memory an export adds to a worker
+EXPORT_CHUNK_ROWS = 50000
+EXPORT_FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def export_url(viz: str, fmt: str = "csv", **kwargs) -> str:
+    """URL of the streamed export of the data behind a registered view built with kwargs."""
+    return f"/export/{viz}.{fmt}?" + urlencode({"args": json.dumps(kwargs, default=str)})
+
+
+def export_table(snapshot, viz: str, kwargs: dict) -> pd.DataFrame:
+    """
+    Returns the (cached) table a view plots for its builder arguments, from the view's data
+    function in DATA_REGISTRY, which its builder plots as well.
+
+    Parameters:
+    - snapshot (DataSnapshot): Dataset snapshot.
+    - viz (str): Key in DATA_REGISTRY.
+    - kwargs (dict): Builder arguments; those only the figure uses (scaling, layout) are ignored.
+
+    Returns:
+    - DataFrame, with any named index (e.g. 'Year') as columns.
+    """
+    compute = get_viz_data(viz)
+    accepted = inspect.signature(compute).parameters
+    table = get_cached_aggregate(f"export:{viz}", snapshot, compute,
+                                 **{k: v for k, v in kwargs.items() if k in accepted})
+    return table.reset_index(drop=all(name is None for name in table.index.names))
+
+
+def _record_chunks(data, kwargs):
+    # Filtered records of a view without a data function. Row positions only; each chunk is taken
+    # from the dataset as it is written
+    country = kwargs.get("country", "World")
+    mask = filter_mask(data, country, kwargs.get("disaster_type", "All"), kwargs.get("year_start"),
+                       kwargs.get("year_end"), by_country=country == "World")
+    metrics = kwargs.get("metrics") or ([kwargs["metric"]] if kwargs.get("metric") else None)
+    columns = slice(None)
+    if metrics:
+        unknown = [m for m in metrics if m not in METRICS]
+        if unknown:
+            raise ValueError(f"Unknown metric: {', '.join(unknown)}")
+        columns = [data.columns.get_loc(c) for c in data.columns if c not in METRICS or c in metrics]
+    return _row_chunks(data, np.flatnonzero(mask.to_numpy()), columns)
+
+
+def _row_chunks(frame, rows=None, column_positions=slice(None)):
+    # Chunks of frame (optionally only some row/column positions) without copying the whole selection
+    positions = np.arange(len(frame)) if rows is None else rows
+    for start in range(0, len(positions), EXPORT_CHUNK_ROWS):
+        yield frame.iloc[positions[start:start + EXPORT_CHUNK_ROWS], column_positions]
+
+
+def _csv_stream(chunks):
+    for i, chunk in enumerate(chunks):
+        yield chunk.to_csv(index=False, header=(i == 0))
+
+
+def _parquet_stream(chunks):
+    import pyarrow as pa  # optional: only needed for Parquet exports
+    import pyarrow.parquet as pq
+
+    sink = ChunkSink()
+    writer = None
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema, compression="zstd")
+        writer.write_table(table)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+    yield sink.drain()
+
+
+def register_export_routes(server, store):
+    """
+    Adds streamed CSV/Parquet downloads of the data behind each view.
+
+    GET /export/<viz>.<csv|parquet>?args=<builder kwargs as JSON>
+
+    Views with a data function export the (cached) table their chart is built from; other views
+    export their filtered records, streamed in EXPORT_CHUNK_ROWS chunks straight from the dataset,
+    so even the full table is never copied or serialized in one piece.
+
+    Parameters:
+    - server (flask.Flask): The Dash app's server.
+    - store (DataStore): The dataset store.
+    """
+
+    @server.route("/export/<viz>.<fmt>", methods=["GET"])
+    def export_view_data(viz, fmt):
+        if viz not in VIZ_REGISTRY:
+            return jsonify({"error": f"Unknown view '{viz}'."}), 404
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"error": f"Unknown format '{fmt}'. Use csv or parquet."}), 400
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return jsonify({"error": "Parquet export requires the pyarrow package."}), 406
+        snapshot = store.current()
+        try:
+            kwargs = json.loads(request.args.get("args", "{}"))
+            if viz in DATA_REGISTRY:
+                chunks = _row_chunks(export_table(snapshot, viz, kwargs))
+            else:
+                chunks = _record_chunks(snapshot.data, kwargs)
+        except (ValueError, TypeError, KeyError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        stream = _csv_stream(chunks) if fmt == "csv" else _parquet_stream(chunks)
+        filename = f"{viz}-{snapshot.version}.{fmt}"
+        return Response(stream, mimetype=EXPORT_FORMATS[fmt], headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Data-Version": snapshot.version,
+        })
@@ -0,0 +1,272 @@
+# profiling.py
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+
+from flask import g, request
+
+from server.admin import ADMIN_TOKEN_ENV, is_admin_request
+from visualizations.cache import BuildTrace, build_trace
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_DIR = os.environ.get("DASHBOARD_PROFILE_DIR", os.path.join(REPO_ROOT, ".profiles"))
+
+# Admin requests opt in with this header or query argument, e.g. "cpu,memory" or "sample,cold"
+PROFILE_HEADER = "X-Profile"
+PROFILE_ARG = "_profile"
+# cpu: cProfile; sample: pyinstrument (optional); memory: tracemalloc; cold: bypass the figure caches
+PROFILE_MODES = ("cpu", "sample", "memory", "cold")
+DEFAULT_MODES = ("cpu", "memory")
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 30
+TRACEMALLOC_FRAMES = 10
+
+
+def _requested_modes():
+    value = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_ARG)
+    if not value:
+        return None
+    modes = {m.strip().lower() for m in value.split(",")} & set(PROFILE_MODES)
+    return modes if modes - {"cold"} else modes | set(DEFAULT_MODES)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", text).strip("_")[:60] or "request"
+
+
+class RequestProfile:
+    """Profilers running for one request, and the report they write when it finishes."""
+
+    def __init__(self, modes: set, directory: str):
+        self.modes = modes
+        self.directory = directory
+        # Recorded up front: a streamed body is produced after the request context is gone
+        self.method, self.path = request.method, request.path
+        self.args = {k: v for k, v in request.args.items() if k != PROFILE_ARG}
+        self.callback = request.get_json(silent=True) if request.path.endswith("_dash-update-component") else None
+        # Other requests in flight while the profilers ran (see ConcurrentRequests)
+        self.concurrent = 0
+        self.profile_id = None
+        self.trace = BuildTrace(cold="cold" in modes)
+        self.cpu = cProfile.Profile() if "cpu" in modes else None
+        self.sampler = None
+        self.notes = []
+        if "sample" in modes:
+            try:
+                from pyinstrument import Profiler  # optional: only needed for sampling profiles
+                self.sampler = Profiler(interval=0.001)
+            except ImportError:
+                self.notes.append("sample: pyinstrument is not installed")
+        self._started_tracemalloc = False
+
+    def start(self):
+        self._token = build_trace.set(self.trace)
+        if "memory" in self.modes:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+            self._memory_before = tracemalloc.take_snapshot()
+        if self.sampler is not None:
+            self.sampler.start()
+        if self.cpu is not None:
+            self.cpu.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def name(self) -> str:
+        """Id of the report (the files' common prefix), named after the callback, view or path."""
+        if self.profile_id is None:
+            builds = self.trace.builds
+            tag = (self.callback or {}).get("output") or (builds[0]["name"] if len(builds) == 1 else self.path)
+            self.profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{_slug(tag)}-{uuid.uuid4().hex[:6]}"
+        return self.profile_id
+
+    def finish(self, status, version) -> str:
+        """Stops the profilers and writes the report; returns its id."""
+        duration = time.perf_counter() - self._start
+        if self.cpu is not None:
+            self.cpu.disable()
+        if self.sampler is not None:
+            self.sampler.stop()
+        memory = None
+        if "memory" in self.modes:
+            memory = (tracemalloc.take_snapshot(), tracemalloc.get_traced_memory())
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        build_trace.reset(self._token)
+
+        if self.concurrent:
+            self.notes.append(
+                f"{self.concurrent} other request(s) ran during the profile: the duration includes contention with them"
+                + (", and tracemalloc traces the whole process, so their allocations are in the memory report"
+                   if "memory" in self.modes else "")
+            )
+        profile_id = self.name()
+        callback = self.callback
+        base = os.path.join(self.directory, profile_id)
+        os.makedirs(self.directory, exist_ok=True)
+
+        if self.cpu is not None:
+            self.cpu.dump_stats(base + ".prof")
+            text = io.StringIO()
+            pstats.Stats(self.cpu, stream=text).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            with open(base + "-cpu.txt", "w") as f:
+                f.write(text.getvalue())
+        if self.sampler is not None:
+            with open(base + "-sample.txt", "w") as f:
+                f.write(self.sampler.output_text(unicode=True))
+            with open(base + "-sample.html", "w") as f:
+                f.write(self.sampler.output_html())
+        if memory is not None:
+            self._write_allocations(base + "-memory.txt", *memory)
+
+        report = {
+            "id": profile_id,
+            "method": self.method,
+            "path": self.path,
+            "args": self.args,
+            "callback": {"output": callback.get("output"), "inputs": callback.get("inputs")} if callback else None,
+            "views": self.trace.builds,
+            "modes": sorted(self.modes),
+            "status": status,
+            "duration_ms": round(1000 * duration, 2),
+            "concurrent_requests": self.concurrent,
+            "data_version": version,
+            "notes": self.notes,
+        }
+        with open(base + ".json", "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        return profile_id
+
+    def _write_allocations(self, path, snapshot, traced):
+        exclude = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>")]
+        stats = snapshot.filter_traces(exclude).compare_to(self._memory_before.filter_traces(exclude), "lineno")
+        current, peak = traced
+        with open(path, "w") as f:
+            f.write(f"traced memory: {current / 2 ** 20:.1f} MiB at the end, {peak / 2 ** 20:.1f} MiB peak\n")
+            f.write(f"top {TOP_ALLOCATIONS} allocation sites by size allocated during the request:\n")
+            for stat in stats[:TOP_ALLOCATIONS]:
+                f.write(f"{stat}\n")
+
+
+class ConcurrentRequests:
+    """Counts the requests in flight, and those overlapping the running profile."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._profile = None
+
+    def enter(self):
+        with self._lock:
+            self._in_flight += 1
+            if self._profile is not None:
+                self._profile.concurrent += 1
+
+    def leave(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def watch(self, profile):
+        """Starts counting the requests overlapping profile (including those already in flight)."""
+        with self._lock:
+            profile.concurrent = self._in_flight - 1
+            self._profile = profile
+
+    def unwatch(self):
+        with self._lock:
+            self._profile = None
+
+
+def _profiled_body(body, finish):
+    # Streamed responses are produced after after_request: keep the profilers running until the
+    # body is exhausted or closed (client gone), on the thread that serves it
+    try:
+        yield from body
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+        finish()
+
+
+def register_profiling(server, store, directory: str = PROFILE_DIR):
+    """
+    Lets admins profile single requests. Nothing is registered unless the admin token is
+    configured, so there is no per-request cost when profiling is unavailable.
+
+    An admin request (X-Admin-Token) with an X-Profile header or a _profile query argument runs
+    under the requested profilers (comma-separated PROFILE_MODES; both defaults if only "cold").
+    Its report goes to directory (DASHBOARD_PROFILE_DIR), named after the callback output, the
+    view built (if only one) or the path, and returned in the X-Profile-Id response header:
+    - <id>.json: request, callback inputs, views/aggregates built with their arguments and times;
+    - <id>.prof and <id>-cpu.txt: cProfile stats (pstats/snakeviz) and the top functions;
+    - <id>-sample.txt/.html: pyinstrument report;
+    - <id>-memory.txt: traced peak and the top allocation sites (tracemalloc).
+
+    Streamed responses (e.g. exports) are profiled until their body has been sent; the report is
+    written then. One request is profiled at a time; others asking meanwhile get X-Profile-Id: busy.
+    Other requests are not held back: tracemalloc traces the whole process, so those running
+    meanwhile are slowed down and their allocations show up in the memory report. The report
+    records how many there were (concurrent_requests) with a note; profile on an idle server for
+    clean memory figures.
+
+    Parameters:
+    - server (flask.Flask): The Dash app's server.
+    - store (DataStore): Dataset store; the report records its version.
+    - directory (str): Where reports are written.
+    """
+    if not os.environ.get(ADMIN_TOKEN_ENV):
+        return
+    active = threading.Lock()
+    requests = ConcurrentRequests()
+
+    def finish(profile, status):
+        requests.unwatch()
+        try:
+            return profile.finish(status, store.current().version)
+        finally:
+            active.release()
+
+    @server.before_request
+    def start_profile():
+        requests.enter()
+        g.counted = True
+        modes = _requested_modes()
+        if not modes or not is_admin_request():
+            return
+        if not active.acquire(blocking=False):
+            g.profile_busy = True
+            return
+        g.profile = RequestProfile(modes, directory)
+        requests.watch(g.profile)
+        g.profile.start()
+
+    @server.after_request
+    def finish_profile(response):
+        profile = g.pop("profile", None)
+        if profile is not None and response.is_streamed:
+            response.headers["X-Profile-Id"] = profile.name()
+            status = response.status_code
+            response.response = _profiled_body(response.response, lambda: finish(profile, status))
+        elif profile is not None:
+            response.headers["X-Profile-Id"] = finish(profile, response.status_code)
+        elif g.pop("profile_busy", False):
+            response.headers["X-Profile-Id"] = "busy"
+        return response
+
+    @server.teardown_request
+    def abandon_profile(exc):
+        if g.pop("counted", False):
+            requests.leave()
+        # The request failed before after_request ran: still stop the profilers and write what we have
+        profile = g.pop("profile", None)
+        if profile is not None:
+            finish(profile, 500)
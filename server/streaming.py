@@ -0,0 +1,34 @@
+# streaming.py
+import io
+
+
+class ChunkSink(io.RawIOBase):
+    """
+    Write-only file object that hands written bytes back in pieces, for streaming writers
+    (Arrow IPC, Parquet) from a generator without buffering the whole output.
+
+    tell() keeps counting across drains, so writers that record byte offsets stay correct.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        data = bytes(b)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        """Returns and forgets everything written since the last drain."""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
@@ -0,0 +1,224 @@
+# build_reports.py
+"""
+Renders the static per-country disaster reports: one HTML page per country (and World) with the
+dashboard's views for the country, all pages sharing one plotly.js bundle in the output directory.
+
+Pages are rendered in a process pool. Figures go through the same cached builders as the
+dashboard (including the on-disk cache when DASHBOARD_CACHE_DIR is set). A page is skipped when
+its inputs are unchanged since the last run: the country's rows, the report arguments and the
+code of the views and their data layer, recorded per page in <output>/manifest.json.
+
+Usage: python tools/build_reports.py [--output reports] [--countries India Japan ...] [--metric Deaths]
+                                     [--year-start 1900] [--year-end 2024] [--jobs N] [--force]
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+PLOTLY_BUNDLE = "plotly.min.js"
+MANIFEST = "manifest.json"
+# Views on every page, in order: registry name -> heading
+REPORT_VIEWS = {
+    "treemap": "Distribution by disaster type",
+    "pie": "Share of each disaster type",
+    "sankey": "Disaster types and their impact",
+    "radar": "Impact profile by disaster type",
+    "stacked_area": "Yearly impact by disaster type",
+    "rolling_correlation": "Rolling correlation of deaths and damages",
+    "correlation_network": "Co-occurrence of disaster types",
+}
+
+
+def report_views(country: str, year_start: int, year_end: int, metric: str) -> dict:
+    """Builder arguments of each report view, shared with the dashboard's selection views."""
+    from visualizations.prefetch import selection_views
+
+    views = selection_views(country, year_start, year_end, metric)
+    views["rolling_correlation"] = dict(country=country, disaster_type="All")
+    views["correlation_network"] = dict(country=country, metric=metric, year_start=year_start, year_end=year_end)
+    return {name: views[name] for name in REPORT_VIEWS}
+
+
+def page_name(country: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", country).strip("-").lower() + ".html"
+
+
+def code_digest() -> str:
+    """
+    Digest of this tool and of every module of the packages the views are built from
+    (visualizations/, preprocessing/): builders import helpers (hierarchy, cache, level of detail,
+    prefetch, ...) that are not registry entries, so the whole packages are hashed.
+    """
+    from visualizations.disk_cache import code_digest as package_digest
+
+    return package_digest((os.path.abspath(__file__),))
+
+
+def page_inputs(snapshot, countries: list) -> dict:
+    """
+    Fingerprint of each page's data: the country's rows of the dataset and of its totals.
+    World's views read every country's rows, so its page depends on the whole dataset version.
+    """
+    import pandas as pd
+
+    from preprocessing.totals import get_totals
+
+    digests = {}
+    for frame in (snapshot.data, get_totals(snapshot.data)):
+        hashes = pd.util.hash_pandas_object(frame, index=False)
+        sums = hashes.groupby(frame["Country name"].astype(str).to_numpy()).sum()
+        for country, value in sums.items():
+            digests[country] = digests.get(country, "") + f"{int(value):016x}"
+    return {c: snapshot.version if c == "World" else digests.get(c, "") for c in countries}
+
+
+def _worker_init():
+    # Each worker loads the dataset once; the figure caches are per process (plus the shared disk cache)
+    from preprocessing.store import store
+    store.current()
+
+
+def render_page(country: str, views: dict, output: str, meta: dict) -> tuple:
+    """Renders one country page; returns (country, seconds, figures without data)."""
+    from preprocessing.store import store
+    from visualizations.cache import get_cached_figure
+    from visualizations.registry import get_viz
+
+    start = time.perf_counter()
+    snapshot = store.current()
+    sections, empty = [], []
+    for name, kwargs in views.items():
+        try:
+            fig = get_cached_figure(get_viz(name), snapshot, **kwargs)
+        except ValueError:
+            # Some builders (e.g. the correlation network) raise when the selection has too little data
+            fig = None
+        if fig is None or not fig.data:
+            empty.append(name)
+            body = '<p class="empty">No data for this selection.</p>'
+        else:
+            body = fig.to_html(full_html=False, include_plotlyjs=False, div_id=f"{name}-figure",
+                               config={"displaylogo": False})
+        sections.append(f'<section id="{name}"><h2>{html.escape(REPORT_VIEWS[name])}</h2>{body}</section>')
+
+    title = f"{country}: disaster profile {meta['year_start']}-{meta['year_end']}"
+    page = (
+        "<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"utf-8\">\n"
+        f"<title>{html.escape(title)}</title>\n<script src=\"{PLOTLY_BUNDLE}\"></script>\n"
+        "<style>body{font-family:Segoe UI,sans-serif;background:#111;color:#eee;margin:2em}"
+        "section{margin-bottom:2em}a{color:#8cf}.empty{color:#888}</style>\n</head>\n<body>\n"
+        f"<p><a href=\"index.html\">All countries</a></p>\n<h1>{html.escape(title)}</h1>\n"
+        f"<p>Metric: {html.escape(meta['metric'])}. Rendered {meta['generated']} from data version "
+        f"{snapshot.version}; pages are only re-rendered when their inputs change, so this page may "
+        "be older than the index.</p>\n"
+        + "\n".join(sections) + "\n</body>\n</html>\n"
+    )
+    path = os.path.join(output, page_name(country))
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(page)
+    os.replace(path + ".tmp", path)
+    return country, time.perf_counter() - start, empty
+
+
+def write_index(output: str, countries: list, meta: dict):
+    """Writes index.html linking to the pages of countries (World first, then by name)."""
+    countries = sorted(countries, key=lambda c: (c != "World", c))
+    links = "\n".join(f'<li><a href="{page_name(c)}">{html.escape(c)}</a></li>' for c in countries)
+    with open(os.path.join(output, "index.html"), "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"utf-8\">\n"
+                "<title>Country disaster profiles</title>\n"
+                "<style>body{font-family:Segoe UI,sans-serif;background:#111;color:#eee;margin:2em}"
+                "a{color:#8cf}ul{columns:4}</style>\n</head>\n<body>\n"
+                f"<h1>Country disaster profiles {meta['year_start']}-{meta['year_end']}</h1>\n"
+                f"<ul>\n{links}\n</ul>\n</body>\n</html>\n")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default=os.path.join(REPO_ROOT, "reports"))
+    parser.add_argument("--countries", nargs="+", help="Countries to render (default: World and every country)")
+    parser.add_argument("--metric", default="Deaths")
+    parser.add_argument("--year-start", type=int, default=1900)
+    parser.add_argument("--year-end", type=int, default=None, help="Default: last year in the data")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="Render every page, even if unchanged")
+    args = parser.parse_args(argv)
+
+    from plotly.offline import get_plotlyjs
+
+    from preprocessing.schema import AGGREGATE_REGIONS
+    from preprocessing.store import store
+
+    snapshot = store.current()
+    names = sorted(set(snapshot.data["Country name"].astype(str)) - set(AGGREGATE_REGIONS))
+    countries = args.countries or ["World"] + names
+    unknown = [c for c in countries if c != "World" and c not in names]
+    if unknown:
+        parser.error(f"unknown countries: {', '.join(unknown)}")
+    year_end = args.year_end or int(snapshot.data["Year"].max())
+    meta = {"metric": args.metric, "year_start": args.year_start, "year_end": year_end,
+            "generated": time.strftime("%Y-%m-%d")}
+
+    os.makedirs(args.output, exist_ok=True)
+    bundle = os.path.join(args.output, PLOTLY_BUNDLE)
+    plotlyjs = get_plotlyjs()
+    if not os.path.exists(bundle) or os.path.getsize(bundle) != len(plotlyjs.encode("utf-8")):
+        with open(bundle, "w", encoding="utf-8") as f:
+            f.write(plotlyjs)
+
+    manifest_path = os.path.join(args.output, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path) and not args.force:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    code = code_digest()
+    inputs = page_inputs(snapshot, countries)
+    todo = {}
+    for country in countries:
+        views = report_views(country, args.year_start, year_end, args.metric)
+        fingerprint = hashlib.sha1(json.dumps([code, inputs[country], views], sort_keys=True).encode()).hexdigest()
+        if (manifest.get(country, {}).get("fingerprint") == fingerprint
+                and os.path.exists(os.path.join(args.output, page_name(country)))):
+            continue
+        todo[country] = (views, fingerprint)
+
+    print(f"{len(countries) - len(todo)} of {len(countries)} pages unchanged; rendering {len(todo)} "
+          f"with {args.jobs} processes")
+    start = time.perf_counter()
+    failed = []
+    if todo:
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=_worker_init) as pool:
+            futures = {pool.submit(render_page, c, views, args.output, meta): c for c, (views, _) in todo.items()}
+            for i, future in enumerate(as_completed(futures), 1):
+                country = futures[future]
+                try:
+                    _, seconds, empty = future.result()
+                except Exception as e:
+                    print(f"[{i}/{len(todo)}] Error rendering {country}: {e}")
+                    failed.append(country)
+                    continue
+                manifest[country] = {"page": page_name(country), "fingerprint": todo[country][1],
+                                     "rendered": meta["generated"], "empty_views": empty}
+                print(f"[{i}/{len(todo)}] {country} ({seconds:.1f} s" + (f", no data: {', '.join(empty)}" if empty else "") + ")")
+
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    # Every page on disk, not only this run's: a --countries run keeps the other pages
+    write_index(args.output, [c for c, entry in manifest.items()
+                              if os.path.exists(os.path.join(args.output, entry["page"]))], meta)
+    print(f"Rendered {len(todo) - len(failed)} pages in {time.perf_counter() - start:.1f} s -> {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+# build_world_geometry.py
+"""
+Builds the bundled world geometry used by the choropleth from a country-boundary GeoJSON
+(e.g. Natural Earth admin-0 countries), at every level in visualizations.geo.GEO_LEVELS.
+
+Each level is quantized to a fixed number of decimals and simplified (Douglas-Peucker) on shared
+arcs, as TopoJSON does, so neighbouring countries keep identical borders; features are keyed by
+ISO-3 code and written to assets/geo/world_<level>.geojson. Empty base-map topologies are
+written to assets/geo/topojson/ so plotly.js does not fetch its own from the CDN (the choropleth
+hides the base-map layers and draws countries from the GeoJSON).
+
+Usage: python tools/build_world_geometry.py SOURCE.geojson [--id-field ISO_A3] [--fallback-id-field ADM0_A3]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from visualizations.geo import GEO_DIR, GEO_LEVELS, geometry_path  # noqa: E402
+
+# plotly.js requests <scope>_<resolution>m.json for the base map of a geo subplot
+TOPOJSON_SCOPES = ["world", "usa", "europe", "asia", "africa", "north-america", "south-america"]
+TOPOJSON_RESOLUTIONS = [110, 50]
+
+
+def simplify_line(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Douglas-Peucker simplification of an open polyline; both end points are kept.
+
+    Parameters:
+    - points (np.ndarray): (n, 2) lon/lat coordinates.
+    - tolerance (float): Maximum deviation in degrees.
+
+    Returns:
+    - The kept points.
+    """
+    if len(points) <= 2 or tolerance <= 0:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        segment = points[start + 1:end]
+        ab = b - a
+        length = np.hypot(*ab)
+        if length == 0:
+            dist = np.hypot(*(segment - a).T)
+        else:
+            dist = np.abs(ab[0] * (segment[:, 1] - a[1]) - ab[1] * (segment[:, 0] - a[0])) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            keep[start + 1 + i] = True
+            stack.append((start, start + 1 + i))
+            stack.append((start + 1 + i, end))
+    return points[keep]
+
+
+def simplify_ring(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Douglas-Peucker simplification of one closed ring (first point repeated at the end), split at
+    its farthest point from the start so both halves are open polylines. Returns it still closed.
+    """
+    if len(points) <= 4 or tolerance <= 0:
+        return points
+    far = int(np.argmax(((points - points[0]) ** 2).sum(axis=1)))
+    return np.concatenate([simplify_line(points[:far + 1], tolerance)[:-1], simplify_line(points[far:], tolerance)])
+
+
+def _quantize(points, decimals):
+    points = np.round(points, decimals)
+    # Drop consecutive duplicates created by rounding
+    changed = np.r_[True, (np.diff(points, axis=0) != 0).any(axis=1)]
+    return points[changed]
+
+
+def _ring_area(points):
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * abs(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+
+
+def find_junctions(rings: list) -> set:
+    """
+    Points where rings sharing a point diverge, i.e. where a border shared by two countries starts
+    or ends (rings are open lists of (x, y) tuples). A point always seen between the same two
+    neighbours is inside a single border, whichever rings it belongs to.
+    """
+    neighbours = {}
+    junctions = set()
+    for ring in rings:
+        n = len(ring)
+        for i, point in enumerate(ring):
+            pair = frozenset((ring[i - 1], ring[(i + 1) % n]))
+            if neighbours.setdefault(point, pair) != pair:
+                junctions.add(point)
+    return junctions
+
+
+class SharedArcs:
+    """
+    Topology-preserving simplification, as in TopoJSON: rings are cut at junctions into arcs, and
+    every distinct arc is simplified once with its end points fixed. A border shared by two
+    countries is the same arc in both (traversed in opposite directions), so neighbours keep
+    identical borders instead of gaps and slivers.
+
+    Parameters:
+    - rings (list): Every ring of every feature, quantized, as open lists of (x, y) tuples.
+    - tolerance (float): Douglas-Peucker tolerance in degrees.
+    """
+
+    def __init__(self, rings: list, tolerance: float):
+        self.junctions = find_junctions(rings)
+        self.tolerance = tolerance
+        self.arcs = {}   # canonical arc -> simplified arc
+        self.uses = {}   # canonical arc -> number of rings using it
+
+    def _simplified(self, arc: tuple, closed: bool) -> list:
+        # Canonical orientation, so both traversals of a shared arc hit the same entry
+        reverse = (arc[:1] + arc[-2:0:-1] + arc[:1]) if closed else arc[::-1]
+        key = min(arc, reverse)
+        if key not in self.arcs:
+            points = np.asarray(key, dtype=np.float64)
+            simplified = simplify_ring(points, self.tolerance) if closed else simplify_line(points, self.tolerance)
+            self.arcs[key] = [tuple(p) for p in simplified]
+        self.uses[key] = self.uses.get(key, 0) + 1
+        result = self.arcs[key]
+        if key == arc:
+            return result
+        return (result[:1] + result[-2:0:-1] + result[:1]) if closed else result[::-1]
+
+    def simplify(self, ring: list) -> list:
+        """Simplifies one open ring of (x, y) tuples; returns it closed."""
+        cuts = [i for i, point in enumerate(ring) if point in self.junctions]
+        if not cuts:
+            # No shared border ends on this ring (an island, or a ring shared whole, like an
+            # enclave and the hole around it): one closed arc starting at its smallest point
+            start = min(range(len(ring)), key=ring.__getitem__)
+            rotated = tuple(ring[start:] + ring[:start])
+            return self._simplified(rotated + rotated[:1], closed=True)
+        rotated = ring[cuts[0]:] + ring[:cuts[0]]
+        rotated.append(rotated[0])
+        offsets = [c - cuts[0] for c in cuts] + [len(ring)]
+        out = [rotated[0]]
+        for a, b in zip(offsets, offsets[1:]):
+            out += self._simplified(tuple(rotated[a:b + 1]), closed=False)[1:]
+        return out
+
+    def shared(self) -> int:
+        """Number of arcs used by more than one ring."""
+        return sum(1 for n in self.uses.values() if n > 1)
+
+
+def _open_ring(points):
+    ring = [tuple(p) for p in points.tolist()]
+    return ring[:-1] if len(ring) > 1 and ring[0] == ring[-1] else ring
+
+
+def simplify_features(features_polygons: list, tolerance: float, decimals: int) -> tuple:
+    """
+    Quantizes and simplifies the polygons of several features together, on their shared arcs.
+
+    Rings that collapse are dropped; if every polygon of a feature collapses, its largest one is
+    kept quantized but unsimplified, so small island states don't disappear.
+
+    Parameters:
+    - features_polygons (list): Per feature, a list of polygons (each a list of rings, outer first).
+    - tolerance (float): Douglas-Peucker tolerance in degrees.
+    - decimals (int): Coordinate decimals.
+
+    Returns:
+    - (per feature list of simplified polygons, SharedArcs used).
+    """
+    quantized = [
+        [[_open_ring(_quantize(np.asarray(ring, dtype=np.float64), decimals)) for ring in polygon]
+         for polygon in polygons]
+        for polygons in features_polygons
+    ]
+    arcs = SharedArcs([ring for polygons in quantized for polygon in polygons for ring in polygon if len(ring) >= 3],
+                      tolerance)
+    result = []
+    for source, polygons in zip(features_polygons, quantized):
+        out = []
+        for polygon in polygons:
+            rings = []
+            for i, ring in enumerate(polygon):
+                points = arcs.simplify(ring) if len(ring) >= 3 else []
+                if len(points) >= 4:
+                    rings.append([list(p) for p in points])
+                elif i == 0:
+                    break
+            if rings:
+                out.append(rings)
+        if not out and source:
+            largest = max(source, key=lambda p: _ring_area(np.asarray(p[0], dtype=np.float64)))
+            points = _quantize(np.asarray(largest[0], dtype=np.float64), decimals)
+            if len(points) >= 4:
+                out.append([points.tolist()])
+        result.append(out)
+    return result, arcs
+
+
+def _feature_id(properties, id_field, fallback_field):
+    # Natural Earth uses -99 for a few countries (e.g. France, Norway) in ISO_A3
+    value = properties.get(id_field)
+    if not value or str(value) == "-99":
+        value = properties.get(fallback_field)
+    return None if not value or str(value) == "-99" else str(value)
+
+
+def build_level(features: list, tolerance: float, decimals: int, id_field: str, fallback_field: str,
+                name_field: str) -> tuple:
+    """Returns the simplified FeatureCollection for one level and its SharedArcs."""
+    kept = []
+    for feature in features:
+        properties = feature.get("properties") or {}
+        iso3 = _feature_id(properties, id_field, fallback_field)
+        geometry = feature.get("geometry")
+        if iso3 is None or geometry is None:
+            continue
+        polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+        kept.append((iso3, properties.get(name_field, iso3), polygons))
+
+    simplified, arcs = simplify_features([polygons for _, _, polygons in kept], tolerance, decimals)
+    out = []
+    for (iso3, name, _), polygons in zip(kept, simplified):
+        if not polygons:
+            continue
+        out.append({
+            "type": "Feature",
+            "id": iso3,
+            "properties": {"name": name},
+            "geometry": {"type": "MultiPolygon", "coordinates": polygons} if len(polygons) > 1
+            else {"type": "Polygon", "coordinates": polygons[0]},
+        })
+    return {"type": "FeatureCollection", "features": out}, arcs
+
+
+def _count_vertices(collection):
+    total = 0
+    for feature in collection["features"]:
+        coords = feature["geometry"]["coordinates"]
+        polygons = coords if feature["geometry"]["type"] == "MultiPolygon" else [coords]
+        total += sum(len(ring) for polygon in polygons for ring in polygon)
+    return total
+
+
+def write_empty_topologies(directory: str):
+    os.makedirs(directory, exist_ok=True)
+    empty = json.dumps({"type": "Topology", "objects": {}, "arcs": []})
+    for scope in TOPOJSON_SCOPES:
+        for resolution in TOPOJSON_RESOLUTIONS:
+            with open(os.path.join(directory, f"{scope}_{resolution}m.json"), "w") as f:
+                f.write(empty)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source", help="Country-boundary GeoJSON (FeatureCollection)")
+    parser.add_argument("--id-field", default="ISO_A3")
+    parser.add_argument("--fallback-id-field", default="ADM0_A3")
+    parser.add_argument("--name-field", default="NAME")
+    args = parser.parse_args(argv)
+
+    with open(args.source) as f:
+        features = json.load(f)["features"]
+    os.makedirs(GEO_DIR, exist_ok=True)
+
+    source, _ = build_level(features, 0, 6, args.id_field, args.fallback_id_field, args.name_field)
+    print(f"source: {len(features)} features, {_count_vertices(source):,} vertices, "
+          f"{os.path.getsize(args.source) / 1024:,.0f} KiB")
+    print(f"{'level':<8} {'tolerance':>9} {'features':>8} {'vertices':>10} {'arcs':>7} {'shared':>7} "
+          f"{'size KiB':>9} {'gzip KiB':>9}")
+    for level, (tolerance, decimals) in GEO_LEVELS.items():
+        collection, arcs = build_level(features, tolerance, decimals, args.id_field, args.fallback_id_field,
+                                       args.name_field)
+        payload = json.dumps(collection, separators=(",", ":")).encode("utf-8")
+        with open(geometry_path(level), "wb") as f:
+            f.write(payload)
+        print(f"{level:<8} {tolerance:>9} {len(collection['features']):>8} {_count_vertices(collection):>10,} "
+              f"{len(arcs.arcs):>7,} {arcs.shared():>7,} "
+              f"{len(payload) / 1024:>9,.0f} {len(gzip.compress(payload)) / 1024:>9,.0f}")
+
+    write_empty_topologies(os.path.join(GEO_DIR, "topojson"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+# check_import_time.py
+"""
+Checks that importing the dashboard stays within an import-time budget and does not pull in
+libraries that only specific views need.
+
+Two budgets are checked, on the median of --runs fresh interpreters:
+- own: self time of the dashboard's modules (app, ui, visualizations, preprocessing, server);
+  this is what the code in this repo controls and catches an expensive module-level statement.
+- total: cumulative time of the import, without dash's optional Jupyter integration. dash._jupyter
+  imports IPython (~300-400 ms) whenever it is installed in the environment; a deployment without
+  IPython does not pay it, so it is reported but not counted. The rest is dominated by dash itself
+  (~300 ms with flask/werkzeug) and pandas (~450-550 ms), which every page needs.
+
+Usage: python tools/check_import_time.py [--module app] [--budget-ms 1000] [--own-budget-ms 100] [--runs 3]
+Exits with status 1 if a budget is exceeded or a deferred library was imported.
+
+This script is the budget's check: the repo has no test suite or CI configuration to host a
+test, so run it before merging changes to module-level imports. It measures in fresh
+subprocesses, so it can be called as is from a test runner or CI step if one is added.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that must only be imported inside the builders that use them
+DEFERRED_LIBRARIES = ["seaborn", "matplotlib", "networkx", "pycountry", "plotly.express"]
+# Top-level packages/modules of the dashboard itself
+OWN_PACKAGES = {"app", "ui", "visualizations", "preprocessing", "server"}
+# Imported by dependencies only when optional packages are installed; reported, not budgeted
+OPTIONAL_INTEGRATIONS = ["dash._jupyter"]
+
+
+def measure_import(module: str) -> dict:
+    """
+    Imports module in a fresh interpreter under `-X importtime`.
+
+    Returns:
+    - Dict of module name -> (self, cumulative) import time in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(own), int(cumulative))
+    return timings
+
+
+def summarize(module: str, timings: dict) -> dict:
+    """Splits one measurement into the budgeted figures (milliseconds)."""
+    optional = sum(timings[name][1] for name in OPTIONAL_INTEGRATIONS if name in timings)
+    own = sum(t[0] for name, t in timings.items() if name.split(".")[0] in OWN_PACKAGES)
+    return {
+        "total": (timings[module][1] - optional) / 1000,
+        "own": own / 1000,
+        "optional": optional / 1000,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--own-budget-ms", type=float, default=100.0)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    runs = [measure_import(args.module) for _ in range(max(args.runs, 1))]
+    summaries = [summarize(args.module, timings) for timings in runs]
+    median = {key: statistics.median(s[key] for s in summaries) for key in summaries[0]}
+    timings = runs[-1]
+    eager = [lib for lib in DEFERRED_LIBRARIES if lib in timings]
+
+    print(f"import {args.module} (median of {len(runs)}): {median['total']:.0f} ms (budget {args.budget_ms:.0f} ms), "
+          f"own modules {median['own']:.0f} ms (budget {args.own_budget_ms:.0f} ms)")
+    if median["optional"]:
+        print(f"  not counted: {median['optional']:.0f} ms in {', '.join(n for n in OPTIONAL_INTEGRATIONS if n in timings)}"
+              " (optional Jupyter integration, imports IPython)")
+    slowest = sorted(((t[1], n) for n, t in timings.items() if "." not in n), reverse=True)[:10]
+    for t, name in slowest:
+        print(f"  {t / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if median["total"] > args.budget_ms:
+        print("FAIL: import time budget exceeded")
+        failed = True
+    if median["own"] > args.own_budget_ms:
+        print("FAIL: the dashboard's own modules exceed their import time budget")
+        failed = True
+    if eager:
+        print(f"FAIL: deferred libraries imported eagerly: {', '.join(eager)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
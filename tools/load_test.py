@@ -0,0 +1,425 @@
+# load_test.py
+"""
+Load-tests the dashboard locally: starts app.py's server, replays user sessions against it and
+reports per-endpoint throughput and latency percentiles plus the server's CPU and memory.
+
+Each virtual user loads the page (/, /_dash-layout, /_dash-dependencies), then makes a series of
+country / year-range / metric changes in the selection bar and tab switches. Every action replays
+the page's server-side callbacks as the browser runs them (POST /_dash-update-component, payloads
+built from /_dash-dependencies, initial values from the layout): the selection bar callback, then
+concurrently the active tab's view callback (rendered-<tab>: figures and export links) and the
+prefetch callback, then whatever their outputs trigger. Clientside callbacks (session id, active
+tab) are emulated by the virtual user.
+
+Besides each callback, "selection change" and "tab switch" record the time until every triggered
+callback has answered, i.e. until the user sees the updated views.
+
+Results are appended as one JSON object per run to --output, so runs with different cache
+settings (--env DASHBOARD_...=...) or worker counts (--workers, needs gunicorn) can be compared
+with --compare.
+
+Usage:
+  python tools/load_test.py [--users 8] [--duration 60] [--workers 1] [--env KEY=VALUE ...]
+                            [--url http://host:port] [--output loadtest.jsonl] [--label NAME]
+  python tools/load_test.py --compare loadtest.jsonl
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+METRICS = ["Deaths", "Injuries", "Assistance", "Damages", "Affected", "Rendered homeless"]
+# Relative frequency of each kind of user action: a selection bar control, or opening another tab
+CHANGES = {"country": 0.4, "years": 0.25, "metric": 0.15, "tab": 0.2}
+# Concurrent requests per virtual user, as a browser's connections per host
+BROWSER_CONNECTIONS = 6
+SELECTION_CHANGES_PER_PAGE = 8
+FIRST_YEAR, LAST_YEAR = 1900, 2024
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, workers: int, env: dict) -> subprocess.Popen:
+    """Starts app.py's server on 127.0.0.1:port (gunicorn if workers > 1)."""
+    if workers > 1:
+        command = [sys.executable, "-m", "gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}", "app:server"]
+    else:
+        command = [sys.executable, "-c",
+                   f"from app import app; app.run(host='127.0.0.1', port={port}, debug=False, threaded=True)"]
+    return subprocess.Popen(command, cwd=REPO_ROOT, env={**os.environ, **env},
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(url: str, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/_dash-layout", timeout=5) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not become ready within {timeout:.0f} s")
+
+
+class ResourceSampler(threading.Thread):
+    """Samples CPU time and RSS of a process and its children from /proc (Linux only)."""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.pid, self.interval = pid, interval
+        self.rss = []
+        self._done = threading.Event()
+        self._cpu_start = self._wall_start = None
+        self.cpu_seconds = self.wall_seconds = 0.0
+
+    def _pids(self):
+        pids = [self.pid]
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    with open(f"/proc/{entry}/stat") as f:
+                        if int(f.read().rsplit(")", 1)[1].split()[1]) == self.pid:
+                            pids.append(int(entry))
+                except (OSError, IndexError, ValueError):
+                    continue
+        return pids
+
+    def _sample(self):
+        cpu, rss = 0.0, 0
+        ticks, page = os.sysconf("SC_CLK_TCK"), os.sysconf("SC_PAGE_SIZE")
+        for pid in self._pids():
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                cpu += (int(fields[11]) + int(fields[12])) / ticks  # utime + stime
+                rss += int(fields[21]) * page
+            except (OSError, IndexError, ValueError):
+                continue
+        return cpu, rss
+
+    def run(self):
+        self._cpu_start, _ = self._sample()
+        self._wall_start = time.monotonic()
+        while not self._done.wait(self.interval):
+            cpu, rss = self._sample()
+            self.rss.append(rss)
+            self.cpu_seconds = cpu - self._cpu_start
+            self.wall_seconds = time.monotonic() - self._wall_start
+
+    def stop(self) -> dict:
+        self._done.set()
+        self.join()
+        if not self.rss:
+            return {}
+        return {
+            "cpu_percent": round(100 * self.cpu_seconds / max(self.wall_seconds, 1e-9), 1),
+            "rss_mb_mean": round(sum(self.rss) / len(self.rss) / 2 ** 20, 1),
+            "rss_mb_peak": round(max(self.rss) / 2 ** 20, 1),
+        }
+
+
+class Recorder:
+    """Latencies per endpoint label, thread-safe."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, label, seconds, ok):
+        with self._lock:
+            self.latencies[label].append(seconds)
+            if not ok:
+                self.errors[label] += 1
+
+    def summary(self, wall_seconds: float) -> dict:
+        result = {}
+        for label, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            result[label] = {
+                "requests": len(values),
+                "errors": self.errors[label],
+                "throughput_rps": round(len(values) / wall_seconds, 2),
+                "mean_ms": round(1000 * sum(values) / len(values), 1),
+                **{f"p{p}_ms": round(1000 * _percentile(values, p), 1) for p in (50, 95, 99)},
+                "max_ms": round(1000 * values[-1], 1),
+            }
+        return result
+
+
+def _percentile(sorted_values, p):
+    # Nearest-rank percentile
+    rank = max(int(-(-p * len(sorted_values) // 100)), 1)
+    return sorted_values[rank - 1]
+
+
+def _request(recorder, label, url, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"} if data else {})
+    start = time.perf_counter()
+    payload = None  # failed request
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            payload = response.read()
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        pass
+    recorder.add(label, time.perf_counter() - start, payload is not None)
+    return payload
+
+
+def layout_state(layout) -> dict:
+    """Initial value of every property of the components with a (string) id: {"id.property": value}."""
+    state = {}
+    stack = [layout]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict) and "props" in node:
+            props = node["props"]
+            if isinstance(props.get("id"), str):
+                state.update({f"{props['id']}.{prop}": value for prop, value in props.items() if prop != "id"})
+            stack.append(props.get("children"))
+    return state
+
+
+def sidebar_tabs(layout) -> list:
+    """Tab names of the sidebar buttons (pattern-matching ids {"type": "sidebar-tab", "tab": ...})."""
+    tabs, stack = [], [layout]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, dict) and "props" in node:
+            component_id = node["props"].get("id")
+            if isinstance(component_id, dict) and component_id.get("type") == "sidebar-tab":
+                tabs.append(component_id["tab"])
+            stack.append(node["props"].get("children"))
+    return tabs
+
+
+def server_callbacks(dependencies: list) -> list:
+    """
+    The server-side callbacks of the page as (label, inputs, payload builder); clientside and
+    pattern-matching callbacks are left out (the virtual user sets their outputs itself).
+    """
+    callbacks = []
+    for dep in dependencies:
+        props = dep.get("inputs", []) + dep.get("state", [])
+        if dep.get("clientside_function") or any(p["id"].startswith("{") for p in props):
+            continue
+        output = dep["output"]
+        if output.startswith(".."):
+            parts = [o for o in output.strip(".").split("...") if o]
+            outputs = [dict(zip(("id", "property"), o.rsplit(".", 1))) for o in parts]
+        else:
+            parts = [output]
+            outputs = dict(zip(("id", "property"), output.rsplit(".", 1)))
+
+        def payload(state, changed, dep=dep, outputs=outputs):
+            return {
+                "output": dep["output"],
+                "outputs": outputs,
+                "inputs": [dict(i, value=state.get(f"{i['id']}.{i['property']}")) for i in dep["inputs"]],
+                "changedPropIds": sorted(changed),
+                "state": [dict(s, value=state.get(f"{s['id']}.{s['property']}")) for s in dep.get("state", [])],
+            }
+
+        # Labelled by the last output: the store a multi-output callback records its state in
+        label = f"callback {parts[-1]}"
+        callbacks.append((label, {f"{i['id']}.{i['property']}" for i in dep["inputs"]}, payload))
+    return callbacks
+
+
+def fire(recorder, url, pool, callbacks, state, changed, label):
+    """
+    Runs the callbacks triggered by the changed properties the way the browser does: each wave of
+    triggered callbacks is sent concurrently, their outputs are applied to state and trigger the
+    next wave. The whole chain is recorded under label (the user-visible update time).
+    """
+    start = time.perf_counter()
+    ok = True
+    while changed:
+        triggered = [(name, payload) for name, inputs, payload in callbacks if inputs & changed]
+        futures = [pool.submit(_request, recorder, name, url + "/_dash-update-component", payload(state, changed))
+                   for name, payload in triggered]
+        changed = set()
+        for future in futures:
+            body = future.result()
+            if body is None:
+                ok = False
+            elif body:  # empty: 204, the callback prevented the update
+                for component_id, props in json.loads(body).get("response", {}).items():
+                    for prop, value in props.items():
+                        state[f"{component_id}.{prop}"] = value
+                        changed.add(f"{component_id}.{prop}")
+    recorder.add(label, time.perf_counter() - start, ok)
+
+
+def next_change(rng, state, countries, tabs):
+    """One user action: (changed property, new value)."""
+    change = rng.choices(list(CHANGES), weights=list(CHANGES.values()))[0]
+    if change == "country":
+        return "selection-country.value", rng.choice(countries)
+    if change == "years":
+        start = rng.randint(FIRST_YEAR, LAST_YEAR - 5)
+        return "selection-years.value", [start, rng.randint(start + 5, LAST_YEAR)]
+    if change == "metric":
+        return "selection-metric.value", rng.choice(METRICS)
+    current = state.get("active-tab.data")
+    return "active-tab.data", rng.choice([t for t in tabs if t != current] or tabs)
+
+
+def virtual_user(user, url, deadline, recorder, think_ms, seed):
+    rng = random.Random(seed * 1000 + user)
+    with ThreadPoolExecutor(max_workers=BROWSER_CONNECTIONS) as pool:
+        while time.monotonic() < deadline:
+            _request(recorder, "page /", url + "/")
+            layout = json.loads(_request(recorder, "layout", url + "/_dash-layout") or b"{}")
+            dependencies = json.loads(_request(recorder, "dependencies", url + "/_dash-dependencies") or b"[]")
+            callbacks = server_callbacks(dependencies)
+            state = layout_state(layout)
+            tabs = sidebar_tabs(layout)
+            countries = [o["value"] if isinstance(o, dict) else o for o in state.get("selection-country.options", [])]
+            # The page's clientside callback creates the session id, which starts the first prefetch
+            state["session-id.data"] = f"loadtest-{user}-{rng.getrandbits(32):08x}"
+            fire(recorder, url, pool, callbacks, state, {"session-id.data"}, "page load (all callbacks)")
+            for _ in range(SELECTION_CHANGES_PER_PAGE):
+                if time.monotonic() >= deadline:
+                    return
+                prop, value = next_change(rng, state, countries, tabs)
+                state[prop] = value
+                label = "tab switch (all callbacks)" if prop == "active-tab.data" else "selection change (all callbacks)"
+                fire(recorder, url, pool, callbacks, state, {prop}, label)
+                if think_ms:
+                    time.sleep(rng.expovariate(1000 / think_ms))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(args) -> dict:
+    env = dict(item.split("=", 1) for item in args.env)
+    server = None
+    url = args.url
+    if url is None:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = start_server(port, args.workers, env)
+    try:
+        wait_ready(url)
+        sampler = ResourceSampler(server.pid if server else args.pid) if (server or args.pid) else None
+        if sampler:
+            sampler.start()
+
+        recorder = Recorder()
+        start = time.monotonic()
+        deadline = start + args.duration
+        threads = [threading.Thread(target=virtual_user,
+                                    args=(u, url, deadline, recorder, args.think_ms, args.seed))
+                   for u in range(args.users)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.monotonic() - start
+        resources = sampler.stop() if sampler else {}
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    endpoints = recorder.summary(wall)
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "users": args.users,
+        "duration_s": round(wall, 1),
+        "workers": args.workers,
+        "think_ms": args.think_ms,
+        "env": env,
+        "throughput_rps": round(total / wall, 2),
+        "endpoints": endpoints,
+        "server": resources,
+    }
+
+
+def print_result(result):
+    print(f"{result['label'] or result['timestamp']}: {result['users']} users, {result['duration_s']} s, "
+          f"{result['workers']} worker(s), {result['throughput_rps']} req/s"
+          + (f", env {result['env']}" if result['env'] else ""))
+    print(f"  {'endpoint':<40} {'reqs':>6} {'err':>4} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for label, e in result["endpoints"].items():
+        print(f"  {label:<40} {e['requests']:>6} {e['errors']:>4} {e['throughput_rps']:>7} "
+              f"{e['p50_ms']:>8} {e['p95_ms']:>8} {e['p99_ms']:>8}")
+    if result["server"]:
+        s = result["server"]
+        print(f"  server: {s['cpu_percent']}% CPU, RSS {s['rss_mb_mean']} MB mean / {s['rss_mb_peak']} MB peak")
+
+
+def compare(path):
+    with open(path) as f:
+        runs = [json.loads(line) for line in f if line.strip()]
+    labels = sorted({label for r in runs for label in r["endpoints"]})
+    names = [r["label"] or r["timestamp"] for r in runs]
+    print(f"{'p95 ms':<40} " + " ".join(f"{n[:14]:>14}" for n in names))
+    for label in labels:
+        print(f"{label:<40} " + " ".join(f"{r['endpoints'].get(label, {}).get('p95_ms', '-'):>14}" for r in runs))
+    print(f"{'throughput req/s':<40} " + " ".join(f"{r['throughput_rps']:>14}" for r in runs))
+    print(f"{'server CPU %':<40} " + " ".join(f"{r['server'].get('cpu_percent', '-'):>14}" for r in runs))
+    print(f"{'server RSS peak MB':<40} " + " ".join(f"{r['server'].get('rss_mb_peak', '-'):>14}" for r in runs))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=8, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to run")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between a user's actions")
+    parser.add_argument("--workers", type=int, default=1, help="Server worker processes (>1 uses gunicorn)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Environment variable for the server (repeatable)")
+    parser.add_argument("--url", help="Test an already running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="With --url: server process to sample CPU/RSS from")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="", help="Name of this run in the results file")
+    parser.add_argument("--output", help="Append the result as a JSON line to this file")
+    parser.add_argument("--compare", metavar="RESULTS", help="Print the runs in a results file side by side")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(args.compare)
+        return 0
+    result = run(args)
+    print_result(result)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(json.dumps(result) + "\n")
+    return 1 if any(e["errors"] for e in result["endpoints"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
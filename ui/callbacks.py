@@ -0,0 +1,104 @@
+# callbacks.py
+from dash import ALL, Input, Output, State
+from dash.exceptions import PreventUpdate
+
+from preprocessing.store import store
+from server.export import EXPORT_FORMATS, export_url
+from ui.components import SELECTION_TABS
+from visualizations.lod import render_with_budget
+from visualizations.prefetch import prefetcher, selection_views
+
+
+def register_callbacks(app):
+    """Registers the dashboard's callbacks on app."""
+
+    # Per-page session id, created in the browser so the served layout is the same for everyone
+    app.clientside_callback(
+        """
+        function(_) {
+            return window.crypto && crypto.randomUUID ? crypto.randomUUID() : Math.random().toString(36).slice(2);
+        }
+        """,
+        Output("session-id", "data"),
+        Input("app-container", "id"),
+    )
+
+    # Tab switching itself happens in the browser (assets/script.js); the server only needs to know
+    # which tab is shown, so hidden tabs are rendered when opened rather than on every selection
+    app.clientside_callback(
+        """
+        function(_) {
+            const triggered = window.dash_clientside.callback_context.triggered;
+            if (!triggered.length || !triggered[0].value) {
+                return window.dash_clientside.no_update;
+            }
+            const propId = triggered[0].prop_id;
+            return JSON.parse(propId.slice(0, propId.lastIndexOf("."))).tab;
+        }
+        """,
+        Output("active-tab", "data"),
+        Input({"type": "sidebar-tab", "tab": ALL}, "n_clicks"),
+        prevent_initial_call=True,
+    )
+
+    @app.callback(
+        Output("selection-store", "data"),
+        Input("selection-country", "value"),
+        Input("selection-years", "value"),
+        Input("selection-metric", "value"),
+        prevent_initial_call=True,
+    )
+    def update_selection(country, years, metric):
+        if not country or not years or not metric:
+            raise PreventUpdate
+        return {"country": country, "year_start": int(years[0]), "year_end": int(years[1]), "metric": metric}
+
+    for tab, names in SELECTION_TABS.items():
+        _register_selection_tab(app, tab, names)
+
+    @app.callback(
+        Output("prefetch-status", "children"),
+        Input("selection-store", "data"),
+        Input("session-id", "data"),
+        State("active-tab", "data"),
+    )
+    def prefetch_related_views(selection, session, active_tab):
+        # Warm the cache for the selection views of the other tabs, which the user is likely to open
+        # next; the active tab's views are being rendered by its own callback
+        if not selection or not session:
+            return ""
+        scheduled = prefetcher.prefetch(
+            store.current(), selection["country"], selection["year_start"], selection["year_end"],
+            selection.get("metric", "Deaths"), session=session, skip=SELECTION_TABS.get(active_tab, ())
+        )
+        return f"{scheduled} views prefetching"
+
+
+def _register_selection_tab(app, tab, names):
+    # Re-renders a tab's selection views (figures and export links) for the current selection, once
+    # the tab is shown; a tab that is already up to date is left alone
+    outputs = [Output(f"{name}-graph", "figure") for name in names]
+    outputs += [Output(f"{name}-export-{fmt}", "href") for name in names for fmt in EXPORT_FORMATS]
+
+    @app.callback(
+        *outputs,
+        Output(f"rendered-{tab}", "data"),
+        Input("selection-store", "data"),
+        Input("active-tab", "data"),
+        State(f"rendered-{tab}", "data"),
+        prevent_initial_call=True,
+    )
+    def render_selection_views(selection, active_tab, rendered):
+        if active_tab != tab or not selection or selection == rendered:
+            raise PreventUpdate
+        snapshot = store.current()
+        views = selection_views(**selection)
+        figures = []
+        for name in names:
+            try:
+                figures.append(render_with_budget(name, snapshot, **views[name]))
+            except Exception as e:
+                print(f"Error rendering {name}: {e}")
+                figures.append({})
+        links = [export_url(name, fmt, **views[name]) for name in names for fmt in EXPORT_FORMATS]
+        return (*figures, *links, selection)
@@ -1,12 +1,18 @@
 # components.py
-from dash import html
-from .widgets import SafeVizWidget, data_choropleth, data_gdp, data_bar, data_pie, data_treemap, data_sankey
-from visualizations.viz1 import get_sunburst_viz
-from visualizations.tab2_sankey import get_sankey_viz
-from visualizations.tab2_bar_chart import get_bar_viz
-from visualizations.tab1_treemap import get_treemap_viz
-from visualizations.tab2_pie_chart import get_pie_viz
-from visualizations.tab1_chloropleth import get_choropleth_viz
+from dash import html, dcc
+from functools import partial
+from .widgets import RiskTableWidget, SafeVizWidget, SelectionVizWidget, load_sample_data
+from preprocessing.schema import AGGREGATE_REGIONS, METRICS
+from preprocessing.store import store
+
+# Selection the page opens with; the selection bar changes it (see ui/callbacks.py)
+DEFAULT_SELECTION = {"country": "World", "year_start": 1900, "year_end": 2024, "metric": "Deaths"}
+
+# Views that follow the selection bar, per tab; a tab's views are re-rendered when it is active
+SELECTION_TABS = {
+    "overview": ["pie", "treemap", "sankey"],
+    "disaster-analysis": ["stacked_area", "radar"],
+}
 
 # Topbar
 Topbar = html.Div(className="topbar", children=[
@@ -27,7 +33,7 @@ tabs = [
 
 SidebarTabs = html.Div(className="sidebar-tabs", children=[
     html.Div(className=f"sidebar-tab {'sidebar-tab--active' if region[0]=='overview' else ''}", 
-             **{"data-tab": region[0]}, children=[
+             id={"type": "sidebar-tab", "tab": region[0]}, **{"data-tab": region[0]}, children=[
         html.Div(region[1], className="icon"),
         html.Span(region[2], className="tab-label")
     ]) for region in tabs
@@ -43,6 +49,23 @@ Sidebar = html.Div(id="sidebar", className="sidebar", children=[
     SidebarTabs
 ])
 
+# Selection bar: country, year range and metric of the selection-bound views
+def SelectionBar(snapshot=None):
+    snapshot = snapshot or store.current()
+    data = snapshot.data
+    countries = sorted(set(data['Country name'].astype(str)) - set(AGGREGATE_REGIONS))
+    first_year, last_year = int(data['Year'].min()), int(data['Year'].max())
+    return html.Div(className="selection-bar", children=[
+        dcc.Dropdown(id="selection-country", className="selection-bar__country", clearable=False,
+                     options=["World"] + countries, value=DEFAULT_SELECTION["country"]),
+        dcc.RangeSlider(id="selection-years", className="selection-bar__years", min=first_year, max=last_year, step=1,
+                        value=[DEFAULT_SELECTION["year_start"], DEFAULT_SELECTION["year_end"]],
+                        marks={y: str(y) for y in range(first_year - first_year % 25 + 25, last_year + 1, 25)},
+                        tooltip={"placement": "bottom"}),
+        dcc.Dropdown(id="selection-metric", className="selection-bar__metric", clearable=False,
+                     options=METRICS, value=DEFAULT_SELECTION["metric"]),
+    ])
+
 # Skeleton widget
 def SkeletonWidget(style=None):
     return html.Div(
@@ -57,20 +80,22 @@ def SkeletonWidget(style=None):
 
 # Per-region widget layout
 
-def region_widgets(region):
+def region_widgets(region, snapshot=None):
+    # One snapshot per page render, so every widget on the page shows the same data version
+    snapshot = snapshot or store.current()
     if region == "overview":
         return [
-            SafeVizWidget(get_choropleth_viz, data_choropleth, {"gridColumn": "1 / 4", "gridRow": "3 / 6"}),
-            SafeVizWidget(get_sunburst_viz, data_gdp, {"gridColumn": "1 / 2", "gridRow": "1 / 2"}),
-            SafeVizWidget(get_bar_viz, data_bar, {"gridColumn": "2 / 4", "gridRow": "1 / 2"}),
-            SafeVizWidget(get_pie_viz, data_pie, {"gridColumn": "1 / 2", "gridRow": "2 / 3"}),
-            SafeVizWidget(get_treemap_viz, data_treemap, {"gridColumn": "2 / 3", "gridRow": "2 / 3"}),
-            SafeVizWidget(get_sankey_viz, data_sankey, {"gridColumn": "3 / 4", "gridRow": "2 / 3"}),
+            SafeVizWidget("choropleth", partial(load_sample_data, "choropleth"), {"gridColumn": "1 / 4", "gridRow": "3 / 6"}),
+            SafeVizWidget("sunburst", partial(load_sample_data, "gdp"), {"gridColumn": "1 / 2", "gridRow": "1 / 2"}),
+            SafeVizWidget("bar", partial(load_sample_data, "bar"), {"gridColumn": "2 / 4", "gridRow": "1 / 2"}),
+            SelectionVizWidget("pie", snapshot, {"gridColumn": "1 / 2", "gridRow": "2 / 3"}, DEFAULT_SELECTION),
+            SelectionVizWidget("treemap", snapshot, {"gridColumn": "2 / 3", "gridRow": "2 / 3"}, DEFAULT_SELECTION),
+            SelectionVizWidget("sankey", snapshot, {"gridColumn": "3 / 4", "gridRow": "2 / 3"}, DEFAULT_SELECTION),
         ]
     elif region == "disaster-analysis":
         return [
-            SkeletonWidget({"gridColumn": "1 / 4", "gridRow": "1 / 2", "background": "#b33"}),
-            SkeletonWidget({"gridColumn": "1 / 2", "gridRow": "2 / 3"}),
+            SelectionVizWidget("stacked_area", snapshot, {"gridColumn": "1 / 4", "gridRow": "1 / 2"}, DEFAULT_SELECTION),
+            SelectionVizWidget("radar", snapshot, {"gridColumn": "1 / 2", "gridRow": "2 / 3"}, DEFAULT_SELECTION),
             SkeletonWidget({"gridColumn": "2 / 3", "gridRow": "2 / 3"}),
             SkeletonWidget({"gridColumn": "3 / 4", "gridRow": "2 / 3"}),
             SkeletonWidget({"gridColumn": "1 / 2", "gridRow": "3 / 4"}),
@@ -79,7 +104,7 @@ def region_widgets(region):
         ]
     elif region == "economic-impact":
         return [
-            SkeletonWidget({"gridColumn": "1 / 4", "gridRow": "1 / 2"}),
+            SafeVizWidget("risk_map", snapshot, {"gridColumn": "1 / 4", "gridRow": "1 / 2"}),
             SkeletonWidget({"gridColumn": "1 / 4", "gridRow": "2 / 3", "background": "#b33"}),
             SkeletonWidget({"gridColumn": "1 / 2", "gridRow": "3 / 4"}),
             SkeletonWidget({"gridColumn": "2 / 3", "gridRow": "3 / 4"}),
@@ -88,12 +113,13 @@ def region_widgets(region):
         ]
     elif region == "country-profiles":
         return [
-            SkeletonWidget({"gridColumn": "1 / 4", "gridRow": "1 / 2", "background": "#b33"}),
-            SkeletonWidget({"gridColumn": "1 / 2", "gridRow": "2 / 3"}),
-            SkeletonWidget({"gridColumn": "2 / 3", "gridRow": "2 / 3"}),
+            SafeVizWidget("trend_profile", snapshot, {"gridColumn": "1 / 4", "gridRow": "1 / 2"},
+                          country="World", metric="Deaths"),
+            SafeVizWidget("biggest_movers", snapshot, {"gridColumn": "1 / 2", "gridRow": "2 / 3"}, metric="Deaths"),
+            SafeVizWidget("similar_countries", snapshot, {"gridColumn": "2 / 3", "gridRow": "2 / 3"}, country="India"),
             SkeletonWidget({"gridColumn": "3 / 4", "gridRow": "2 / 3"}),
             SkeletonWidget({"gridColumn": "1 / 2", "gridRow": "3 / 4"}),
-            SkeletonWidget({"gridColumn": "2 / 4", "gridRow": "3 / 4"})
+            RiskTableWidget(snapshot, {"gridColumn": "2 / 4", "gridRow": "3 / 4"})
         ]
     elif region == "trends-correlations":
         return [
@@ -107,9 +133,9 @@ def region_widgets(region):
     else:
         return [SkeletonWidget()]
 
-def ContentSection(region):
+def ContentSection(region, snapshot=None):
     return html.Div(
         id=f"content-{region}",
         className="content-section active" if region == "overview" else "content-section",
-        children=region_widgets(region)
+        children=region_widgets(region, snapshot)
     )
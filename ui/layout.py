@@ -1,13 +1,28 @@
 # layout.py
-from dash import html
-from ui.components import Topbar, Sidebar, ContentSection
+from dash import html, dcc
+from ui.components import Topbar, Sidebar, ContentSection, SelectionBar, DEFAULT_SELECTION, SELECTION_TABS
+from preprocessing.store import store
 
 tabs = ["overview","disaster-analysis", "economic-impact", "country-profiles", "trends-correlations"]
 
-layout = html.Div(id="app-container", className="layout dark", children=[
-    Topbar,
-    Sidebar,
-    html.Div(id="main-content", className="main-content main-content--grid", children=[
-        ContentSection(tab) for tab in tabs
+# Served per page load so new visitors pick up a hot-swapped dataset without a restart. The
+# layout only depends on the dataset version (per-page state such as the session id is created
+# in the browser), so repeated loads revalidate against the same ETag.
+def layout():
+    snapshot = store.current()
+    return html.Div(id="app-container", className="layout dark", children=[
+        Topbar,
+        Sidebar,
+        # Per-page session id, set by a clientside callback; the prefetcher cancels per session
+        dcc.Store(id="session-id"),
+        # Current selection; the selection bar writes here, the views and the prefetcher listen to it
+        dcc.Store(id="selection-store", data=DEFAULT_SELECTION),
+        # Tab shown in the browser, and the selection each selection tab was last rendered for
+        dcc.Store(id="active-tab", data=tabs[0]),
+        *[dcc.Store(id=f"rendered-{tab}", data=DEFAULT_SELECTION) for tab in SELECTION_TABS],
+        html.Div(id="prefetch-status", hidden=True),
+        html.Div(id="main-content", className="main-content main-content--grid", children=[
+            SelectionBar(snapshot),
+            *[ContentSection(tab, snapshot) for tab in tabs]
+        ])
     ])
-])
@@ -1,35 +1,113 @@
 # widgets.py
-import pandas as pd, ast
+import ast
+from functools import lru_cache
+
+import pandas as pd
 from dash import html, dcc
 
-# Import all visualization functions
-from visualizations.viz1 import get_sunburst_viz
-from visualizations.tab2_sankey import get_sankey_viz
-from visualizations.tab2_bar_chart import get_bar_viz
-from visualizations.tab1_treemap import get_treemap_viz
-from visualizations.tab2_stacked_area import get_stacked_area_viz
-from visualizations.tab2_pie_chart import get_pie_viz
-from visualizations.tab1_chloropleth import get_choropleth_viz
-
-# Load datasets (example: you may need to adjust filenames as needed)
-data_gdp = pd.read_csv("/Users/vishalsingh/python/sample/data/processed/india_gdp_data.csv")
-data_gdp['path'] = data_gdp['path'].apply(ast.literal_eval)
-data_bar = pd.read_csv("/Users/vishalsingh/python/sample/data/processed/india_gdp_bar_data.csv")
-data_pie = pd.read_csv("/Users/vishalsingh/python/sample/data/processed/india_gdp_pie_data.csv")
-data_treemap = pd.read_csv("/Users/vishalsingh/python/sample/data/processed/india_gdp_treemap_data.csv")
-data_treemap['path'] = data_treemap['path'].apply(ast.literal_eval)
-data_sankey = pd.read_csv("/Users/vishalsingh/python/sample/data/processed/india_gdp_sankey_data.csv")
-data_choropleth = pd.read_csv("/Users/vishalsingh/python/sample/data/processed/mapdata.csv")
-
-# Safe widget wrapper: returns a dcc.Graph or a skeleton on error
-def SafeVizWidget(viz_func, data, style=None, **kwargs):
+from preprocessing.store import DataSnapshot
+from server.export import EXPORT_FORMATS, export_url
+from visualizations.geo import graph_config
+from visualizations.lod import Budget, render_with_budget
+from visualizations.prefetch import selection_views
+
+# Sample datasets (example: you may need to adjust filenames as needed), read on first use
+SAMPLE_DATA_PATHS = {
+    "gdp": "/Users/vishalsingh/python/sample/data/processed/india_gdp_data.csv",
+    "bar": "/Users/vishalsingh/python/sample/data/processed/india_gdp_bar_data.csv",
+    "choropleth": "/Users/vishalsingh/python/sample/data/processed/mapdata.csv",
+}
+
+
+@lru_cache(maxsize=None)
+def load_sample_data(name):
+    data = pd.read_csv(SAMPLE_DATA_PATHS[name])
+    if 'path' in data.columns:
+        data['path'] = data['path'].apply(ast.literal_eval)
+    return data
+
+
+# Download links for the data behind a widget, streamed by the server (see server/export.py);
+# with link_id the links get ids "<link_id>-export-<fmt>" so callbacks can point them elsewhere
+def ExportLinks(viz, link_id=None, **kwargs):
+    return html.Div(className="widget-export", children=[
+        html.A(fmt.upper(), href=export_url(viz, fmt, **kwargs), download="", className="widget-export__link",
+               **({"id": f"{link_id}-export-{fmt}"} if link_id else {}))
+        for fmt in EXPORT_FORMATS
+    ])
+
+
+# Safe widget wrapper: returns a dcc.Graph, or a skeleton if every level of detail failed
+# viz may be a builder or its registry name; data may be a DataFrame, a DataSnapshot
+# (served from the version-keyed cache) or a zero-argument loader. Selections too big for the
+# latency budget are rendered at a coarser level of detail (marked on the figure).
+def SafeVizWidget(viz, data, style=None, budget=Budget(), **kwargs):
+    from .components import SkeletonWidget
+    try:
+        if callable(data):
+            data = data()
+        fig = render_with_budget(viz, data, budget, **kwargs)
+        children = [dcc.Graph(figure=fig, config=graph_config({"displayModeBar": False}))]
+        if isinstance(viz, str) and isinstance(data, DataSnapshot):
+            children.append(ExportLinks(viz, **kwargs))
+        return html.Div(
+            className="widget",
+            style=style or {},
+            children=children
+        )
+    except Exception as e:
+        print(f"Error rendering widget {viz if isinstance(viz, str) else viz.__name__}: {e}")
+        return SkeletonWidget(style)
+
+
+# Widget following the selection bar: one of the selection views (visualizations/prefetch.py) of a
+# registered view, rendered for the page's initial selection. The graph ("<viz>-graph") and its
+# export links are updated in place by the tab's selection callback (ui/callbacks.py), so unlike
+# SafeVizWidget it keeps them (with an empty figure) if rendering fails.
+def SelectionVizWidget(viz, snapshot, style=None, selection=None, budget=Budget()):
+    kwargs = selection_views(**selection)[viz]
+    try:
+        fig = render_with_budget(viz, snapshot, budget, **kwargs)
+    except Exception as e:
+        print(f"Error rendering widget {viz}: {e}")
+        fig = {}
+    return html.Div(
+        className="widget",
+        style=style or {},
+        children=[
+            dcc.Graph(id=f"{viz}-graph", figure=fig, config=graph_config({"displayModeBar": False})),
+            ExportLinks(viz, link_id=viz, **kwargs)
+        ]
+    )
+
+
+# Sortable table of the composite risk index (preprocessing/risk.py); sorting and paging happen
+# in the browser, the rows come from the precomputed index
+def RiskTableWidget(data, style=None, page_size=15):
+    from dash import dash_table
+    from preprocessing.risk import get_risk_index
     from .components import SkeletonWidget
     try:
-        fig = viz_func(data, **kwargs)
+        frame = data.data if isinstance(data, DataSnapshot) else data
+        table = get_risk_index(frame).table.drop(columns=['ISO_Code'])
+        columns = [{"name": col, "id": col, "type": "numeric" if pd.api.types.is_numeric_dtype(table[col]) else "text"}
+                   for col in table.columns]
         return html.Div(
             className="widget",
             style=style or {},
-            children=[dcc.Graph(figure=fig, config={"displayModeBar": False})]
+            children=[dash_table.DataTable(
+                id="risk-table",
+                columns=columns,
+                data=table.to_dict("records"),
+                sort_action="native",
+                filter_action="native",
+                page_size=page_size,
+                style_table={"overflowX": "auto"},
+                style_header={"backgroundColor": "#222", "color": "white", "fontWeight": "bold"},
+                style_cell={"backgroundColor": "transparent", "color": "white",
+                            "fontFamily": "Tektur, Segoe UI, sans-serif", "padding": "4px 8px"},
+            )]
         )
-    except Exception:
+    except Exception as e:
+        print(f"Error rendering risk table: {e}")
         return SkeletonWidget(style)
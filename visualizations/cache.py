@@ -0,0 +1,196 @@
+# cache.py
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+
+import plotly.io as pio
+
+from visualizations.disk_cache import get_disk_cache, hash_key
+
+_MAX_ENTRIES = 256
+_figures = OrderedDict()
+_in_flight = {}
+_lock = threading.Lock()
+
+
+class _Call:
+    """A figure computation in progress that other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BuildTrace:
+    """
+    Records the figures and aggregates requested while it is set as build_trace (server/profiling.py
+    sets it for a profiled request). With cold=True they are computed directly, bypassing both
+    caches, so the profile shows the actual computation.
+    """
+
+    def __init__(self, cold: bool = False):
+        self.cold = cold
+        self.builds = []
+
+    def run(self, kind, name, kwargs, cached, direct):
+        start = time.perf_counter()
+        result = direct() if self.cold else cached()
+        self.builds.append({"kind": kind, "name": name, "kwargs": kwargs,
+                            "ms": round(1000 * (time.perf_counter() - start), 2)})
+        return result
+
+
+# Unset (None) except during a profiled request
+build_trace = ContextVar("build_trace", default=None)
+
+
+def _normalize(value):
+    # Lists/dicts aren't hashable; numpy scalars should match their Python equivalents
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+    if hasattr(value, 'item') and not hasattr(value, '__len__'):
+        return value.item()
+    return value
+
+
+def make_cache_key(viz_func, version: str, kwargs: dict) -> tuple:
+    """
+    Builds the cache key for a figure: builder name, data version and normalized arguments.
+    The on-disk cache also keys on the code version (see disk_cache.hash_key).
+    """
+    return (viz_func.__module__, viz_func.__name__, version, _normalize(kwargs))
+
+
+def get_cached_figure(viz_func, snapshot, **kwargs):
+    """
+    Returns the figure for viz_func(snapshot.data, **kwargs), building it on a cache miss.
+    Concurrent calls with the same key share one computation (and its exception, if it fails).
+
+    Parameters:
+    - viz_func (callable): Visualization builder taking the dataset as first argument.
+    - snapshot (DataSnapshot): Dataset snapshot; its version is part of the key.
+    - **kwargs: Builder arguments.
+
+    Returns:
+    - The (shared, do not mutate) Plotly figure.
+    """
+    key = make_cache_key(viz_func, snapshot.version, kwargs)
+    trace = build_trace.get()
+    if trace is not None:
+        return trace.run("figure", viz_func.__name__, kwargs,
+                         lambda: _get_or_build(key, lambda: _build_figure(viz_func, snapshot, key, kwargs)),
+                         lambda: viz_func(snapshot.data, **kwargs))
+    return _get_or_build(key, lambda: _build_figure(viz_func, snapshot, key, kwargs))
+
+
+def _get_or_build(key, build):
+    # In-process LRU shared by figures and aggregates
+    with _lock:
+        if key in _figures:
+            _figures.move_to_end(key)
+            return _figures[key]
+        # Single flight: concurrent identical requests wait for the first one instead of recomputing
+        call = _in_flight.get(key)
+        leader = call is None
+        if leader:
+            call = _in_flight[key] = _Call()
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = build()
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            if call.error is None:
+                _figures[key] = call.result
+                _figures.move_to_end(key)
+                while len(_figures) > _MAX_ENTRIES:
+                    _figures.popitem(last=False)
+            del _in_flight[key]
+        call.done.set()
+    return call.result
+
+
+def _build_figure(viz_func, snapshot, key, kwargs):
+    # Second level: the on-disk cache shared by all workers, with a cross-process build lock
+    disk = get_disk_cache()
+    if disk is None:
+        return viz_func(snapshot.data, **kwargs)
+    disk_key = hash_key(key)
+    try:
+        cached = disk.get(disk_key)
+        if cached is not None:
+            return pio.from_json(cached.decode("utf-8"))
+        with disk.build_lock(disk_key):
+            # Another worker may have built it while we waited for the lock
+            cached = disk.get(disk_key)
+            if cached is not None:
+                return pio.from_json(cached.decode("utf-8"))
+            fig = viz_func(snapshot.data, **kwargs)
+            if hasattr(fig, "to_json"):
+                disk.set(disk_key, fig.to_json().encode("utf-8"))
+            return fig
+    except sqlite3.Error as e:
+        print(f"Disk cache error, computing directly: {e}")
+        return viz_func(snapshot.data, **kwargs)
+
+
+def get_cached_aggregate(name: str, snapshot, compute, **kwargs):
+    """
+    Returns compute(snapshot.data, **kwargs) through the in-process and on-disk (pickled) caches,
+    keyed like figures.
+
+    Parameters:
+    - name (str): Name of the aggregate.
+    - snapshot (DataSnapshot): Dataset snapshot; its version is part of the key.
+    - compute (callable): Function producing the aggregate (e.g. a DataFrame).
+    - **kwargs: Arguments for compute.
+
+    Returns:
+    - The (shared, do not mutate) aggregate.
+    """
+    key = ("aggregate", name, snapshot.version, _normalize(kwargs))
+    trace = build_trace.get()
+    if trace is not None:
+        return trace.run("aggregate", name, kwargs,
+                         lambda: _get_or_build(key, lambda: _build_aggregate(compute, snapshot, key, kwargs)),
+                         lambda: compute(snapshot.data, **kwargs))
+    return _get_or_build(key, lambda: _build_aggregate(compute, snapshot, key, kwargs))
+
+
+def _build_aggregate(compute, snapshot, key, kwargs):
+    disk = get_disk_cache()
+    if disk is None:
+        return compute(snapshot.data, **kwargs)
+    disk_key = hash_key(key)
+    try:
+        result = disk.get_object(disk_key)
+        if result is not None:
+            return result
+        with disk.build_lock(disk_key):
+            # Another worker may have built it while we waited for the lock
+            result = disk.get_object(disk_key)
+            if result is None:
+                result = compute(snapshot.data, **kwargs)
+                disk.set_object(disk_key, result)
+            return result
+    except sqlite3.Error as e:
+        print(f"Disk cache error, computing directly: {e}")
+        return compute(snapshot.data, **kwargs)
+
+
+def clear_figure_cache():
+    with _lock:
+        _figures.clear()
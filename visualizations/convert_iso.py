@@ -1,10 +1,25 @@
-import numpy as np
-import pandas as pd
-import pycountry
+# Names in the disaster data that pycountry doesn't resolve
+ISO3_OVERRIDES = {
+    'Turkey': 'TUR',
+    'Russia': 'RUS',
+    'Democratic Republic of Congo': 'COD',
+    'Cape Verde': 'CPV',
+    "Cote d'Ivoire": 'CIV',
+    'East Timor': 'TLS',
+    'Micronesia (country)': 'FSM',
+    'Reunion': 'REU',
+    'Palestine': 'PSE',
+    'United States Virgin Islands': 'VIR',
+    'Saint Helena': 'SHN',
+    'Saint Barthelemy': 'BLM',
+    'Brunei': 'BRN',
+}
 
 def get_country_iso3(country_name):
+    if country_name in ISO3_OVERRIDES:
+        return ISO3_OVERRIDES[country_name]
+    import pycountry  # deferred: only needed when building choropleth data
     try:
         return pycountry.countries.lookup(country_name).alpha_3
     except:
         return None
-    
\ No newline at end of file
@@ -0,0 +1,193 @@
+# disk_cache.py
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process build locks, the cache itself still works
+    fcntl = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Set DASHBOARD_CACHE_DIR to an empty string to disable the disk cache
+CACHE_DIR = os.environ.get("DASHBOARD_CACHE_DIR", os.path.join(REPO_ROOT, ".cache"))
+MAX_BYTES = int(os.environ.get("DASHBOARD_CACHE_MAX_MB", "512")) * 1024 * 1024
+DEFAULT_TTL = float(os.environ.get("DASHBOARD_CACHE_TTL", str(7 * 24 * 3600)))
+# Build locks are hashed onto this many lock files, so the lock directory never grows
+LOCK_STRIPES = 64
+# A hit refreshes an entry's access time (a write) at most this often; LRU order is this coarse
+ACCESS_RESOLUTION = 60.0
+# Packages whose code the cached figures and aggregates depend on (see code_digest)
+CODE_PACKAGES = ["visualizations", "preprocessing"]
+
+
+class DiskCache:
+    """
+    SQLite-backed key/value cache shared by all worker processes on one machine.
+
+    Values are zlib-compressed bytes with a TTL; when the total size exceeds max_bytes the least
+    recently read entries are evicted. Access times are only written when older than
+    ACCESS_RESOLUTION, so hits on hot entries stay read-only.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = MAX_BYTES, ttl: float = DEFAULT_TTL):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, "figures.sqlite")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self.lock_dir = os.path.join(directory, "locks")
+        os.makedirs(self.lock_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value BLOB, size INTEGER, expires REAL, accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def _connect(self):
+        # One connection per thread; WAL lets readers in other processes proceed during writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        """Returns the decompressed bytes stored under key, or None if missing or expired."""
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT value, expires, accessed FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None
+        if now - row[2] > ACCESS_RESOLUTION:
+            conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        return zlib.decompress(row[0])
+
+    def set(self, key: str, value: bytes, ttl: float = None):
+        """Stores value under key, then evicts least recently read entries above max_bytes."""
+        blob = zlib.compress(value, 6)
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+            (key, blob, len(blob), now + (ttl or self.ttl), now)
+        )
+        self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM cache WHERE expires < ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM cache WHERE key = ?", stale)
+
+    def get_object(self, key: str):
+        value = self.get(key)
+        return None if value is None else pickle.loads(value)
+
+    def set_object(self, key: str, obj, ttl: float = None):
+        self.set(key, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL), ttl)
+
+    @contextmanager
+    def build_lock(self, key: str):
+        """
+        Cross-process lock for building key, so only one worker computes a missing entry.
+
+        Keys share LOCK_STRIPES lock files: unrelated builds rarely wait on each other, and a
+        thread already holding a stripe re-enters it instead of blocking on itself.
+        """
+        if fcntl is None:
+            yield
+            return
+        stripe = zlib.crc32(key.encode("utf-8")) % LOCK_STRIPES
+        held = getattr(self._local, "stripes", None)
+        if held is None:
+            held = self._local.stripes = set()
+        if stripe in held:
+            yield
+            return
+        with open(os.path.join(self.lock_dir, f"stripe-{stripe:02d}.lock"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            held.add(stripe)
+            try:
+                yield
+            finally:
+                held.discard(stripe)
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def clear(self):
+        self._connect().execute("DELETE FROM cache")
+
+
+@lru_cache(maxsize=None)
+def code_digest(paths: tuple = ()) -> str:
+    """
+    Digest of the code of CODE_PACKAGES (every .py file, with its path) and of the extra paths.
+    Computed once per process for each set of extra paths.
+
+    Parameters:
+    - paths (tuple): Further files to include (e.g. a tool's own source).
+
+    Returns:
+    - Short hex digest.
+    """
+    digest = hashlib.sha1()
+    files = list(paths)
+    for package in CODE_PACKAGES:
+        for root, dirs, names in os.walk(os.path.join(REPO_ROOT, package)):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            files += sorted(os.path.join(root, name) for name in names if name.endswith(".py"))
+    for path in files:
+        # Paths too, so moving code between modules changes the digest
+        digest.update(os.path.relpath(path, REPO_ROOT).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def hash_key(key) -> str:
+    """
+    Stable string key for a (normalized, repr-able) cache key tuple, identical across processes.
+    The code digest is part of it, so entries built by older code are never served after a deploy.
+    """
+    return hashlib.sha1(repr((code_digest(), key)).encode("utf-8")).hexdigest()
+
+
+_disk_cache = None
+_disk_cache_lock = threading.Lock()
+
+
+def get_disk_cache():
+    """Returns the process-wide DiskCache, or None if disabled or the directory is unusable."""
+    global _disk_cache
+    if not CACHE_DIR:
+        return None
+    with _disk_cache_lock:
+        if _disk_cache is None:
+            try:
+                _disk_cache = DiskCache(CACHE_DIR)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Disk cache disabled: {e}")
+                _disk_cache = False
+        return _disk_cache or None
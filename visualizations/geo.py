@@ -0,0 +1,76 @@
+# geo.py
+import json
+import os
+from functools import lru_cache
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Written by tools/build_world_geometry.py; Dash serves everything under assets/ at /assets/
+GEO_DIR = os.path.join(REPO_ROOT, "assets", "geo")
+GEO_URL = "/assets/geo/"
+TOPOJSON_URL = GEO_URL + "topojson/"
+
+# Simplification levels, coarsest first: name -> (tolerance in degrees, coordinate decimals)
+GEO_LEVELS = {
+    "low": (0.25, 2),
+    "medium": (0.05, 3),
+    "high": (0.01, 3),
+}
+
+# Plotly geo scopes narrower than the world get the next finer level
+_CONTINENT_SCOPES = {"europe", "asia", "africa", "north america", "south america"}
+
+
+def geometry_path(level: str) -> str:
+    return os.path.join(GEO_DIR, f"world_{level}.geojson")
+
+
+def has_geometry(level: str = "low") -> bool:
+    """Whether the bundled world geometry for level has been built."""
+    return os.path.exists(geometry_path(level))
+
+
+@lru_cache(maxsize=None)
+def load_world_geojson(level: str = "low") -> dict:
+    """
+    Returns the bundled world GeoJSON at a simplification level (features keyed by ISO-3 'id').
+
+    Raises:
+    - FileNotFoundError: If tools/build_world_geometry.py has not been run.
+    """
+    with open(geometry_path(level)) as f:
+        return json.load(f)
+
+
+def geometry_level(scope: str = "world", n_locations: int = None) -> str:
+    """
+    Picks the resolution for a map view: coarse for the whole world, finer when zoomed to a
+    continent or fitted to a handful of countries. Falls back to the nearest built level.
+
+    Parameters:
+    - scope (str): Plotly geo scope.
+    - n_locations (int): Number of locations when the map is fitted to them (None if not).
+
+    Returns:
+    - A GEO_LEVELS name, or None if no bundled geometry exists.
+    """
+    if n_locations is not None and n_locations <= 10:
+        wanted = "high"
+    elif scope in _CONTINENT_SCOPES:
+        wanted = "medium"
+    else:
+        wanted = "low"
+    names = list(GEO_LEVELS)
+    # Prefer the wanted level, then coarser ones (smaller), then finer ones
+    order = names[names.index(wanted)::-1] + names[names.index(wanted) + 1:]
+    return next((level for level in order if has_geometry(level)), None)
+
+
+def graph_config(config: dict = None) -> dict:
+    """
+    Returns a dcc.Graph config that points Plotly's base-map lookup at the bundled (empty)
+    topologies, so geo figures never fetch from the CDN once the geometry has been built.
+    """
+    config = dict(config or {})
+    if os.path.isdir(os.path.join(GEO_DIR, "topojson")):
+        config.setdefault("topojsonURL", TOPOJSON_URL)
+    return config
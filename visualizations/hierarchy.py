@@ -0,0 +1,90 @@
+# hierarchy.py
+import pandas as pd
+
+from preprocessing.schema import AGGREGATE_REGIONS, load_continent_map
+
+HIERARCHY_LEVELS = ['Continent', 'Country name', 'Disaster Type', 'Year bucket']
+
+
+def add_hierarchy_columns(data: pd.DataFrame, bucket_size: int = 10) -> pd.DataFrame:
+    """
+    Returns the country rows of data with 'Continent' and 'Year bucket' columns added.
+
+    Parameters:
+    - data (pd.DataFrame): Disaster data with 'Country name' and 'Year'.
+    - bucket_size (int): Width of the year buckets in years (default: 10, labelled '1990s').
+
+    Returns:
+    - A new DataFrame (aggregate rows like 'World' are dropped).
+    """
+    df = data[~data['Country name'].isin(AGGREGATE_REGIONS)]
+    start = (df['Year'] // bucket_size * bucket_size).astype('int16')
+    if bucket_size == 10:
+        labels = start.astype(str) + 's'
+    else:
+        labels = start.astype(str) + '-' + (start + bucket_size - 1).astype(str)
+    return df.assign(**{
+        'Continent': df['Country name'].astype(str).map(load_continent_map()).fillna('Other').astype('category'),
+        'Year bucket': labels.astype('category')
+    })
+
+
+def build_hierarchy(frame: pd.DataFrame, levels: list, value_col: str, root: str = None) -> pd.DataFrame:
+    """
+    Builds ids/parents/values arrays for go.Sunburst/go.Treemap with one groupby per level.
+
+    Rows may be ragged (NaN in deeper levels); such a row counts toward every node on its path.
+    Node values are totals of their subtree, so traces should use branchvalues='total'.
+
+    Parameters:
+    - frame (pd.DataFrame): One column per level plus value_col.
+    - levels (list): Level columns, outermost first.
+    - value_col (str): Column to sum.
+    - root (str): Optional label of a single root node above the first level.
+
+    Returns:
+    - DataFrame with 'ids', 'labels', 'parents', 'values' and 'depth'; zero-valued nodes are dropped.
+    """
+    parts = []
+    for depth in range(1, len(levels) + 1):
+        keys = levels[:depth]
+        sub = frame[frame[keys[-1]].notna()] if frame[keys[-1]].isna().any() else frame
+        grouped = sub.groupby(keys, observed=True, sort=False)[value_col].sum()
+        grouped = grouped[grouped > 0]
+        index = grouped.index.to_frame(index=False).astype(str)
+
+        # Node ids are the '/'-joined path, so equal labels under different parents stay distinct
+        ids, parents = None, None
+        if root is not None:
+            ids = pd.Series(root, index=index.index)
+        for key in keys:
+            parents = ids
+            ids = index[key] if ids is None else ids + '/' + index[key]
+        if parents is None:
+            parents = pd.Series('', index=index.index)
+
+        parts.append(pd.DataFrame({
+            'ids': ids.to_numpy(),
+            'labels': index[keys[-1]].to_numpy(),
+            'parents': parents.to_numpy(),
+            'values': grouped.to_numpy(dtype='float64'),
+            'depth': depth
+        }))
+
+    nodes = pd.concat(parts, ignore_index=True)
+    if root is not None:
+        top = pd.DataFrame({'ids': [root], 'labels': [root], 'parents': [''],
+                            'values': [nodes.loc[nodes['depth'] == 1, 'values'].sum()], 'depth': [0]})
+        nodes = pd.concat([top, nodes], ignore_index=True)
+    return nodes
+
+
+def hierarchy_from_paths(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Builds the ids/parents/values table from a DataFrame with list-valued 'path' and 'value' columns.
+    """
+    max_depth = int(data['path'].str.len().max())
+    path_columns = [f'level{i+1}' for i in range(max_depth)]
+    frame = pd.DataFrame(data['path'].tolist(), columns=path_columns, index=data.index)
+    frame['value'] = data['value']
+    return build_hierarchy(frame, path_columns, 'value')
@@ -0,0 +1,367 @@
+# lod.py
+import inspect
+import math
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.aggregate import METRIC_AGG
+from preprocessing.schema import AGGREGATE_REGIONS, METRICS
+from preprocessing.store import DataSnapshot, get_derived
+from visualizations.cache import get_cached_figure
+from visualizations.registry import VIZ_REGISTRY, get_viz
+
+# Level-of-detail ladder, finest first; each level also applies the reductions before it
+LOD_LEVELS = ("full", "year_bucketed", "top_n", "sampled")
+
+# Rough throughput used to turn size estimates into milliseconds: records filtered/aggregated by
+# pandas, and plotted points serialized and drawn by the browser
+ROWS_PER_MS = 50_000
+POINTS_PER_MS = 20
+# Parameters of the coarser levels
+YEAR_BUCKET = 10
+TOP_N_COUNTRIES = 20
+# Markers a binned density heatmap costs to serialize and draw: one trace of bins^2 values,
+# whatever the number of points binned
+DENSITY_CELL_POINTS = 50
+
+
+class Budget(NamedTuple):
+    """Latency/size budget for one figure."""
+    max_ms: float = 1000.0
+    max_points: int = None
+
+
+class SelectionStats(NamedTuple):
+    """Cheap size estimate of the data a builder would plot."""
+    rows: int
+    countries: int
+    years: int
+    types: int
+
+
+class LevelOfDetail(NamedTuple):
+    """The level picked for a figure and the parameters of its reductions."""
+    level: str
+    bucket: int = 1
+    top_n: int = 0
+    fraction: float = 1.0
+    points: int = 0
+    est_ms: float = 0.0
+
+
+# Plotted points per view as a function of the selection; views not listed plot roughly one point
+# per disaster type and year
+COST_MODELS = {
+    "choropleth": lambda s, kw: s.countries * s.years,
+    "risk_map": lambda s, kw: s.countries,
+    "similar_countries": lambda s, kw: kw.get("top_n", 10),
+    "scatter_matrix": lambda s, kw: _scatter_matrix_cost(s, kw),
+    "multi_metric": lambda s, kw: min(s.rows, kw.get("max_lines", 2000)) if kw.get("granularity") == "record" else s.years,
+    "stacked_area": lambda s, kw: s.types * s.years * len(kw.get("countries") or [0]),
+    "treemap": lambda s, kw: s.countries * s.types,
+    "sunburst": lambda s, kw: s.countries * s.types,
+    "ranked_bar": lambda s, kw: min(s.countries, kw.get("top_n", 20)),
+    "pie": lambda s, kw: s.types,
+    "radar": lambda s, kw: s.types * len(kw.get("entities") or [0]),
+    "sankey": lambda s, kw: s.types * len(kw.get("metrics") or [0, 0, 0]),
+}
+
+# Views whose builders sum the records they plot: a sample's metrics are scaled up by 1 / fraction
+# for them, so totals keep their size. Point and record views (scatter matrix, parallel
+# coordinates, maps of rows) plot each row as it is and are never scaled.
+SUMMED_VIEWS = {"treemap", "sunburst", "pie", "radar", "sankey", "stacked_area", "ranked_bar",
+                "trend_profile", "biggest_movers"}
+
+
+def _scatter_matrix_cost(s, kw):
+    # Above density_threshold points the matrix switches to binned heatmaps, whose size doesn't
+    # depend on the number of points: a constant price, so large matrices render at full detail
+    n = s.countries * s.years if kw.get("granularity") == "country-year" else s.years
+    cells = len(kw.get("metrics") or [0, 0]) ** 2
+    return cells * (DENSITY_CELL_POINTS if n > kw.get("density_threshold", 5000) else n)
+
+
+def _count_cube(data):
+    # Record counts per (country, year), computed once per dataset
+    countries, country_codes = None, None
+    if 'Country name' in data.columns:
+        country_codes, countries = pd.factorize(data['Country name'])
+        countries = pd.Index(countries.astype(str))
+    years = data['Year'].to_numpy(dtype=np.int64) if 'Year' in data.columns else np.zeros(len(data), dtype=np.int64)
+    first_year = int(years.min()) if len(years) else 0
+    n_c = len(countries) if countries is not None else 1
+    n_y = int(years.max()) - first_year + 1 if len(years) else 1
+    flat = (country_codes if country_codes is not None else 0) * n_y + (years - first_year)
+    cube = np.bincount(flat, minlength=n_c * n_y).reshape(n_c, n_y)
+    types = data['Disaster Type'].nunique() if 'Disaster Type' in data.columns else 1
+    return countries, first_year, cube, max(int(types), 1)
+
+
+def estimate_selection(data: pd.DataFrame, **kwargs) -> SelectionStats:
+    """
+    Estimates the size of a builder's selection from record counts, without filtering the data.
+
+    Parameters:
+    - data (pd.DataFrame): Dataset the builder receives.
+    - **kwargs: Builder arguments; country, countries, year_start and year_end narrow the estimate.
+
+    Returns:
+    - SelectionStats of matching records, countries, years and disaster types.
+    """
+    countries, first_year, cube, types = get_derived(data, 'lod_count_cube', _count_cube)
+    selected = kwargs.get("countries") or ([kwargs["country"]] if kwargs.get("country", "World") != "World" else None)
+    if selected and countries is not None:
+        cube = cube[countries.get_indexer([c for c in selected if c in countries])]
+    y0 = max((kwargs.get("year_start") or first_year) - first_year, 0)
+    y1 = max((kwargs.get("year_end") or first_year + cube.shape[1] - 1) - first_year + 1, y0)
+    cube = cube[:, y0:y1]
+    return SelectionStats(
+        rows=int(cube.sum()),
+        countries=int((cube.sum(axis=1) > 0).sum()),
+        years=int((cube.sum(axis=0) > 0).sum()),
+        types=types
+    )
+
+
+def _registry_name(viz):
+    if isinstance(viz, str):
+        return viz
+    for name, (module_name, func_name) in VIZ_REGISTRY.items():
+        if viz.__module__ == module_name and viz.__name__ == func_name:
+            return name
+    return viz.__name__
+
+
+def choose_level(viz, data: pd.DataFrame, budget: Budget = Budget(), **kwargs) -> LevelOfDetail:
+    """
+    Picks the finest level of detail whose estimated cost fits the budget.
+
+    Parameters:
+    - viz (str or callable): Registry name or builder.
+    - data (pd.DataFrame): Dataset the builder receives.
+    - budget (Budget): Latency/size budget.
+    - **kwargs: Builder arguments.
+
+    Returns:
+    - LevelOfDetail; 'sampled' always fits, with the sample fraction sized to the budget.
+    """
+    stats = estimate_selection(data, **kwargs)
+    cost = COST_MODELS.get(_registry_name(viz), lambda s, kw: s.types * s.years)
+    has_years = 'Year' in data.columns
+    has_countries = 'Country name' in data.columns
+
+    def estimate(s):
+        points = int(cost(s, kwargs))
+        return points, s.rows / ROWS_PER_MS + points / POINTS_PER_MS
+
+    def fits(points, est_ms):
+        return est_ms <= budget.max_ms and (budget.max_points is None or points <= budget.max_points)
+
+    points, est_ms = estimate(stats)
+    if fits(points, est_ms):
+        return LevelOfDetail("full", points=points, est_ms=est_ms)
+
+    level, lod_bucket, lod_top_n = "full", 1, 0
+    if has_years:
+        bucket = YEAR_BUCKET
+        buckets = math.ceil(stats.years / bucket)
+        bucketed = stats._replace(years=buckets, rows=min(stats.rows, stats.countries * buckets * stats.types))
+        bucketed_points, bucketed_ms = estimate(bucketed)
+        # Only worth it for views with a year dimension
+        if bucketed_points < points:
+            stats, points, est_ms = bucketed, bucketed_points, bucketed_ms
+            level, lod_bucket = "year_bucketed", bucket
+            if fits(points, est_ms):
+                return LevelOfDetail(level, lod_bucket, points=points, est_ms=est_ms)
+
+    if has_countries and stats.countries > TOP_N_COUNTRIES:
+        top_n = TOP_N_COUNTRIES
+        top = stats._replace(countries=top_n, rows=stats.rows * top_n // stats.countries)
+        top_points, top_ms = estimate(top)
+        if top_points < points:
+            stats, points, est_ms = top, top_points, top_ms
+            level, lod_top_n = "top_n", top_n
+            if fits(points, est_ms):
+                return LevelOfDetail(level, lod_bucket, lod_top_n, points=points, est_ms=est_ms)
+
+    # Sampling scales records and points roughly linearly
+    limit = budget.max_ms if budget.max_points is None else min(budget.max_ms, est_ms * budget.max_points / max(points, 1))
+    fraction = max(round(min(1.0, limit / max(est_ms, 1e-9)), 3), 0.001)
+    return LevelOfDetail("sampled", lod_bucket, lod_top_n, fraction, int(points * fraction), est_ms * fraction)
+
+
+def _bucket_years(data, bucket, year_start=None, year_end=None):
+    # Re-aggregates the selected years to one row per bucket, combining metrics as aggregate() does
+    # (METRIC_AGG). Buckets start at year_start and the last one ends at year_end, so each row is
+    # labelled with the first year of the range it covers and builders' year filters keep them all
+    year_start = int(data['Year'].min()) if year_start is None else year_start
+    if year_end is not None:
+        data = data[(data['Year'] >= year_start) & (data['Year'] <= year_end)]
+    else:
+        data = data[data['Year'] >= year_start]
+    numeric = [c for c in data.columns if c != 'Year' and pd.api.types.is_numeric_dtype(data[c])]
+    keys = [c for c in data.columns if c not in numeric]
+    frame = data.assign(Year=(year_start + (data['Year'] - year_start) // bucket * bucket).astype(data['Year'].dtype))
+    agg = {c: METRIC_AGG.get(c, 'sum') for c in numeric}
+    grouped = frame.groupby(keys, observed=True, dropna=False, sort=False).agg(agg).reset_index()
+    # Sums stay Int64: decade totals of 'Affected' can overflow the Int32 schema dtype
+    return grouped[data.columns]
+
+
+def reduce_data(data: pd.DataFrame, lod: LevelOfDetail, metric: str = None, keep: list = (), seed: int = 0,
+                year_start: int = None, year_end: int = None, scale: bool = False) -> pd.DataFrame:
+    """
+    Applies the reductions of a level of detail to a dataset.
+
+    Parameters:
+    - data (pd.DataFrame): Dataset to reduce.
+    - lod (LevelOfDetail): Level and its parameters.
+    - metric (str): Metric ranking countries for 'top_n' (record counts if None).
+    - keep (list): Countries always kept (e.g. the selected one); aggregate regions are always kept.
+    - seed (int): Random seed for 'sampled'.
+    - year_start (int): First year of the selection; year buckets start here (default: first year in data).
+    - year_end (int): Last year of the selection; the last bucket ends here.
+    - scale (bool): Scale a sample's metrics by 1 / fraction (only for views that sum records).
+
+    Returns:
+    - The reduced DataFrame (data itself at the 'full' level).
+    """
+    if lod.bucket > 1:
+        data = _bucket_years(data, lod.bucket, year_start, year_end)
+    if lod.top_n:
+        names = data['Country name'].astype(str)
+        regions = names.isin(AGGREGATE_REGIONS)
+        if metric in data.columns:
+            totals = data.loc[~regions, metric].groupby(names[~regions]).sum()
+        else:
+            totals = names[~regions].value_counts()
+        top = set(totals.nlargest(lod.top_n).index) | set(keep)
+        data = data[regions | names.isin(top)]
+    if lod.fraction < 1.0:
+        data = data.sample(frac=lod.fraction, random_state=seed).sort_index()
+        if scale:
+            data = _scale_metrics(data, 1.0 / lod.fraction)
+    return data
+
+
+def _scale_metrics(data, factor):
+    # Scales a sample's metrics up to estimates of the full selection's, so builders that sum them
+    # show totals of the right size; correlations and min-max/rank scaling are unaffected
+    scaled = {}
+    for column in METRICS:
+        if column not in data.columns:
+            continue
+        values = data[column].astype('float64') * factor
+        # Counts stay whole numbers; Int64 as decade sums in _bucket_years (Int32 could overflow)
+        scaled[column] = values if column == 'Damages' else values.round().astype('Int64')
+    return data.assign(**scaled)
+
+
+def _describe(lod, scaled):
+    parts = []
+    if lod.bucket > 1:
+        parts.append(f"{lod.bucket}-year buckets")
+    if lod.top_n:
+        parts.append(f"top {lod.top_n} countries")
+    if lod.fraction < 1.0:
+        parts.append(f"{lod.fraction:.1%} sample" + (", values scaled to the full selection" if scaled else ""))
+    return ", ".join(parts)
+
+
+def build_at_level(data: pd.DataFrame, viz: str, level: str, lod_bucket: int = 1, lod_top_n: int = 0,
+                   lod_fraction: float = 1.0, **kwargs):
+    """
+    Builds a registered visualization from reduced data and marks the figure as reduced detail.
+
+    Parameters:
+    - data (pd.DataFrame): Full dataset.
+    - viz (str): Registry name of the builder.
+    - level (str): One of LOD_LEVELS.
+    - lod_bucket, lod_top_n, lod_fraction: Parameters of the reductions (see LevelOfDetail).
+    - **kwargs: Builder arguments.
+
+    Returns:
+    - The figure, with a 'Reduced detail' annotation unless level is 'full'.
+    """
+    lod = LevelOfDetail(level, lod_bucket, lod_top_n, lod_fraction)
+    builder = get_viz(viz)
+    keep = kwargs.get("countries") or [kwargs.get("country")]
+    # The builder's own defaults where the year range isn't given, so buckets match its filter
+    params = inspect.signature(builder).parameters
+    years = {}
+    for key in ("year_start", "year_end"):
+        value = kwargs.get(key, params[key].default if key in params else None)
+        years[key] = value if isinstance(value, int) else None
+    scaled = viz in SUMMED_VIEWS
+    reduced = reduce_data(data, lod, metric=kwargs.get("metric"), keep=keep, scale=scaled, **years)
+    fig = builder(reduced, **kwargs)
+    if level != "full" and hasattr(fig, "add_annotation"):
+        fig.add_annotation(
+            text=f"Reduced detail: {_describe(lod, scaled)}", showarrow=False,
+            xref="paper", yref="paper", x=1, y=1.06, xanchor="right", yanchor="bottom",
+            font=dict(size=11, color="#f0ad4e")
+        )
+    return fig
+
+
+def render_with_budget(viz, data, budget: Budget = Budget(), **kwargs):
+    """
+    Renders a visualization at the finest level of detail that fits the budget.
+
+    If building at the chosen level fails, the next coarser levels are tried before giving up.
+    Builders report their errors by returning an empty figure, so a figure without traces counts
+    as a failure too.
+
+    Parameters:
+    - viz (str or callable): Registry name or builder.
+    - data (DataSnapshot or pd.DataFrame): Data to plot; snapshots go through the figure cache.
+    - budget (Budget): Latency/size budget.
+    - **kwargs: Builder arguments.
+
+    Returns:
+    - The Plotly figure.
+
+    Raises:
+    - The last builder error (ValueError for an empty figure) if every level failed.
+    """
+    frame = data.data if isinstance(data, DataSnapshot) else data
+    viz_name = _registry_name(viz)
+    error = None
+    for lod in _ladder(choose_level(viz, frame, budget, **kwargs), frame):
+        if lod.level == "full":
+            build_func, args = (get_viz(viz) if isinstance(viz, str) else viz), kwargs
+        elif viz_name in VIZ_REGISTRY:
+            build_func = build_at_level
+            args = dict(kwargs, viz=viz_name, level=lod.level, lod_bucket=lod.bucket, lod_top_n=lod.top_n,
+                        lod_fraction=lod.fraction)
+        else:
+            break
+        try:
+            if isinstance(data, DataSnapshot):
+                fig = get_cached_figure(build_func, data, **args)
+            else:
+                fig = build_func(frame, **args)
+            if hasattr(fig, "data") and not fig.data:
+                raise ValueError(f"{viz_name} returned an empty figure")
+            return fig
+        except Exception as e:
+            print(f"Error building {viz_name} at level '{lod.level}': {e}")
+            error = e
+    raise error
+
+
+def _ladder(lod, data):
+    # The chosen level, then every coarser one as a fallback
+    yield lod
+    for level in LOD_LEVELS[LOD_LEVELS.index(lod.level) + 1:]:
+        if level == "year_bucketed" and 'Year' in data.columns:
+            lod = lod._replace(level=level, bucket=YEAR_BUCKET)
+        elif level == "top_n" and 'Country name' in data.columns:
+            lod = lod._replace(level=level, top_n=TOP_N_COUNTRIES)
+        elif level == "sampled":
+            lod = lod._replace(level=level, fraction=min(lod.fraction, 0.1))
+        else:
+            continue
+        yield lod
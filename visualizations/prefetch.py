@@ -0,0 +1,131 @@
+# prefetch.py
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from visualizations.lod import render_with_budget
+
+# Number of background prefetch threads; 0 disables prefetching
+PREFETCH_WORKERS = int(os.environ.get("DASHBOARD_PREFETCH_WORKERS", "2"))
+# Linux niceness added to prefetch threads so they yield the CPU to foreground requests
+PREFETCH_NICENESS = 10
+
+
+def selection_views(country: str, year_start: int, year_end: int, metric: str = "Deaths") -> dict:
+    """
+    Builder arguments of the views shown for a country selection.
+
+    The selection-bound widgets and the prefetcher both use this and both render through
+    render_with_budget, so prefetched figures have exactly the cache keys the widgets will ask for.
+
+    Parameters:
+    - country (str): Selected country, or 'World'.
+    - year_start (int): Start year.
+    - year_end (int): End year.
+    - metric (str): Metric for single-metric views.
+
+    Returns:
+    - Dict of registry name -> builder kwargs.
+    """
+    return {
+        "treemap": dict(metric=metric, country=country, year_start=year_start, year_end=year_end),
+        "pie": dict(country=country, metric=metric, year_start=year_start, year_end=year_end),
+        "radar": dict(country=country, year_start=year_start, year_end=year_end),
+        "sankey": dict(country=country, year_start=year_start, year_end=year_end),
+        "stacked_area": dict(country=country, metric=metric, year_start=year_start, year_end=year_end),
+    }
+
+
+def _lower_priority():
+    # Linux schedules threads individually, so this only affects the prefetch worker itself
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PREFETCH_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+class Prefetcher:
+    """
+    Warms the figure cache for the views related to a selection, in a small background pool.
+
+    Each session has at most one live selection: a new selection cancels the queued jobs of the
+    previous one (one job per figure), so stale selections never occupy the pool for long.
+    """
+
+    def __init__(self, max_workers: int = PREFETCH_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._generations = {}   # session -> generation of its latest selection
+        self._futures = {}       # session -> futures of its latest selection
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="prefetch",
+                                                initializer=_lower_priority)
+        return self._executor
+
+    def prefetch(self, snapshot, country: str, year_start: int, year_end: int, metric: str = "Deaths",
+                 session=None, skip=()) -> int:
+        """
+        Schedules the related views of a selection for background building.
+
+        Parameters:
+        - snapshot (DataSnapshot): Snapshot the foreground request is served from.
+        - country (str): Selected country.
+        - year_start (int): Start year.
+        - year_end (int): End year.
+        - metric (str): Selected metric.
+        - session: Key identifying the user session whose previous selection gets cancelled.
+        - skip (iterable): Registry names not to prefetch (e.g. the views the foreground is rendering).
+
+        Returns:
+        - Number of views scheduled.
+        """
+        if self.max_workers <= 0:
+            return 0
+        views = [(name, kwargs) for name, kwargs in selection_views(country, year_start, year_end, metric).items()
+                 if name not in skip]
+        with self._lock:
+            self._forget_finished()
+            generation = self._generations.get(session, 0) + 1
+            self._generations[session] = generation
+            for future in self._futures.get(session, ()):
+                future.cancel()
+            pool = self._pool()
+            self._futures[session] = [
+                pool.submit(self._build, session, generation, snapshot, name, kwargs) for name, kwargs in views
+            ]
+        return len(views)
+
+    def _forget_finished(self):
+        # Sessions whose prefetches all finished need no cancellation state (keeps the dicts bounded)
+        for session in [s for s, futures in self._futures.items() if all(f.done() for f in futures)]:
+            del self._futures[session]
+            self._generations.pop(session, None)
+
+    def _build(self, session, generation, snapshot, name, kwargs):
+        # The selection changed after this job was queued
+        if self._generations.get(session) != generation:
+            return
+        try:
+            render_with_budget(name, snapshot, **kwargs)
+        except Exception as e:
+            print(f"Prefetch of {name} failed: {e}")
+
+    def cancel(self, session=None):
+        """Cancels the pending prefetches of a session."""
+        with self._lock:
+            if session in self._futures:
+                self._generations[session] += 1
+                for future in self._futures[session]:
+                    future.cancel()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+prefetcher = Prefetcher()
@@ -0,0 +1,78 @@
+# registry.py
+import importlib
+
+# Visualization name -> (module, builder function). Modules are only imported on first use,
+# so importing the UI doesn't pull in plotly.express, seaborn, networkx, ... up front.
+VIZ_REGISTRY = {
+    "choropleth": ("visualizations.tab1_chloropleth", "get_choropleth_viz"),
+    "treemap": ("visualizations.tab1_treemap", "get_treemap_viz"),
+    "sunburst": ("visualizations.viz1", "get_sunburst_viz"),
+    "bar": ("visualizations.tab2_bar_chart", "get_bar_viz"),
+    "ranked_bar": ("visualizations.tab2_bar_chart", "get_ranked_bar_viz"),
+    "pie": ("visualizations.tab2_pie_chart", "get_pie_viz"),
+    "radar": ("visualizations.tab2_radar_chart", "get_radar_viz"),
+    "sankey": ("visualizations.tab2_sankey", "get_sankey_viz"),
+    "stacked_area": ("visualizations.tab2_stacked_area", "get_area_chart_viz"),
+    "risk_map": ("visualizations.tab3_risk_map", "get_risk_map_viz"),
+    "trend_profile": ("visualizations.tab4_trend_profile", "get_trend_profile_viz"),
+    "biggest_movers": ("visualizations.tab4_biggest_movers", "get_biggest_movers_viz"),
+    "similar_countries": ("visualizations.tab4_similar_countries", "get_similar_countries_viz"),
+    "correlation_matrix": ("visualizations.tab5_correlation_mat", "get_country_metric_correlation_viz"),
+    "correlation_network": ("visualizations.tab5_correlation_net", "get_disaster_network_viz"),
+    "multi_metric": ("visualizations.tab5_multi_metric", "get_multi_metric_parallel_viz"),
+    "rolling_correlation": ("visualizations.tab5_rolling_corr", "get_rolling_correlation_viz"),
+    "scatter_matrix": ("visualizations.tab5_scatter_mat", "get_scatter_matrix_viz"),
+}
+
+# Visualization name -> (module, function returning the table the view plots). The builders plot
+# what these return, so exports (server/export.py) carry exactly the data behind the chart.
+# Views without an entry (sample-data or network views) export their filtered records.
+DATA_REGISTRY = {
+    "treemap": ("visualizations.tab1_treemap", "get_treemap_data"),
+    "sunburst": ("visualizations.viz1", "get_sunburst_data"),
+    "ranked_bar": ("visualizations.tab2_bar_chart", "get_ranked_bar_data"),
+    "pie": ("visualizations.tab2_pie_chart", "get_pie_data"),
+    "radar": ("visualizations.tab2_radar_chart", "get_radar_data"),
+    "sankey": ("visualizations.tab2_sankey", "get_sankey_data"),
+    "stacked_area": ("visualizations.tab2_stacked_area", "get_area_chart_data"),
+    "risk_map": ("visualizations.tab3_risk_map", "get_risk_map_data"),
+    "trend_profile": ("visualizations.tab4_trend_profile", "get_trend_profile_data"),
+    "biggest_movers": ("visualizations.tab4_biggest_movers", "get_biggest_movers_data"),
+    "similar_countries": ("visualizations.tab4_similar_countries", "get_similar_countries_data"),
+    "correlation_matrix": ("visualizations.tab5_correlation_mat", "get_country_metric_correlation_data"),
+    "multi_metric": ("visualizations.tab5_multi_metric", "get_multi_metric_parallel_data"),
+    "rolling_correlation": ("visualizations.tab5_rolling_corr", "get_rolling_correlation_data"),
+    "scatter_matrix": ("visualizations.tab5_scatter_mat", "get_scatter_matrix_data"),
+}
+
+
+def get_viz(name: str):
+    """
+    Returns the builder function registered under name, importing its module on first use.
+
+    Parameters:
+    - name (str): Key in VIZ_REGISTRY.
+
+    Returns:
+    - The visualization builder.
+    """
+    if name not in VIZ_REGISTRY:
+        raise KeyError(f"Unknown visualization '{name}'. Available: {', '.join(VIZ_REGISTRY)}")
+    module_name, func_name = VIZ_REGISTRY[name]
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def get_viz_data(name: str):
+    """
+    Returns the data function registered under name, importing its module on first use.
+
+    Parameters:
+    - name (str): Key in DATA_REGISTRY.
+
+    Returns:
+    - The function returning the table behind the view; it takes the builder's data arguments.
+    """
+    if name not in DATA_REGISTRY:
+        raise KeyError(f"No data function for visualization '{name}'.")
+    module_name, func_name = DATA_REGISTRY[name]
+    return getattr(importlib.import_module(module_name), func_name)
@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
 import plotly.express as px
+from visualizations.geo import GEO_URL, geometry_level, load_world_geojson
 
 def get_choropleth_viz(
     data: pd.DataFrame,
@@ -9,7 +11,10 @@ def get_choropleth_viz(
     animation_frame_col: str = 'Year',
     title: str = "World Choropleth Map (Animated)",
     log_scale: bool = False,
-    color_scale: str = 'Turbo'
+    color_scale: str = 'Turbo',
+    resolution: str = "auto",
+    scope: str = "world",
+    embed_geometry: bool = False
 ) -> px.choropleth:
     """
     Creates an animated choropleth map visualization for world data.
@@ -23,6 +28,11 @@ def get_choropleth_viz(
     - title (str): Plot title.
     - log_scale (bool): Whether to use log10 scale for color (default: False).
     - color_scale (str): Color scale to use (default: 'Turbo').
+    - resolution (str): Bundled geometry level ('low', 'medium', 'high'), 'auto' to pick one for the
+      scope, or None for Plotly's built-in (CDN) country shapes.
+    - scope (str): Plotly geo scope, e.g. 'world' or 'europe'.
+    - embed_geometry (bool): Embed the GeoJSON in the figure instead of linking the served file
+      (for use outside the Dash app, e.g. fig.show()).
 
     Returns:
     - A Plotly choropleth figure.
@@ -43,6 +53,15 @@ def get_choropleth_viz(
         else:
             color_column = value_col
 
+        # Bundled, pre-simplified country shapes keyed by ISO-3 (None if not built: use Plotly's own)
+        n_locations = df_plot[location_col].nunique()
+        if resolution == "auto":
+            resolution = geometry_level(scope, n_locations)
+        geometry = {}
+        if resolution is not None:
+            geojson = load_world_geojson(resolution) if embed_geometry else f"{GEO_URL}world_{resolution}.geojson"
+            geometry = dict(geojson=geojson, featureidkey="id")
+
         # Create the figure
         fig = px.choropleth(
             df_plot,
@@ -52,12 +71,26 @@ def get_choropleth_viz(
             animation_frame=animation_frame_col,
             color_continuous_scale=color_scale,
             title=title,
-            range_color=(df_plot[color_column].min(), df_plot[color_column].max())
+            range_color=(df_plot[color_column].min(), df_plot[color_column].max()),
+            scope=scope,
+            **geometry
         )
 
+        geo = dict(showframe=False, showcoastlines=True, projection_type='equirectangular')
+        if geometry:
+            # Frames only update colors; the shapes stay those of the base trace (sent once)
+            for frame in fig.frames:
+                for trace in frame.data:
+                    trace.geojson = None
+            # Countries come from the GeoJSON; the base-map layers would need Plotly's topojson
+            geo.update(showcoastlines=False, showland=False, showlakes=False, showcountries=False,
+                       showocean=False, showsubunits=False, showrivers=False)
+            if n_locations <= 10:
+                geo.update(fitbounds="locations")
+
         # Layout customization
         fig.update_layout(
-            geo=dict(showframe=False, showcoastlines=True, projection_type='equirectangular'),
+            geo=geo,
             coloraxis_colorbar=dict(title=value_col),
             width=1200,
             height=700,
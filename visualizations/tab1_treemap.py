@@ -1,19 +1,34 @@
 
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
+from preprocessing.ranking import get_ranking_index
+from visualizations.hierarchy import add_hierarchy_columns, build_hierarchy
 
 def get_treemap_viz(
     data: pd.DataFrame,
     metric: str,
-    country: str = "World"
-) -> px.treemap:
+    country: str = "World",
+    year_start: int = None,
+    year_end: int = None,
+    top_n: int = 0,
+    levels: list = None,
+    maxdepth: int = 2
+) -> go.Figure:
     """
     Creates an interactive treemap visualization of disaster metrics by disaster type.
 
     Parameters:
     - data (pd.DataFrame): The raw disaster data DataFrame.
     - metric (str): Column name for metric to visualize (e.g., 'Deaths', 'Damages', 'Affected').
-    - country (str): Country name to filter by. If 'World', use all data.
+    - country (str): Country or aggregate region to filter by (its per-type rows; 'World' uses the
+      World rows, or every country's rows when broken down by country).
+    - year_start (int): Start year (default: first year in data).
+    - year_end (int): End year (default: last year in data).
+    - top_n (int): For 'World', add a country level with the top N countries per disaster type
+      (the rest grouped as 'Other'). 0 disables the country level.
+    - levels (list): Explicit hierarchy below the root, e.g. visualizations.hierarchy.HIERARCHY_LEVELS
+      (Continent → Country → Disaster Type → Year bucket). Overrides top_n.
+    - maxdepth (int): Levels shown at once; deeper ones are revealed by clicking (default: 2).
 
     Returns:
     - A Plotly treemap figure.
@@ -29,41 +44,27 @@ def get_treemap_viz(
         if 'Country name' not in data.columns:
             raise ValueError("'Country name' column not found in data.")
 
-        # Filter by country
-        if country != "World":
-            df_filtered = data[data['Country name'] == country].copy()
-        else:
-            df_filtered = data.copy()
-
-        # Aggregate by Disaster Type
-        df_agg = df_filtered.groupby('Disaster Type').agg({metric: 'sum'}).reset_index()
-
-        # Prepare DataFrame with 'path' and 'value' columns for your logic
-        df_agg['path'] = df_agg.apply(lambda row: [row['Disaster Type']], axis=1)
-        df_agg = df_agg.rename(columns={metric: 'value'})
+        table = get_treemap_data(data, metric, country, year_start, year_end, top_n, levels)
+        nodes = build_hierarchy(table, list(table.columns[:-1]), metric, root=country)
 
         # Check if data is empty
-        if df_agg['value'].sum() == 0:
+        if len(nodes) <= 1:
             raise ValueError("All metric values are zero for this filter.")
 
-        # Transform path column to separate levels
-        max_depth = max(len(p) for p in df_agg['path'])
-        path_columns = [f'level{i+1}' for i in range(max_depth)]
-        path_df = pd.DataFrame(df_agg['path'].tolist(), columns=path_columns, index=df_agg.index)
-        transformed_data = pd.concat([path_df, df_agg['value']], axis=1)
-
         # Create treemap
-        fig = px.treemap(
-            transformed_data,
-            path=path_columns,
-            values='value',
-            color='value',
-            color_continuous_scale='Viridis',
-            title=f"{'World' if country == 'World' else country} Distribution of {metric} by Disaster Type"
-        )
+        fig = go.Figure(go.Treemap(
+            ids=nodes['ids'],
+            labels=nodes['labels'],
+            parents=nodes['parents'],
+            values=nodes['values'],
+            branchvalues='total',
+            maxdepth=maxdepth + 1,  # +1 for the root tile
+            marker=dict(colors=nodes['values'], colorscale='Viridis', showscale=True)
+        ))
 
         # Update layout
         fig.update_layout(
+            title=f"{'World' if country == 'World' else country} Distribution of {metric} by Disaster Type",
             paper_bgcolor='rgba(0,0,0,0)',
             plot_bgcolor='rgba(0,0,0,0)',
             margin=dict(t=50, l=25, r=25, b=25),
@@ -75,19 +76,60 @@ def get_treemap_viz(
 
     except Exception as e:
         print(f"Error creating treemap visualization: {str(e)}")
-        return px.treemap()  # Empty fallback figure
+        return go.Figure()  # Empty fallback figure
+
+def get_treemap_data(
+    data: pd.DataFrame,
+    metric: str,
+    country: str = "World",
+    year_start: int = None,
+    year_end: int = None,
+    top_n: int = 0,
+    levels: list = None
+) -> pd.DataFrame:
+    """
+    Returns the leaves of the treemap: one row per path through its levels (outermost first)
+    with the metric total in the last column. Arguments as in get_treemap_viz.
+    """
+    if year_start is None:
+        year_start = int(data['Year'].min())
+    if year_end is None:
+        year_end = int(data['Year'].max())
+
+    if country == "World" and top_n > 0 and not levels:
+        return _country_level_frame(data, metric, year_start, year_end, top_n)
+
+    # Filter by country and years
+    mask = (data['Year'] >= year_start) & (data['Year'] <= year_end)
+    if country != "World" or not levels:
+        # add_hierarchy_columns keeps every country's rows; otherwise read the (World) rows directly
+        mask &= data['Country name'] == country
+    frame = add_hierarchy_columns(data[mask]) if levels else data[mask]
+    levels = levels or ['Disaster Type']
+    # Keep paths that end early (NaN in deeper levels); build_hierarchy counts them toward their ancestors
+    return frame.groupby(levels, observed=True, dropna=False)[metric].sum().reset_index()
+
+def _country_level_frame(data, metric, year_start, year_end, top_n):
+    # Disaster Type -> top N countries (+ 'Other') straight from the ranking index
+    index = get_ranking_index(data)
+    frames = []
+    for disaster_type in index.disaster_types[1:]:
+        totals = index.range_totals(disaster_type, metric, year_start, year_end)
+        df_top = index.top_k(disaster_type, metric, year_start, year_end, top_n)
+        other = totals.sum() - df_top[metric].sum()
+        if other > 0:
+            df_top.loc[len(df_top)] = ['Other', other]
+        frames.append(df_top.assign(**{'Disaster Type': disaster_type}))
+    return pd.concat(frames, ignore_index=True)[['Disaster Type', 'Country name', metric]]
 
 # Example usage for testing
 if __name__ == "__main__":
     # Sample data
     sample_data = pd.DataFrame({
-        'path': [
-            ['Agriculture', 'Crops'],
-            ['Agriculture', 'Livestock'],
-            ['Industry', 'Manufacturing'],
-            ['Services', 'IT Services']
-        ],
-        'value': [80, 20, 180, 150]
+        'Country name': ['India', 'India', 'India', 'Japan'],
+        'Year': [2000, 2001, 2001, 2011],
+        'Disaster Type': ['Flood', 'Flood', 'Earthquakes', 'Earthquakes'],
+        'Deaths': [80, 20, 180, 150]
     })
-    fig = get_treemap_viz(sample_data)
+    fig = get_treemap_viz(sample_data, 'Deaths', country='India')
     fig.show()
\ No newline at end of file
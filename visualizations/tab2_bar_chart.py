@@ -1,6 +1,7 @@
 
 import pandas as pd
 import plotly.express as px
+from preprocessing.ranking import get_ranking_index
 
 def get_bar_viz(data: pd.DataFrame, year: str = "2024") -> px.bar:
     """
@@ -52,6 +53,69 @@ def get_bar_viz(data: pd.DataFrame, year: str = "2024") -> px.bar:
         print(f"Error creating bar chart: {str(e)}")
         return px.bar()  # Return an empty figure if there's an error
 
+def get_ranked_bar_data(
+    data: pd.DataFrame,
+    metric: str = "Deaths",
+    disaster_type: str = "All",
+    year_start: int = 1900,
+    year_end: int = 2024,
+    top_n: int = 20
+) -> pd.DataFrame:
+    """Returns the bars: the top_n countries and their metric totals. Arguments as in get_ranked_bar_viz."""
+    return get_ranking_index(data).top_k(disaster_type, metric, year_start, year_end, top_n)
+
+def get_ranked_bar_viz(
+    data: pd.DataFrame,
+    metric: str = "Deaths",
+    disaster_type: str = "All",
+    year_start: int = 1900,
+    year_end: int = 2024,
+    top_n: int = 20
+) -> px.bar:
+    """
+    Creates a horizontal bar chart of the top countries by a metric over a year range.
+
+    Parameters:
+    - data (pd.DataFrame): Disaster data with 'Country name', 'Year', 'Disaster Type' and metric columns.
+    - metric (str): Metric to rank by (e.g., 'Deaths').
+    - disaster_type (str): Disaster type to rank on; 'All' sums every type.
+    - year_start (int): Start year.
+    - year_end (int): End year.
+    - top_n (int): Number of countries to show (default: 20).
+
+    Returns:
+    - A Plotly bar figure.
+    """
+    try:
+        df_top = get_ranked_bar_data(data, metric, disaster_type, year_start, year_end, top_n)
+        if df_top.empty:
+            raise ValueError("No data available for given filters.")
+
+        fig = px.bar(
+            df_top,
+            x=metric,
+            y='Country name',
+            orientation='h',
+            color=metric,
+            color_continuous_scale='Viridis',
+            title=f"Top {len(df_top)} Countries by {metric} ({disaster_type}, {year_start}-{year_end})"
+        )
+
+        fig.update_layout(
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            yaxis=dict(autorange='reversed', title=None),
+            coloraxis_showscale=False,
+            margin=dict(t=50, l=25, r=25, b=25),
+            font=dict(family='Tektur, Segoe UI, sans-serif', color='white')
+        )
+
+        return fig
+
+    except Exception as e:
+        print(f"Error creating ranked bar chart: {str(e)}")
+        return px.bar()
+
 # Example usage for testing
 if __name__ == "__main__":
     # Sample data
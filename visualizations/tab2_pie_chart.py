@@ -1,18 +1,19 @@
 import plotly.express as px
 import pandas as pd
+from preprocessing.aggregate import aggregate
 
-def get_pie_viz(data, country, metric, year_start, year_end):
-    df_filtered = data[
-        (data['Country name'] == country) &
-        (data['Year'] >= year_start) &
-        (data['Year'] <= year_end)
-    ]
-    df_agg = df_filtered.groupby('Disaster Type').agg({metric: 'sum'}).reset_index()
+def get_pie_data(data, country, metric, year_start, year_end):
+    """Slices of the pie: one row per disaster type with its metric total, largest first."""
+    df_agg = aggregate(data, country=country, metrics=[metric], year_start=year_start, year_end=year_end,
+                       group_by=['disaster_type'], agg='sum')
     df_agg[metric] = df_agg[metric].fillna(0)
 
     # Sort & keep only top contributing disasters (optional)
     df_agg = df_agg.sort_values(by=metric, ascending=False)
-    df_agg = df_agg[df_agg[metric] > df_agg[metric].sum() * 0.01]  # >1% only
+    return df_agg[df_agg[metric] > df_agg[metric].sum() * 0.01]  # >1% only
+
+def get_pie_viz(data, country, metric, year_start, year_end):
+    df_agg = get_pie_data(data, country, metric, year_start, year_end)
 
     fig = px.pie(
         df_agg,
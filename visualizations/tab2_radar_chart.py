@@ -1,76 +1,118 @@
+import numpy as np
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
+import plotly.colors as pc
+from preprocessing.aggregate import filter_mask
+from visualizations.hierarchy import add_hierarchy_columns
+
+# Spokes of the radar, in order
+RADAR_METRICS = ['Deaths', 'Injuries', 'Damages', 'Affected', 'Assistance', 'Rendered homeless']
+
+def get_radar_data(
+    data: pd.DataFrame,
+    country: str = "World",
+    year_start: int = 1960,
+    year_end: int = 2020,
+    entities: list = None,
+    entity_level: str = "Country name",
+    disaster_types: list = None
+) -> pd.DataFrame:
+    """
+    Returns the true values behind the radar chart: one row per entity and disaster type with
+    the total of each metric (0 where nothing was reported). Arguments as in get_radar_viz.
+    """
+    if entities:
+        df_filtered = data[(data['Year'] >= year_start) & (data['Year'] <= year_end)]
+        if entity_level == 'Continent':
+            df_filtered = add_hierarchy_columns(df_filtered)
+        df_filtered = df_filtered[df_filtered[entity_level].isin(entities)]
+        keys = df_filtered[entity_level].astype(str)
+    else:
+        # World is its own rows: summing every row would add the regions to their countries
+        df_filtered = data[filter_mask(data, country, "All", year_start, year_end)]
+        entity_level = 'Country name'
+        entities = [country]
+        keys = pd.Series(country, index=df_filtered.index)
+
+    types = disaster_types or sorted(df_filtered['Disaster Type'].astype(str).unique())
+    if df_filtered.empty or not types:
+        raise ValueError("No data available for given filters.")
+
+    # One grouped aggregation -> entities x disaster types x metrics
+    agg = df_filtered[RADAR_METRICS].astype('float64').groupby(
+        [keys.to_numpy(), df_filtered['Disaster Type'].astype(str).to_numpy()]
+    ).sum()
+    full_index = pd.MultiIndex.from_product([entities, types], names=[entity_level, 'Disaster Type'])
+    return agg.reindex(full_index, fill_value=0).reset_index()
 
 def get_radar_viz(
     data: pd.DataFrame,
     country: str = "World",
     year_start: int = 1960,
-    year_end: int = 2020
-) -> px.line_polar:
+    year_end: int = 2020,
+    entities: list = None,
+    entity_level: str = "Country name",
+    disaster_types: list = None
+) -> go.Figure:
     """
     Generates an interactive radar (polar) chart of normalized metrics per disaster type,
     with true values shown on hover.
 
     Parameters:
     - data (pd.DataFrame): Disaster data including 'Country name', 'Year', 'Disaster Type', and metrics columns.
-    - country (str): Selected country ('World' to include all).
+    - country (str): Selected country or aggregate region ('World' uses the World rows).
     - year_start (int): Start year of analysis.
     - year_end (int): End year of analysis.
+    - entities (list): Optional countries or continents to overlay (overrides country).
+    - entity_level (str): 'Country name' or 'Continent' - what the names in entities refer to.
+    - disaster_types (list): Optional subset of disaster types to draw.
 
     Returns:
     - Plotly radar chart figure.
     """
     try:
-        metrics = ['Deaths', 'Injuries', 'Damages', 'Affected', 'Assistance', 'Rendered homeless']
+        metrics = RADAR_METRICS
+        table = get_radar_data(data, country, year_start, year_end, entities, entity_level, disaster_types)
+        entities = entities or [country]
+        types = list(table['Disaster Type'].iloc[:len(table) // len(entities)])
+        cube = table[metrics].to_numpy().reshape(len(entities), len(types), len(metrics))
 
-        # Filter data
-        df_filtered = data[(data['Year'] >= year_start) & (data['Year'] <= year_end)]
-        if country != 'World':
-            df_filtered = df_filtered[df_filtered['Country name'] == country]
-
-        # Aggregate
-        agg_df = df_filtered.groupby('Disaster Type')[metrics].sum().reset_index()
-
-        # Original values (melted)
-        df_melt_original = agg_df.melt(id_vars='Disaster Type', var_name='Metric', value_name='True_Value')
+        # Min-max normalize each metric across all entities and disaster types at once
+        mins = cube.min(axis=(0, 1), keepdims=True)
+        spans = cube.max(axis=(0, 1), keepdims=True) - mins
+        norm = np.divide(cube - mins, spans, out=np.zeros_like(cube), where=spans > 0)
 
-        # Normalize
-        df_norm = agg_df.copy()
-        for metric in metrics:
-            min_val = df_norm[metric].min()
-            max_val = df_norm[metric].max()
-            if max_val - min_val > 0:
-                df_norm[metric] = (df_norm[metric] - min_val) / (max_val - min_val)
-            else:
-                df_norm[metric] = 0
+        # Close the polygons by repeating the first metric
+        theta = metrics + metrics[:1]
+        norm = np.concatenate([norm, norm[:, :, :1]], axis=2)
+        true_values = np.concatenate([cube, cube[:, :, :1]], axis=2)
 
-        df_melt_norm = df_norm.melt(id_vars='Disaster Type', var_name='Metric', value_name='Normalized_Value')
+        palette = pc.qualitative.Plotly
+        dashes = ['solid', 'dash', 'dot', 'dashdot', 'longdash', 'longdashdot']
+        multi = len(entities) > 1
+        fig = go.Figure()
+        for e, entity in enumerate(entities):
+            for j, disaster_type in enumerate(types):
+                fig.add_trace(go.Scatterpolar(
+                    r=norm[e, j],
+                    theta=theta,
+                    customdata=true_values[e, j],
+                    mode='lines+markers',
+                    fill='toself' if not multi else 'none',
+                    name=f"{entity} - {disaster_type}" if multi else disaster_type,
+                    legendgroup=str(entity) if multi else disaster_type,
+                    line=dict(color=palette[j % len(palette)], dash=dashes[e % len(dashes)]),
+                    hovertemplate=(
+                        (f"{entity}<br>" if multi else "") +
+                        f"Disaster: {disaster_type}<br>"
+                        "Metric: %{theta}<br>"
+                        "True Value: %{customdata:,.0f}<extra></extra>"
+                    )
+                ))
 
-        # Merge
-        df_melt = df_melt_norm.merge(df_melt_original, on=['Disaster Type', 'Metric'])
-
-        # Custom hover text
-        df_melt['hover_text'] = (
-            "Disaster: " + df_melt['Disaster Type'] +
-            "<br>Metric: " + df_melt['Metric'] +
-            "<br>True Value: " + df_melt['True_Value'].apply(lambda x: f"{x:,.0f}")
-        )
-
-        # Radar plot
-        fig = px.line_polar(
-            df_melt,
-            r='Normalized_Value',
-            theta='Metric',
-            color='Disaster Type',
-            line_close=True,
-            markers=True,
-            title=f"Radar Chart of Metrics per Disaster Type ({country}, {year_start}-{year_end})"
-        )
-        fig.update_traces(
-            fill='toself',
-            hovertemplate=df_melt['hover_text']
-        )
+        scope = ', '.join(map(str, entities)) if multi else country
         fig.update_layout(
+            title=f"Radar Chart of Metrics per Disaster Type ({scope}, {year_start}-{year_end})",
             polar=dict(radialaxis=dict(visible=True, range=[0, 1])),
             margin=dict(t=60, l=30, r=30, b=30)
         )
@@ -79,5 +121,4 @@ def get_radar_viz(
 
     except Exception as e:
         print(f"Error creating radar chart: {str(e)}")
-        return px.line_polar()  # Return empty figure if error
-
+        return go.Figure()  # Return empty figure if error
@@ -2,6 +2,20 @@ import pandas as pd
 import plotly.graph_objects as go
 import numpy as np
 import plotly.colors as pc
+from preprocessing.aggregate import filter_mask
+
+def get_sankey_data(data: pd.DataFrame,
+                    country: str = "World",
+                    year_start: int = 1960,
+                    year_end: int = 2020,
+                    metrics: list = ['Deaths', 'Damages', 'Affected']) -> pd.DataFrame:
+    """
+    Returns the flows of the Sankey diagram: one row per disaster type with its metric totals
+    (before log scaling). Arguments as in get_sankey_viz.
+    """
+    # World is its own rows: summing every row would add the regions to their countries
+    df_filtered = data[filter_mask(data, country, "All", year_start, year_end)]
+    return df_filtered.groupby('Disaster Type', observed=True)[metrics].sum().reset_index()
 
 def get_sankey_viz(data: pd.DataFrame,
                    country: str = "World",
@@ -14,7 +28,7 @@ def get_sankey_viz(data: pd.DataFrame,
 
     Parameters:
     - data (pd.DataFrame): Input dataframe with disaster data.
-    - country (str): Country to filter; 'World' for global.
+    - country (str): Country or aggregate region to filter ('World' uses the World rows).
     - year_start (int): Start year.
     - year_end (int): End year.
     - metrics (list): Metrics to include.
@@ -24,13 +38,8 @@ def get_sankey_viz(data: pd.DataFrame,
     - Plotly Sankey figure.
     """
     try:
-        # Filter data
-        df_filtered = data[(data['Year'] >= year_start) & (data['Year'] <= year_end)]
-        if country != 'World':
-            df_filtered = df_filtered[df_filtered['Country name'] == country]
-
-        # Aggregate
-        agg_df = df_filtered.groupby('Disaster Type')[metrics].sum().reset_index()
+        # Filter and aggregate
+        agg_df = get_sankey_data(data, country, year_start, year_end, metrics)
         disaster_types = agg_df['Disaster Type'].tolist()
 
         # Build source-target lists
@@ -1,66 +1,133 @@
+
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
+import plotly.colors as pc
+from plotly.subplots import make_subplots
 import numpy as np
 
+from preprocessing.aggregate import filter_mask
+
 def get_area_chart_viz(
     data: pd.DataFrame,
     country: str,
     metric: str,
     year_start: int,
-    year_end: int
-) -> px.area:
+    year_end: int,
+    countries: list = None,
+    cols: int = 2
+) -> go.Figure:
     """
     Create an interactive stacked area chart showing log-scaled metric values over years by disaster type.
 
     Parameters:
     - data: DataFrame with columns ['Country name', 'Year', 'Disaster Type', metric]
-    - country: country to filter (use 'World' to skip filtering)
+    - country: country or aggregate region to filter ('World' plots the World rows)
     - metric: metric column name to plot (e.g., 'Deaths')
     - year_start: start year
     - year_end: end year
+    - countries: optional list of countries for a small-multiples grid, one panel per country
+      (overrides country; names are matched literally)
+    - cols: number of panel columns in small-multiples mode
 
     Returns:
     - Plotly area chart figure
     """
     try:
-        # Filter year range
-        df_filtered = data[(data['Year'] >= year_start) & (data['Year'] <= year_end)].copy()
-        if country != 'World':
-            df_filtered = df_filtered[df_filtered['Country name'] == country]
-
-        # Group by year and disaster type
-        df_area = df_filtered.groupby(['Year', 'Disaster Type'])[metric].sum().reset_index()
-
-        # Log-scale value (avoid log(0))
-        df_area['log_value'] = np.log10(df_area[metric] + 1)
-
-        # Prepare customdata
-        df_area['customdata'] = df_area.apply(lambda row: [row[metric], row['Disaster Type']], axis=1)
+        entities, years, types, cube = _area_selection(data, country, metric, year_start, year_end, countries)
+        log_cube = np.log10(cube + 1)
+        stacked = np.cumsum(log_cube, axis=2)
+        totals = cube.sum(axis=2, keepdims=True)
+        share = np.divide(cube, totals, out=np.zeros_like(cube), where=totals > 0)
 
-        # Plot
-        fig = px.area(
-            df_area,
-            x='Year',
-            y='log_value',
-            color='Disaster Type',
-            title=f"Stacked Area Chart: {metric} Over Years by Disaster Type ({country}, {year_start}-{year_end})"
+        rows = -(-len(entities) // cols) if countries else 1
+        fig = make_subplots(
+            rows=rows, cols=cols if countries else 1,
+            subplot_titles=entities if countries else None,
+            shared_xaxes=True, shared_yaxes=True
         )
+        palette = pc.qualitative.Plotly
 
-        # Update hover
-        fig.update_traces(
-            hovertemplate=(
-                "Year: %{x}<br>"
-                "Disaster Type: %{customdata[1]}<br>"
-                "Original Value: %{customdata[0]:,.0f}<br>"
-                "Shown Value (log): %{y:.2f}<extra></extra>"
-            ),
-            customdata=df_area['customdata']
-        )
+        for e in range(len(entities)):
+            row, col = (e // cols + 1, e % cols + 1) if countries else (1, 1)
+            for j, disaster_type in enumerate(types):
+                fig.add_trace(go.Scattergl(
+                    x=years,
+                    y=stacked[e, :, j],
+                    mode='lines',
+                    line=dict(width=0.5, color=palette[j % len(palette)]),
+                    fill='tozeroy' if j == 0 else 'tonexty',
+                    name=disaster_type,
+                    legendgroup=disaster_type,
+                    showlegend=e == 0,
+                    # customdata[:, 0] original value, [:, 1] log value, [:, 2] share of the year's total
+                    customdata=np.column_stack([cube[e, :, j], log_cube[e, :, j], share[e, :, j]]),
+                    hovertemplate=(
+                        "Year: %{x}<br>"
+                        f"Disaster Type: {disaster_type}<br>"
+                        "Original Value: %{customdata[0]:,.0f}<br>"
+                        "Shown Value (log): %{customdata[1]:.2f}<br>"
+                        "Share of Year: %{customdata[2]:.1%}<extra></extra>"
+                    )
+                ), row=row, col=col)
 
-        fig.update_yaxes(title=f"{metric} (log-scaled)")
+        title_scope = ', '.join(entities) if countries else country
+        fig.update_layout(
+            title=f"Stacked Area Chart: {metric} Over Years by Disaster Type ({title_scope}, {year_start}-{year_end})",
+            hovermode='x unified' if not countries else 'closest',
+            height=max(450, 250 * rows)
+        )
+        fig.update_yaxes(title=f"{metric} (log-scaled)", col=1)
 
         return fig
 
     except Exception as e:
         print(f"Error creating area chart: {str(e)}")
-        return px.area()  # Empty chart if error
+        return go.Figure()  # Empty chart if error
+
+def get_area_chart_data(
+    data: pd.DataFrame,
+    country: str,
+    metric: str,
+    year_start: int,
+    year_end: int,
+    countries: list = None
+) -> pd.DataFrame:
+    """
+    Returns the (unscaled) values behind the area chart: one row per year and disaster type, and
+    per country in small-multiples mode, with missing years as 0. Arguments as in get_area_chart_viz.
+    """
+    entities, years, types, cube = _area_selection(data, country, metric, year_start, year_end, countries)
+    index = pd.MultiIndex.from_product([entities, years, types], names=['Country name', 'Year', 'Disaster Type'])
+    return pd.DataFrame({metric: cube.ravel()}, index=index).reset_index()
+
+def _area_selection(data, country, metric, year_start, year_end, countries):
+    # Filter rows and year range; returns (panels, years, disaster types, panel x year x type cube)
+    if countries:
+        mask = data['Country name'].isin(countries) & (data['Year'] >= year_start) & (data['Year'] <= year_end)
+    else:
+        # World is its own rows: summing every row would add the regions to their countries
+        mask = filter_mask(data, country, "All", year_start, year_end)
+    df_filtered = data[mask]
+    if df_filtered.empty:
+        raise ValueError("No data available for given filters.")
+
+    entities = countries or [country]
+    if countries:
+        entity_codes = pd.Categorical(df_filtered['Country name'].astype(str), categories=countries).codes
+    else:
+        entity_codes = np.zeros(len(df_filtered), dtype=np.int64)
+
+    # Years x disaster types matrix per panel, with missing years filled with 0
+    years, types, cube = _area_cube(df_filtered, metric, entity_codes, len(entities), year_start, year_end)
+    return entities, years, types, cube
+
+def _area_cube(df, metric, entity_codes, n_entities, year_start, year_end):
+    # One bincount over all rows: (panel, year, disaster type) -> metric sum
+    type_codes, types = pd.factorize(df['Disaster Type'], sort=True)
+    years = np.arange(year_start, year_end + 1)
+    n_years, n_types = len(years), len(types)
+    year_idx = df['Year'].to_numpy(dtype=np.int64) - year_start
+    values = df[metric].astype('float64').to_numpy(na_value=0.0)
+    flat = (np.asarray(entity_codes, dtype=np.int64) * n_years + year_idx) * n_types + type_codes
+    cube = np.bincount(flat, weights=values, minlength=n_entities * n_years * n_types)
+    return years, [str(t) for t in types], cube.reshape(n_entities, n_years, n_types)
@@ -0,0 +1,77 @@
+import pandas as pd
+import plotly.express as px
+from preprocessing.risk import RISK_COMPONENTS, get_risk_index
+from visualizations.geo import GEO_URL, geometry_level, load_world_geojson
+
+def get_risk_map_data(data: pd.DataFrame) -> pd.DataFrame:
+    """Returns the mapped rows of the risk index: every country with an ISO code."""
+    return get_risk_index(data).table.dropna(subset=['ISO_Code'])
+
+def get_risk_map_viz(
+    data: pd.DataFrame,
+    value_col: str = "Risk score",
+    color_scale: str = 'YlOrRd',
+    resolution: str = "auto",
+    scope: str = "world",
+    embed_geometry: bool = False
+) -> px.choropleth:
+    """
+    Creates a choropleth of the composite country risk index (see preprocessing/risk.py).
+
+    Parameters:
+    - data (pd.DataFrame): Disaster data.
+    - value_col (str): 'Risk score' or a component's points column (e.g. 'Deaths points').
+    - color_scale (str): Color scale to use (default: 'YlOrRd').
+    - resolution (str): Bundled geometry level, 'auto' or None, as in get_choropleth_viz.
+    - scope (str): Plotly geo scope, e.g. 'world' or 'europe'.
+    - embed_geometry (bool): Embed the GeoJSON in the figure instead of linking the served file.
+
+    Returns:
+    - A Plotly choropleth figure; the hover shows the rank and every component's points.
+    """
+    try:
+        table = get_risk_map_data(data)
+        if value_col not in table.columns:
+            raise ValueError(f"'{value_col}' column not found in the risk table.")
+
+        if resolution == "auto":
+            resolution = geometry_level(scope)
+        geometry = {}
+        if resolution is not None:
+            geojson = load_world_geojson(resolution) if embed_geometry else f"{GEO_URL}world_{resolution}.geojson"
+            geometry = dict(geojson=geojson, featureidkey="id")
+
+        fig = px.choropleth(
+            table,
+            locations='ISO_Code',
+            color=value_col,
+            hover_name='Country name',
+            hover_data={'Rank': True, 'ISO_Code': False, 'Risk score': ':.1f',
+                        **{f"{c} points": ':.1f' for c in RISK_COMPONENTS}, 'Main disaster type': True},
+            color_continuous_scale=color_scale,
+            range_color=(0, table[value_col].max()),
+            title=f"Country Risk Index ({value_col})",
+            scope=scope,
+            **geometry
+        )
+
+        geo = dict(showframe=False, showcoastlines=True, projection_type='equirectangular')
+        if geometry:
+            geo.update(showcoastlines=False, showland=False, showlakes=False, showcountries=False,
+                       showocean=False, showsubunits=False, showrivers=False)
+
+        fig.update_layout(
+            geo=geo,
+            coloraxis_colorbar=dict(title=value_col),
+            margin=dict(t=50, l=25, r=25, b=25),
+            font=dict(family='Tektur, Segoe UI, sans-serif', color='white'),
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+        )
+        fig.update_traces(marker_line_width=0.5, marker_line_color='white')
+
+        return fig
+
+    except Exception as e:
+        print(f"Error creating risk map: {e}")
+        return px.choropleth()
@@ -0,0 +1,65 @@
+import pandas as pd
+import plotly.graph_objects as go
+from preprocessing.trends import get_trend_index
+
+def get_biggest_movers_data(
+    data: pd.DataFrame,
+    metric: str = "Deaths",
+    disaster_type: str = "All",
+    top_n: int = 10,
+    by: str = "slope"
+) -> pd.DataFrame:
+    """Returns the plotted countries and their trends, in bar order. Arguments as in get_biggest_movers_viz."""
+    return get_trend_index(data).biggest_movers(metric, disaster_type, top_n, by).sort_values(by)
+
+def get_biggest_movers_viz(
+    data: pd.DataFrame,
+    metric: str = "Deaths",
+    disaster_type: str = "All",
+    top_n: int = 10,
+    by: str = "slope"
+) -> go.Figure:
+    """
+    Creates a diverging bar chart of the countries whose metric is rising or falling fastest.
+
+    Parameters:
+    - data (pd.DataFrame): Disaster data.
+    - metric (str): Metric to rank by (default "Deaths").
+    - disaster_type (str): Disaster type, or "All" for all disasters.
+    - top_n (int): Countries per direction (default: 10).
+    - by (str): "slope" (change per year) or "change" (change per year relative to the mean).
+
+    Returns:
+    - Plotly Figure object.
+    """
+    try:
+        index = get_trend_index(data)
+        movers = get_biggest_movers_data(data, metric, disaster_type, top_n, by)
+        if movers.empty:
+            raise ValueError("No trends available for given filters.")
+
+        values = movers[by] * (100 if by == "change" else 1)
+        fig = go.Figure(go.Bar(
+            x=values,
+            y=movers['Country name'].astype(str),
+            orientation='h',
+            marker_color=['crimson' if v > 0 else 'seagreen' for v in values],
+            customdata=movers[['r2', 'anomalies']],
+            hovertemplate="%{y}: %{x:,.2f}<br>R²: %{customdata[0]:.2f}<br>Anomalous years: %{customdata[1]}<extra></extra>"
+        ))
+
+        fig.update_layout(
+            title=f"Biggest Movers in {metric} since {index.trend_start} ({disaster_type})",
+            xaxis_title=f"{metric} per year" if by == "slope" else "% of mean per year",
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            yaxis=dict(title=None),
+            margin=dict(t=50, l=25, r=25, b=25),
+            font=dict(family='Tektur, Segoe UI, sans-serif', color='white')
+        )
+
+        return fig
+
+    except Exception as e:
+        print(f"Error creating biggest movers chart: {str(e)}")
+        return go.Figure()
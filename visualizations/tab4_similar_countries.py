@@ -0,0 +1,67 @@
+import pandas as pd
+import plotly.graph_objects as go
+from preprocessing.similarity import get_similarity_index
+
+def get_similar_countries_data(
+    data: pd.DataFrame,
+    country: str,
+    top_n: int = 10,
+    year_start: int = None,
+    year_end: int = None,
+    metric: str = "cosine"
+) -> pd.DataFrame:
+    """Returns the plotted matches, closest first. Arguments as in get_similar_countries_viz."""
+    return get_similarity_index(data).query(country, top_n, year_start, year_end, metric)
+
+def get_similar_countries_viz(
+    data: pd.DataFrame,
+    country: str,
+    top_n: int = 10,
+    year_start: int = None,
+    year_end: int = None,
+    metric: str = "cosine"
+) -> go.Figure:
+    """
+    Creates a bar chart of the countries whose disaster profile is closest to a country's.
+
+    Parameters:
+    - data (pd.DataFrame): Disaster data.
+    - country (str): Country to match.
+    - top_n (int): Number of matches (default: 10).
+    - year_start (int): Start year (default: first year in data).
+    - year_end (int): End year (default: last year in data).
+    - metric (str): "cosine" (similarity) or "euclidean" (distance) between profiles.
+
+    Returns:
+    - Plotly Figure object.
+    """
+    try:
+        matches = get_similar_countries_data(data, country, top_n, year_start, year_end, metric)
+        if matches.empty:
+            raise ValueError("No comparable countries for given filters.")
+        value_col = matches.columns[1]
+
+        fig = go.Figure(go.Bar(
+            x=matches[value_col],
+            y=matches['Country name'],
+            orientation='h',
+            marker=dict(color=matches[value_col], colorscale='Viridis', reversescale=value_col == 'distance'),
+            hovertemplate=f"%{{y}}: {value_col} %{{x:.3f}}<extra></extra>"
+        ))
+
+        period = f", {year_start or 'start'}-{year_end or 'end'}" if year_start or year_end else ""
+        fig.update_layout(
+            title=f"Countries with a Disaster Profile like {country}{period}",
+            xaxis_title="Cosine similarity" if value_col == 'similarity' else "Distance",
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            yaxis=dict(autorange='reversed', title=None),
+            margin=dict(t=50, l=25, r=25, b=25),
+            font=dict(family='Tektur, Segoe UI, sans-serif', color='white')
+        )
+
+        return fig
+
+    except Exception as e:
+        print(f"Error creating similar countries chart: {str(e)}")
+        return go.Figure()
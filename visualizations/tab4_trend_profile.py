@@ -0,0 +1,69 @@
+import pandas as pd
+import plotly.graph_objects as go
+from preprocessing.trends import get_trend_index
+
+def get_trend_profile_data(
+    data: pd.DataFrame,
+    country: str = "World",
+    disaster_type: str = "All",
+    metric: str = "Deaths"
+) -> pd.DataFrame:
+    """Returns the plotted series: 'Year', 'value', 'trend' and 'anomaly'. Arguments as in get_trend_profile_viz."""
+    return get_trend_index(data).series(country, disaster_type, metric)
+
+def get_trend_profile_viz(
+    data: pd.DataFrame,
+    country: str = "World",
+    disaster_type: str = "All",
+    metric: str = "Deaths"
+) -> go.Figure:
+    """
+    Creates a yearly chart of one metric for a country with its linear trend and anomalous years.
+
+    Parameters:
+    - data (pd.DataFrame): Disaster data.
+    - country (str): Country or aggregate region (default "World").
+    - disaster_type (str): Disaster type, or "All" for all disasters.
+    - metric (str): Metric to show (default "Deaths").
+
+    Returns:
+    - Plotly Figure object.
+    """
+    try:
+        index = get_trend_index(data)
+        series = get_trend_profile_data(data, country, disaster_type, metric)
+        if not series['value'].any():
+            raise ValueError("No data available for given filters.")
+        anomalies = series[series['anomaly']]
+
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=series['Year'], y=series['value'], name=metric, marker_color='royalblue'))
+        fig.add_trace(go.Scatter(
+            x=series['Year'], y=series['trend'],
+            mode='lines', line=dict(color='orange', dash='dash'),
+            name=f"Trend since {index.trend_start}"
+        ))
+        fig.add_trace(go.Scatter(
+            x=anomalies['Year'], y=anomalies['value'],
+            mode='markers', marker=dict(color='crimson', size=10, symbol='diamond'),
+            name="Anomalous year"
+        ))
+
+        fig.update_layout(
+            title=f"{metric} Trend ({country}, {disaster_type})",
+            xaxis_title="Year",
+            yaxis_title=metric,
+            hovermode="x unified",
+            template="plotly_dark",
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            legend=dict(orientation='h', y=-0.2),
+            margin=dict(t=50, l=25, r=25, b=25),
+            font=dict(family='Tektur, Segoe UI, sans-serif', color='white')
+        )
+
+        return fig
+
+    except Exception as e:
+        print(f"Error creating trend profile: {str(e)}")
+        return go.Figure()
@@ -1,66 +1,71 @@
+import numpy as np
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+import plotly.graph_objects as go
+from preprocessing.correlation import get_correlation_engine
+
+def get_country_metric_correlation_data(
+    data: pd.DataFrame,
+    country: str = "India",
+    year_start: int = 2000,
+    year_end: int = 2020,
+    metrics: list = ['Deaths', 'Injuries', 'Assistance', 'Damages', 'Affected', 'Rendered homeless'],
+    method: str = "pearson"
+) -> pd.DataFrame:
+    """Returns the correlation matrix, metrics x metrics. Arguments as in get_country_metric_correlation_viz."""
+    # Matrices come from the batched engine (built once per dataset for all countries)
+    return get_correlation_engine(data).matrix(country, year_start, year_end, method).loc[metrics, metrics].rename_axis(index='Metric')
 
 def get_country_metric_correlation_viz(
     data: pd.DataFrame,
     country: str = "India",
     year_start: int = 2000,
     year_end: int = 2020,
-    metrics: list = ['Deaths', 'Injuries', 'Assistance', 'Damages', 'Affected', 'Rendered homeless']
-) -> None:
+    metrics: list = ['Deaths', 'Injuries', 'Assistance', 'Damages', 'Affected', 'Rendered homeless'],
+    method: str = "pearson"
+) -> go.Figure:
     """
     Plots a heatmap of correlations between selected metrics for a given country and time range.
 
     Parameters:
     - data (pd.DataFrame): Original disaster data.
-    - country (str): Country to filter.
+    - country (str): Country to filter ('World' uses the World rows).
     - year_start (int): Start year.
     - year_end (int): End year.
     - metrics (list): List of metrics to include in the correlation heatmap.
+    - method (str): 'pearson' or 'spearman'.
 
     Returns:
-    - None (displays a seaborn heatmap plot).
+    - Plotly heatmap figure.
     """
     try:
-        # Copy data
-        df_filtered = data.copy()
+        corr_matrix = get_country_metric_correlation_data(data, country, year_start, year_end, metrics, method)
 
-        # Filter by country
-        if country != "World":
-            df_filtered = df_filtered[df_filtered['Country name'] == country]
-        # Filter data
-        df_country = df_filtered[
-            (data['Year'] >= year_start) &
-            (data['Year'] <= year_end)
-        ]
-
-        if df_country.empty:
-            print("Filtered data is empty. No plot will be shown.")
-            return
-
-        # Group by year and aggregate
-        df_yearly = df_country.groupby('Year').agg({
-            'Deaths': 'sum',
-            'Injuries': 'sum',
-            'Assistance': 'sum',
-            'Damages': 'mean',  # Assuming % GDP
-            'Affected': 'sum',
-            'Rendered homeless': 'sum'
-        }).reset_index()
-
-        # Prepare correlation matrix
-        df_corr = df_yearly[metrics].fillna(0)
-        corr_matrix = df_corr.corr()
+        if corr_matrix.isna().all().all():
+            raise ValueError("Not enough data to compute correlations for this filter.")
 
         # Plot heatmap
-        plt.figure(figsize=(8, 6))
-        sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', vmin=-1, vmax=1)
-        plt.title(f'Metric Correlation Over Time in {country} ({year_start}–{year_end})')
-        plt.xticks(rotation=45)
-        plt.yticks(rotation=0)
-        plt.tight_layout()
-        plt.show()
+        fig = go.Figure(go.Heatmap(
+            z=corr_matrix.to_numpy(),
+            x=metrics,
+            y=metrics,
+            zmin=-1,
+            zmax=1,
+            colorscale='RdBu_r',
+            text=np.round(corr_matrix.to_numpy(), 2),
+            texttemplate="%{text}",
+            hovertemplate="%{y} vs %{x}: %{z:.2f}<extra></extra>"
+        ))
+        fig.update_layout(
+            title=f'Metric Correlation Over Time in {country} ({year_start}–{year_end}, {method.title()})',
+            xaxis=dict(tickangle=45),
+            yaxis=dict(autorange='reversed'),
+            template="plotly_dark",
+            width=700,
+            height=600
+        )
+
+        return fig
 
     except Exception as e:
         print(f"Error creating correlation heatmap: {str(e)}")
+        return go.Figure()
@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-import networkx as nx
 import plotly.graph_objects as go
 
 def get_disaster_network_viz(
@@ -26,6 +25,8 @@ def get_disaster_network_viz(
     - go.Figure: Plotly network graph figure.
     """
 
+    import networkx as nx  # deferred: only needed by this view
+
     # Filter data
     df_filtered = data[
         (data['Country name'] == country) &
@@ -36,7 +37,7 @@ def get_disaster_network_viz(
         raise ValueError("No data available for given filters.")
 
     # Pivot: group by year and disaster type
-    pivot_df = df_filtered.groupby(['Year', 'Disaster Type'])[metric].sum().reset_index()
+    pivot_df = df_filtered.groupby(['Year', 'Disaster Type'], observed=True)[metric].sum().reset_index()
 
     # Create wide format
     pivot_wide = pivot_df.pivot(index='Year', columns='Disaster Type', values=metric).fillna(0)
@@ -1,59 +1,96 @@
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+from preprocessing.aggregate import filter_mask
+from preprocessing.totals import select_totals
+
+GRANULARITIES = ("year", "record")
+
+def get_multi_metric_parallel_data(
+    data: pd.DataFrame,
+    country: str = "World",
+    disaster_type: str = "All",
+    metrics: list = ['Deaths', 'Injuries', 'Assistance', 'Damages', 'Affected', "Rendered homeless"],
+    granularity: str = "year",
+    max_lines: int = 2000,
+    seed: int = 0
+) -> pd.DataFrame:
+    """
+    Returns the lines of the plot, before scaling: one row per year (indexed by 'Year'), or the
+    (sampled) records in "record" mode. Arguments as in get_multi_metric_parallel_viz.
+    """
+    _check_granularity(granularity)
+    if granularity == "record":
+        df_plot, keep = _record_lines(data, country, disaster_type, metrics, max_lines, seed)
+        lines = df_plot.iloc[keep][['Country name', 'Year', 'Disaster Type', *metrics]]
+        return lines.astype({m: 'float64' for m in metrics}).fillna({m: 0.0 for m in metrics})
+    # One precomputed row per year; unreported counts as 0
+    return select_totals(data, country, disaster_type).set_index('Year')[metrics].fillna(0)
 
 def get_multi_metric_parallel_viz(
     data: pd.DataFrame,
     country: str = "World",
     disaster_type: str = "All",
-    metrics: list = ['Deaths', 'Injuries', 'Assistance', 'Damages', 'Affected', "Rendered homeless"]
-) -> px.parallel_coordinates:
+    metrics: list = ['Deaths', 'Injuries', 'Assistance', 'Damages', 'Affected', "Rendered homeless"],
+    granularity: str = "year",
+    scale: str = "minmax",
+    max_lines: int = 2000,
+    seed: int = 0
+) -> go.Figure:
     """
     Creates an interactive parallel coordinates plot to compare multiple metrics over years.
 
     Parameters:
     - data (pd.DataFrame): Original disaster data.
-    - country (str): Country to filter. If "World", uses all countries.
-    - disaster_type (str): Disaster type to filter. If "All", uses all types.
+    - country (str): Country to filter. If "World", uses the World rows (every country's records in
+      "record" mode, excluding the aggregate regions).
+    - disaster_type (str): Disaster type to filter. If "All", uses all types (the all-disasters
+      totals in "year" mode).
     - metrics (list): List of metrics to include.
+    - granularity (str): "year" for one line per year (colored by year), or "record" for one line
+      per country-year-disaster record (colored by disaster type).
+    - scale (str): Axis scaling: "minmax", "log" (log1p then min-max) or "quantile" (percentile rank).
+    - max_lines (int): Line budget in "record" mode; larger selections are sampled per disaster type.
+    - seed (int): Random seed for the sampling.
 
     Returns:
     - Plotly parallel coordinates figure.
     """
     try:
-        # Filter data
-        df_filtered = data.copy()
-        if country != "World":
-            df_filtered = df_filtered[df_filtered['Country name'] == country]
-        if disaster_type != "All":
-            df_filtered = df_filtered[df_filtered['Disaster Type'] == disaster_type]
-
-        # Aggregate by year
-        df_agg = df_filtered.groupby('Year')[metrics].sum().reset_index()
+        _check_granularity(granularity)
+        if granularity == "record":
+            df_plot, keep = _record_lines(data, country, disaster_type, metrics, max_lines, seed)
+            codes, types = pd.factorize(df_plot['Disaster Type'], sort=True)
+            values = df_plot[metrics].astype('float64').to_numpy(na_value=0.0)[keep]
+            codes = codes[keep]
+            color_dim = dict(
+                color=codes,
+                colorscale=_discrete_colorscale(len(types)),
+                cmin=-0.5, cmax=len(types) - 0.5,
+                showscale=True,
+                colorbar=dict(tickvals=list(range(len(types))), ticktext=[str(t) for t in types])
+            )
+            sampled = f", {len(codes):,} of {len(df_plot):,} records" if len(codes) < len(df_plot) else ""
+        else:
+            df_agg = get_multi_metric_parallel_data(data, country, disaster_type, metrics)
+            if df_agg.empty:
+                raise ValueError("Filtered data is empty. Cannot plot.")
+            values = df_agg.astype('float64').to_numpy()
+            color_dim = dict(color=df_agg.index.to_numpy(), colorscale=px.colors.sequential.Viridis, showscale=True)
+            sampled = ""
 
-        if df_agg.empty:
-            raise ValueError("Filtered data is empty. Cannot plot.")
+        # Normalize all columns at once
+        norm = _scale_columns(values, scale)
 
-        # Normalize columns
-        df_norm = df_agg.copy()
-        for metric in metrics:
-            min_val = df_norm[metric].min()
-            max_val = df_norm[metric].max()
-            if max_val - min_val > 0:
-                df_norm[metric] = (df_norm[metric] - min_val) / (max_val - min_val)
-            else:
-                df_norm[metric] = 0  # In case of constant column
-
-        # Create parallel coordinates plot
-        fig = px.parallel_coordinates(
-            df_norm,
-            dimensions=metrics,
-            color='Year',
-            title=f"Multi-Metric Parallel Coordinates ({country if country != 'World' else 'World'}, {disaster_type})",
-            color_continuous_scale=px.colors.sequential.Viridis
-        )
+        fig = go.Figure(go.Parcoords(
+            line=color_dim,
+            dimensions=[dict(label=metric, values=norm[:, i], range=[0, 1]) for i, metric in enumerate(metrics)]
+        ))
 
         # Optional: Style adjustments (Plotly parallel_coordinates does not support detailed hover text yet)
         fig.update_layout(
+            title=f"Multi-Metric Parallel Coordinates ({country if country != 'World' else 'World'}, {disaster_type}{sampled})",
             title_font_size=20,
             width=1000,
             height=500,
@@ -64,4 +101,49 @@ def get_multi_metric_parallel_viz(
 
     except Exception as e:
         print(f"Error creating parallel coordinates plot: {str(e)}")
-        return px.parallel_coordinates(pd.DataFrame({'Empty': []}), dimensions=['Empty'])  # Return empty figure if error
+        return go.Figure()  # Return empty figure if error
+
+def _check_granularity(granularity):
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}, not {granularity!r}")
+
+def _record_lines(data, country, disaster_type, metrics, max_lines, seed):
+    # Records of the selection and the positions of those drawn (sampled per disaster type);
+    # World's records are every country's, without the aggregate regions
+    df_filtered = data[filter_mask(data, country, disaster_type, by_country=True)]
+    # Records with no reported metric carry no information
+    df_plot = df_filtered[df_filtered[metrics].notna().any(axis=1)]
+    if df_plot.empty:
+        raise ValueError("Filtered data is empty. Cannot plot.")
+    codes, _ = pd.factorize(df_plot['Disaster Type'], sort=True)
+    return df_plot, _stratified_sample(codes, max_lines, seed)
+
+def _scale_columns(values, scale):
+    if scale == "quantile":
+        # Percentile rank per column; ties share their average rank
+        return pd.DataFrame(values).rank(pct=True).to_numpy()
+    if scale == "log":
+        values = np.log1p(values)
+    mins = values.min(axis=0)
+    spans = values.max(axis=0) - mins
+    return np.divide(values - mins, spans, out=np.zeros_like(values), where=spans > 0)
+
+def _stratified_sample(codes, budget, seed):
+    # Keep each group's share of the rows: shuffle, sort by group, take the first quota[g] of each group
+    n = len(codes)
+    if n <= budget:
+        return np.arange(n)
+    counts = np.bincount(codes)
+    quota = np.maximum(1, np.floor(counts * budget / n)).astype(np.int64)
+    order = np.lexsort((np.random.default_rng(seed).random(n), codes))
+    group_start = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank_in_group = np.arange(n) - group_start[codes[order]]
+    return np.sort(order[rank_in_group < quota[codes[order]]])
+
+def _discrete_colorscale(n):
+    palette = px.colors.qualitative.Plotly
+    scale = []
+    for i in range(n):
+        color = palette[i % len(palette)]
+        scale += [[i / n, color], [(i + 1) / n, color]]
+    return scale
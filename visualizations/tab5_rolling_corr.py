@@ -1,5 +1,43 @@
 import pandas as pd
 import plotly.graph_objects as go
+from preprocessing.totals import select_totals
+
+ROLLING_METRICS = ['Deaths', 'Injuries', 'Assistance', 'Damages', 'Affected', "Rendered homeless"]
+
+def get_rolling_correlation_data(
+    data: pd.DataFrame,
+    country: str = "World",
+    disaster_type: str = "All",
+    metric_x: str = "Deaths",
+    metric_y: str = "Damages",
+    window_size: int = 5
+) -> pd.DataFrame:
+    """
+    Returns the plotted line: 'Year' (end of the rolling window) and 'Correlation'.
+    Arguments as in get_rolling_correlation_viz.
+    """
+    # Validate metrics
+    if metric_x not in ROLLING_METRICS or metric_y not in ROLLING_METRICS:
+        raise ValueError(f"Metrics must be one of: {ROLLING_METRICS}")
+
+    # One precomputed row per year (World rows, all-disasters totals); unreported counts as 0
+    df_agg = select_totals(data, country, disaster_type)[['Year', metric_x, metric_y]]
+    df_agg = df_agg.astype('float64').fillna(0).reset_index(drop=True)
+
+    if df_agg.empty or len(df_agg) < window_size:
+        raise ValueError("Not enough data points to compute rolling correlation.")
+
+    # Compute rolling correlations
+    rolling_corrs = []
+    years = []
+
+    for i in range(len(df_agg) - window_size + 1):
+        window = df_agg.iloc[i:i + window_size]
+        corr_value = window[[metric_x, metric_y]].corr().iloc[0, 1]
+        rolling_corrs.append(corr_value)
+        years.append(int(df_agg.iloc[i + window_size - 1]['Year']))
+
+    return pd.DataFrame({'Year': years, 'Correlation': rolling_corrs})
 
 def get_rolling_correlation_viz(
     data: pd.DataFrame,
@@ -14,8 +52,8 @@ def get_rolling_correlation_viz(
 
     Parameters:
     - data (pd.DataFrame): Original disaster data.
-    - country (str): Country to filter. If "World", use all data.
-    - disaster_type (str): Disaster type to filter. If "All", use all types.
+    - country (str): Country or aggregate region (default "World").
+    - disaster_type (str): Disaster type to filter. If "All", use the all-disasters totals.
     - metric_x (str): First metric for correlation (default "Deaths").
     - metric_y (str): Second metric for correlation (default "Damages").
     - window_size (int): Rolling window size in years (default 5).
@@ -24,37 +62,9 @@ def get_rolling_correlation_viz(
     - Plotly Figure object.
     """
     try:
-        # Copy data
-        df_filtered = data.copy()
-
-        # Filter by country
-        if country != "World":
-            df_filtered = df_filtered[df_filtered['Country name'] == country]
-
-        # Filter by disaster type
-        if disaster_type != "All":
-            df_filtered = df_filtered[df_filtered['Disaster Type'] == disaster_type]
-
-        # Validate metrics
-        metrics = ['Deaths', 'Injuries', 'Assistance', 'Damages', 'Affected', "Rendered homeless"]
-        if metric_x not in metrics or metric_y not in metrics:
-            raise ValueError(f"Metrics must be one of: {metrics}")
-
-        # Aggregate by year
-        df_agg = df_filtered.groupby('Year')[metrics].sum().reset_index()
-
-        if df_agg.empty or len(df_agg) < window_size:
-            raise ValueError("Not enough data points to compute rolling correlation.")
-
-        # Compute rolling correlations
-        rolling_corrs = []
-        years = []
-
-        for i in range(len(df_agg) - window_size + 1):
-            window = df_agg.iloc[i:i + window_size]
-            corr_value = window[[metric_x, metric_y]].corr().iloc[0, 1]
-            rolling_corrs.append(corr_value)
-            years.append(int(df_agg.iloc[i + window_size - 1]['Year']))
+        df_corr = get_rolling_correlation_data(data, country, disaster_type, metric_x, metric_y, window_size)
+        years = df_corr['Year'].tolist()
+        rolling_corrs = df_corr['Correlation'].tolist()
 
         # Create Plotly line plot
         fig = go.Figure()
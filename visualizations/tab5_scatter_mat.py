@@ -1,6 +1,37 @@
+import numpy as np
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from preprocessing.aggregate import filter_mask
+
+GRANULARITIES = ("year", "country-year")
+
+def get_scatter_matrix_data(
+    data: pd.DataFrame,
+    country: str = "India",
+    year_start: int = 2000,
+    year_end: int = 2020,
+    disaster_type: str = "All",
+    metric_x: str = "Deaths",
+    metric_y: str = "Damages",
+    metrics: list = None,
+    granularity: str = "year"
+) -> pd.DataFrame:
+    """
+    Returns the points of the scatter matrix: the metric sums per year (or country and year),
+    indexed by the point keys. Arguments as in get_scatter_matrix_viz.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}, not {granularity!r}")
+    metrics = metrics or [metric_x, metric_y]
+
+    # Filter data; World is its own rows, or every country's (without the aggregate regions) per country
+    by_country = granularity == "country-year"
+    df_filtered = data[filter_mask(data, country, disaster_type, year_start, year_end, by_country=by_country)]
+
+    keys = ['Country name', 'Year'] if by_country else ['Year']
+    df_points = df_filtered.groupby(keys, observed=True)[metrics].sum(min_count=1)
+    return df_points[df_points.notna().any(axis=1)]
 
 def get_scatter_matrix_viz(
     data: pd.DataFrame,
@@ -9,54 +40,91 @@ def get_scatter_matrix_viz(
     year_end: int = 2020,
     disaster_type: str = "All",
     metric_x: str = "Deaths",
-    metric_y: str = "Damages"
-) -> None:
+    metric_y: str = "Damages",
+    metrics: list = None,
+    granularity: str = "year",
+    density_threshold: int = 5000,
+    bins: int = 40
+) -> go.Figure:
     """
-    Plots a scatter matrix (pair plot) between two metrics for a given country, time range, and disaster type.
+    Plots a scatter matrix between metrics for a given country, time range, and disaster type.
 
     Parameters:
     - data (pd.DataFrame): Original disaster data.
-    - country (str): Country to filter. If "World", no country filter is applied.
+    - country (str): Country or aggregate region to filter. "World" uses the World rows, or every
+      country's rows (without the aggregate regions) at "country-year" granularity.
     - year_start (int): Start year.
     - year_end (int): End year.
     - disaster_type (str): Disaster type to filter. If "All", no disaster filter is applied.
     - metric_x (str): First metric for scatter plot.
     - metric_y (str): Second metric for scatter plot.
+    - metrics (list): Metrics for the matrix (overrides metric_x/metric_y), e.g. all six.
+    - granularity (str): "year" for one point per year, "country-year" for one point per country and year.
+    - density_threshold (int): Above this many points, plot log-scaled 2-D binned density instead of points.
+    - bins (int): Bins per axis in density mode.
 
     Returns:
-    - None (displays a seaborn pair plot).
+    - Plotly figure: a WebGL splom, or a grid of density heatmaps for large selections.
     """
     try:
-        # Filter data
-        df_filtered = data.copy()
-        if country != "World":
-            df_filtered = df_filtered[df_filtered['Country name'] == country]
-        df_filtered = df_filtered[
-            (df_filtered['Year'] >= year_start) &
-            (df_filtered['Year'] <= year_end)
-        ]
-        if disaster_type != "All":
-            df_filtered = df_filtered[df_filtered['Disaster Type'] == disaster_type]
-
-        # Group by year and aggregate
-        df_yearly = df_filtered.groupby('Year').agg({
-            metric_x: 'sum',
-            metric_y: 'sum'
-        }).reset_index()
-
-        if df_yearly.empty:
-            print("Filtered data is empty. No plot will be shown.")
-            return
-
-        # Pair plot (scatter matrix of two metrics)
-        sns.pairplot(df_yearly[[metric_x, metric_y]], diag_kind='kde')
-        plt.suptitle(
-            f"Scatter Matrix: {metric_x} vs {metric_y}\n"
-            f"{country if country != 'World' else 'World'}, {disaster_type} ({year_start}–{year_end})",
-            y=1.02, fontsize=14
+        metrics = metrics or [metric_x, metric_y]
+        df_points = get_scatter_matrix_data(data, country, year_start, year_end, disaster_type,
+                                            metric_x, metric_y, metrics, granularity)
+
+        if df_points.empty:
+            raise ValueError("Filtered data is empty. No plot will be shown.")
+
+        values = df_points.astype('float64').to_numpy(na_value=0.0)
+        scope = f"{country if country != 'World' else 'World'}, {disaster_type} ({year_start}–{year_end})"
+
+        if len(values) > density_threshold:
+            fig = _density_matrix(values, metrics, bins)
+            title = f"Scatter Matrix Density (log10 + 1, {len(values):,} points)<br>{scope}"
+        else:
+            hover = [' '.join(map(str, k)) if isinstance(k, tuple) else str(k) for k in df_points.index]
+            fig = go.Figure(go.Splom(
+                dimensions=[dict(label=m, values=values[:, i]) for i, m in enumerate(metrics)],
+                text=hover,
+                diagonal=dict(visible=False),
+                showupperhalf=False,
+                marker=dict(size=5, opacity=0.6, color='royalblue')
+            ))
+            title = f"Scatter Matrix: {', '.join(metrics)}<br>{scope}"
+
+        fig.update_layout(
+            title=title,
+            title_font_size=14,
+            template="plotly_dark",
+            height=max(450, 180 * len(metrics)),
+            width=max(450, 180 * len(metrics))
         )
-        plt.tight_layout()
-        plt.show()
+        return fig
 
     except Exception as e:
         print(f"Error creating scatter matrix plot: {str(e)}")
+        return go.Figure()
+
+def _density_matrix(values, metrics, bins):
+    # Payload is n_metrics^2 * bins^2 cells, whatever the number of points
+    logged = np.log10(values + 1)
+    n = len(metrics)
+    fig = make_subplots(rows=n, cols=n, horizontal_spacing=0.02, vertical_spacing=0.02)
+    edges = [np.linspace(0, max(col.max(), 1e-9), bins + 1) for col in logged.T]
+    for i in range(n):
+        for j in range(n):
+            if i == j:
+                counts, _ = np.histogram(logged[:, i], bins=edges[i])
+                fig.add_trace(go.Bar(x=edges[i][:-1], y=counts, marker_color='royalblue', showlegend=False),
+                              row=i + 1, col=j + 1)
+            elif i > j:
+                counts, _, _ = np.histogram2d(logged[:, j], logged[:, i], bins=[edges[j], edges[i]])
+                fig.add_trace(go.Heatmap(
+                    x=edges[j][:-1], y=edges[i][:-1], z=np.round(np.log1p(counts.T), 2),
+                    colorscale='Viridis', showscale=False,
+                    hovertemplate=f"{metrics[j]} (log): %{{x:.2f}}<br>{metrics[i]} (log): %{{y:.2f}}<extra></extra>"
+                ), row=i + 1, col=j + 1)
+            if i == n - 1:
+                fig.update_xaxes(title_text=metrics[j], row=i + 1, col=j + 1)
+            if j == 0:
+                fig.update_yaxes(title_text=metrics[i], row=i + 1, col=j + 1)
+    return fig
@@ -1,49 +1,72 @@
 
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
+from visualizations.hierarchy import HIERARCHY_LEVELS, add_hierarchy_columns, build_hierarchy, hierarchy_from_paths
 
-def get_sunburst_viz(data: pd.DataFrame) -> px.sunburst:
+def get_sunburst_viz(
+    data: pd.DataFrame,
+    metric: str = "Deaths",
+    year_start: int = None,
+    year_end: int = None,
+    levels: list = None,
+    bucket_size: int = 10,
+    maxdepth: int = 2,
+    title: str = None
+) -> go.Figure:
     """
-    Creates a sunburst visualization using the provided preprocessed data.
+    Creates a sunburst visualization from ids/parents/values built with vectorized groupbys.
 
     Parameters:
-    - data (pd.DataFrame): A DataFrame with columns 'path' (list of strings) and 'value' (numeric).
+    - data (pd.DataFrame): Either a DataFrame with 'path' (list of strings) and 'value' (numeric)
+      columns, or disaster data with 'Country name', 'Year', 'Disaster Type' and metric columns.
+    - metric (str): Metric to sum for disaster data (default: 'Deaths').
+    - year_start (int): Start year for disaster data (default: first year).
+    - year_end (int): End year for disaster data (default: last year).
+    - levels (list): Hierarchy levels for disaster data (default: Continent, Country name,
+      Disaster Type, Year bucket).
+    - bucket_size (int): Width of 'Year bucket' in years (default: 10).
+    - maxdepth (int): Rings shown at once; deeper levels are revealed by clicking (default: 2).
+    - title (str): Plot title.
 
     Returns:
     - A Plotly sunburst figure.
     """
     try:
-        # Validate required columns
-        if 'path' not in data.columns or 'value' not in data.columns:
-            raise ValueError("DataFrame must have 'path' and 'value' columns.")
+        if 'path' in data.columns and 'value' in data.columns:
+            # Validate 'path' column contains lists
+            if not all(isinstance(p, list) for p in data['path']):
+                raise ValueError("'path' column must contain lists of strings.")
 
-        # Validate 'path' column contains lists
-        if not all(isinstance(p, list) for p in data['path']):
-            raise ValueError("'path' column must contain lists of strings.")
+            # Validate 'value' column is numerical
+            if not pd.api.types.is_numeric_dtype(data['value']):
+                raise ValueError("'value' column must be numerical.")
 
-        # Validate 'value' column is numerical
-        if not pd.api.types.is_numeric_dtype(data['value']):
-            raise ValueError("'value' column must be numerical.")
+            nodes = hierarchy_from_paths(data)
+            title = title or "India's GDP Sunburst"
+        else:
+            if metric not in data.columns:
+                raise ValueError(f"'{metric}' column not found in data.")
+            levels = levels or HIERARCHY_LEVELS
+            nodes = build_hierarchy(get_sunburst_data(data, metric, year_start, year_end, levels, bucket_size),
+                                    levels, metric)
+            title = title or f"{metric} by {' → '.join(levels)}"
 
-        # Debug: Print sample data
-        print("Sunburst data sample:", data.head().to_dict())
-
-        # Transform 'path' into separate columns
-        max_depth = max(len(path) for path in data['path'])
-        path_columns = [f'level{i+1}' for i in range(max_depth)]
-        path_df = pd.DataFrame(data['path'].tolist(), columns=path_columns, index=data.index)
-        transformed_data = pd.concat([path_df, data['value']], axis=1)
+        if nodes.empty:
+            raise ValueError("All values are zero for this filter.")
 
         # Create the sunburst visualization
-        fig = px.sunburst(
-            transformed_data,
-            path=path_columns,
-            values='value',
-            title="India's GDP Sunburst"
-        )
+        fig = go.Figure(go.Sunburst(
+            ids=nodes['ids'],
+            labels=nodes['labels'],
+            parents=nodes['parents'],
+            values=nodes['values'],
+            branchvalues='total',
+            maxdepth=maxdepth
+        ))
 
         # Update layout
         fig.update_layout(
+            title=title,
             paper_bgcolor='rgba(0,0,0,0)',
             plot_bgcolor='rgba(0,0,0,0)',
             margin=dict(t=50, l=25, r=25, b=25),
@@ -54,7 +77,29 @@ def get_sunburst_viz(data: pd.DataFrame) -> px.sunburst:
 
     except Exception as e:
         print(f"Error creating sunburst visualization: {str(e)}")
-        return px.sunburst()  # Return an empty figure if there's an error
+        return go.Figure()  # Return an empty figure if there's an error
+
+def get_sunburst_data(
+    data: pd.DataFrame,
+    metric: str = "Deaths",
+    year_start: int = None,
+    year_end: int = None,
+    levels: list = None,
+    bucket_size: int = 10
+) -> pd.DataFrame:
+    """
+    Returns the leaves of the sunburst for disaster data: one row per path through its levels
+    (outermost first) with the metric total. Arguments as in get_sunburst_viz.
+    """
+    levels = levels or HIERARCHY_LEVELS
+    mask = pd.Series(True, index=data.index)
+    if year_start is not None:
+        mask &= data['Year'] >= year_start
+    if year_end is not None:
+        mask &= data['Year'] <= year_end
+    frame = add_hierarchy_columns(data[mask], bucket_size)
+    # Keep paths that end early (NaN in deeper levels); build_hierarchy counts them toward their ancestors
+    return frame.groupby(levels, observed=True, dropna=False)[metric].sum().reset_index()
 
 # Example usage for testing
 if __name__ == "__main__":